@@ -6,9 +6,17 @@ Mobile-friendly dashboard for approving templates and monitoring business
 import streamlit as st
 import json
 import os
+import sys
+import sqlite3
+import hashlib
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent / "engines"))
+
+from opportunity_store import OpportunityStore
+from quality_scorer import score_value
+
 # Page config
 st.set_page_config(
     page_title="AI Factory - CEO Dashboard",
@@ -54,104 +62,375 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def load_pending_templates():
-    """Load all templates pending approval"""
-    # Check multiple possible paths (local dev vs Streamlit Cloud)
-    possible_paths = [
-        Path("/home/claude/ai-factory/products/financial-templates/pending"),
-        Path("products/financial-templates/pending"),
-        Path("../products/financial-templates/pending"),
-        Path("./products/financial-templates/pending"),
-    ]
-    
-    pending_dir = None
-    for path in possible_paths:
-        if path.exists():
-            pending_dir = path
-            break
-    
-    # If no directory exists, return empty list (fresh deployment)
-    if pending_dir is None or not pending_dir.exists():
-        return []
-    
+# Check multiple possible paths (local dev vs Streamlit Cloud)
+PENDING_DIRS = [
+    Path("/home/claude/ai-factory/products/financial-templates/pending"),
+    Path("products/financial-templates/pending"),
+    Path("../products/financial-templates/pending"),
+    Path("./products/financial-templates/pending"),
+]
+APPROVED_DIR = Path("/home/claude/ai-factory/products/financial-templates/approved")
+
+EMPTY_PENDING = {'templates': [], 'count': 0, 'avg_score': 0, 'categories': []}
+
+# Pending templates shown per page
+PAGE_SIZES = [10, 25, 50, 100, 200]
+
+SORT_ORDERS = {
+    "Newest first": (lambda t: t['created_at'], True),
+    "Oldest first": (lambda t: t['created_at'], False),
+    "Highest score": (lambda t: t['score'], True),
+    "Lowest score": (lambda t: t['score'], False),
+}
+
+# Every Streamlit rerun (each button click) calls the loaders below. They only
+# stat files to build a signature; the parsing is cached on that signature, so
+# reruns with unchanged data read nothing from disk. The parsed data is cached
+# with cache_resource, which hands back the same objects rather than unpickling
+# a copy per rerun (~40 ms for 1,000 templates) - the page only reads them.
+
+def file_signature(path):
+    """(mtime, size) of a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def scan_files(directory, suffix=".json"):
+    """(name, mtime, size) of every matching file, sorted by name"""
+    return sorted((entry.name, stat.st_mtime_ns, stat.st_size)
+                  for entry in os.scandir(directory) if entry.name.endswith(suffix)
+                  for stat in [entry.stat()])
+
+def dir_signature(directory, suffix=".json"):
+    """Digest of the name, mtime and size of every matching file - changes when one is added, removed or rewritten"""
+    try:
+        entries = scan_files(directory, suffix)
+    except OSError:
+        return None
+    return hashlib.sha1(repr(entries).encode()).hexdigest()
+
+@st.cache_resource(show_spinner=False, max_entries=100)
+def read_template(path, mtime_ns, size):
+    """One template package, parsed once per version of the file"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+@st.cache_resource(show_spinner=False, max_entries=10000)
+def read_template_summary(path, mtime_ns, size):
+    """The fields the pending list shows and filters on; structure and design specs stay on disk"""
+    with open(path, 'r') as f:
+        template = json.load(f)
+    concept = template['concept']
+    quality = template['quality_score']
+    return {
+        'id': template['id'],
+        'file': (path, mtime_ns, size),
+        'name': concept['name'],
+        'description': concept.get('description', ''),
+        'target_audience': concept.get('target_audience', ''),
+        'price_point': concept.get('price_point', ''),
+        'category': template.get('category') or "Uncategorized",
+        'created_at': template.get('created_at', ''),
+        'score': score_value(quality),
+        'total_score': quality['total_score'],
+        'design_score': quality['design_score'],
+        'functionality_score': quality['functionality_score'],
+        'completeness_score': quality['completeness_score'],
+    }
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def read_pending_index(pending_dir, signature):
+    """Summaries of every pending template with the aggregates precomputed
+
+    Summaries are cached per file, so a new template costs one parse
+    rather than a re-read of the whole directory.
+    """
     templates = []
     try:
-        for file in pending_dir.glob("*.json"):
-            with open(file, 'r') as f:
-                templates.append(json.load(f))
-    except Exception as e:
-        # If we can't read files, return empty (permission issues, etc.)
-        return []
+        entries = scan_files(pending_dir)
+    except OSError:
+        # If we can't read the directory, nothing is pending (permission issues, etc.)
+        return EMPTY_PENDING
+    for name, mtime_ns, size in entries:
+        try:
+            templates.append(read_template_summary(os.path.join(pending_dir, name), mtime_ns, size))
+        except (OSError, ValueError, KeyError):
+            continue  # Unreadable or half-written package
     
-    return sorted(templates, key=lambda x: x.get('created_at', ''), reverse=True)
+    return {
+        'templates': templates,
+        'count': len(templates),
+        'avg_score': sum(t['score'] for t in templates) / len(templates) if templates else 0,
+        'categories': sorted({t['category'] for t in templates}),
+    }
+
+def load_pending_templates():
+    """Summaries of all templates pending approval, with the count and average score"""
+    pending_dir = next((path for path in PENDING_DIRS if path.exists()), None)
+    
+    # If no directory exists, nothing is pending (fresh deployment)
+    if pending_dir is None:
+        return EMPTY_PENDING
+    return read_pending_index(str(pending_dir), dir_signature(pending_dir))
+
+def query_templates(templates, min_score=0, categories=None, dates=None, sort="Newest first"):
+    """Filter and sort the template summaries for the list"""
+    selected = [
+        t for t in templates
+        if t['score'] >= min_score
+        and (not categories or t['category'] in categories)
+        and (not dates or dates[0].isoformat() <= t['created_at'][:10] <= dates[-1].isoformat())
+    ]
+    key, reverse = SORT_ORDERS[sort]
+    return sorted(selected, key=key, reverse=reverse)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def count_approved(approved_dir, signature):
+    return len(list(Path(approved_dir).glob("*.json")))
+
+def load_approved_count():
+    if not APPROVED_DIR.exists():
+        return 0
+    return count_approved(str(APPROVED_DIR), dir_signature(APPROVED_DIR))
+
+# Shown with every decision until approvals are persisted
+READ_ONLY_NOTICE = "⚠️ Decision noted! (Filesystem is read-only in cloud deployment. For production, connect to database.)"
 
 def approve_template(template_id):
     """Move template to approved folder"""
     # In Streamlit Cloud (read-only filesystem), we can't actually move files
     # This is a limitation of the cloud deployment
-    # For MVP, just show success message
+    # For MVP, the decision is kept in the session and shown on the card
     # In production, use database or cloud storage
-    st.info("⚠️ Approval noted! (Filesystem is read-only in cloud deployment. For production, connect to database.)")
     return True
 
 def reject_template(template_id, reason=""):
     """Move template to rejected folder"""
     # In Streamlit Cloud (read-only filesystem), we can't actually move files
     # This is a limitation of the cloud deployment
-    # For MVP, just show success message
-    st.info("⚠️ Rejection noted! (Filesystem is read-only in cloud deployment. For production, connect to database.)")
+    # For MVP, the decision is kept in the session and shown on the card
     return True
 
+# Decisions are applied optimistically: a button's on_click callback records
+# the decision in the session before its fragment reruns, so a click redraws
+# only that card instead of rerunning the whole page.
+
+def decisions():
+    """This session's decisions, by template or opportunity key"""
+    return st.session_state.setdefault("decisions", {})
+
+def decide(key, decision):
+    decisions()[key] = decision
+    if decision in ("approved", "build"):
+        st.session_state["celebrate"] = key  # Balloons once, on the card's next render
+
+def undo_decision(key):
+    decisions().pop(key, None)
+
+def decide_template(template_id, decision):
+    if decision == "approved":
+        approve_template(template_id)
+    else:
+        reject_template(template_id, "CEO rejected")
+    decide(template_id, decision)
+
+@st.fragment
+def opportunity_decision(opp_key, title):
+    """BUILD THIS / Skip for one opportunity"""
+    decision = decisions().get(opp_key)
+    if decision == "build":
+        if st.session_state.pop("celebrate", None) == opp_key:
+            st.balloons()
+        st.success(f"🚀 Approved! Building {title}...")
+        st.info("Builder agent will create this template. Check back in 30 minutes.")
+    elif decision == "skip":
+        st.info("Skipped. Review next opportunity.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button(f"✅ BUILD THIS", key=f"build_{opp_key}", type="primary",
+                      on_click=decide, args=(opp_key, "build"))
+        with col2:
+            st.button(f"⏭️ Skip", key=f"skip_{opp_key}", on_click=decide, args=(opp_key, "skip"))
+        return
+    st.button("↩️ Undo", key=f"undo_{opp_key}", on_click=undo_decision, args=(opp_key,))
+
+@st.fragment
+def template_card(summary):
+    """One pending template; its toggle and buttons rerun just this card"""
+    template_id = summary['id']
+    decision = decisions().get(template_id)
+    
+    with st.container(border=True):
+        if decision:
+            # Decided: collapse to a one-line status
+            st.markdown(f"**📊 {summary['name']}** - {summary['total_score']}")
+            if decision == "approved":
+                if st.session_state.pop("celebrate", None) == template_id:
+                    st.balloons()
+                st.success(f"✅ Approved! Template will be built and launched.")
+            else:
+                st.error("❌ Template rejected")
+            st.caption(READ_ONLY_NOTICE)
+            st.button("↩️ Undo", key=f"undo_{template_id}", on_click=undo_decision, args=(template_id,))
+            return
+        
+        # Quality score
+        score_num = summary['score']
+        score_color = "#10b981" if score_num >= 90 else "#f59e0b" if score_num >= 85 else "#ef4444"
+        
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            st.markdown(f'<div style="text-align: center;"><div style="font-size: 3rem; font-weight: 700; color: {score_color};">{summary["total_score"]}</div><div style="color: #6b7280;">Quality Score</div></div>', unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown(f"### 📊 {summary['name']}")
+            st.caption(f"{summary['category']} · Created {summary['created_at'][:16].replace('T', ' ')}")
+            st.markdown(f"**Description:** {summary['description']}")
+            st.markdown(f"**Target:** {summary['target_audience']}")
+            st.markdown(f"**Price:** {summary['price_point']}")
+        
+        # Details are read from disk and rendered only while the toggle is on
+        if st.toggle("Show details", key=f"details_{template_id}"):
+            template = read_template(*summary['file'])
+            concept = template['concept']
+            quality = template['quality_score']
+            
+            # Score breakdown
+            st.markdown("### Score Breakdown")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Design", quality['design_score'])
+            with col2:
+                st.metric("Functionality", quality['functionality_score'])
+            with col3:
+                st.metric("Completeness", quality['completeness_score'])
+            
+            # Key features
+            st.markdown("### Key Features")
+            for feature in concept['key_features']:
+                st.markdown(f"• {feature}")
+            
+            # Feedback
+            st.markdown("### AI Assessment")
+            st.info(quality['feedback'])
+            
+            # Design specs and structure preview (tabs - expanders can't be nested)
+            specs_tab, structure_tab = st.tabs(["🎨 Design Specifications", "📐 Template Structure"])
+            with specs_tab:
+                st.json(concept['design_specs'])
+            
+            with structure_tab:
+                st.text(template['structure'][:1000] + "..." if len(template['structure']) > 1000 else template['structure'])
+        
+        # Approval buttons
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.button(f"✅ Approve & Launch", key=f"approve_{template_id}", type="primary",
+                      on_click=decide_template, args=(template_id, "approved"))
+        
+        with col2:
+            if st.button(f"📝 Request Changes", key=f"revise_{template_id}"):
+                st.warning("Feature coming soon: Specify changes and AI will iterate")
+        
+        with col3:
+            st.button(f"❌ Reject", key=f"reject_{template_id}", on_click=decide_template, args=(template_id, "rejected"))
+
 # Main Dashboard
 st.markdown('<h1 class="main-header">🎯 AI Factory - CEO Dashboard</h1>', unsafe_allow_html=True)
 st.markdown(f"**{datetime.now().strftime('%A, %B %d, %Y - %I:%M %p')}**")
 
 # Load data
-pending_templates = load_pending_templates()
+pending = load_pending_templates()
+pending_templates = pending['templates']
 
 # Load opportunities
 # Try multiple possible paths (local dev vs Streamlit Cloud)
-possible_paths = [
+OPPORTUNITY_DIRS = [
     Path("/home/claude/ai-factory/opportunities"),  # Local dev
     Path("../opportunities"),  # Streamlit Cloud (one level up from ceo-dashboard)
     Path("./opportunities"),  # If run from root
     Path(__file__).parent.parent / "opportunities",  # Relative to this file
 ]
 
-latest_opportunities = None
-for opportunities_dir in possible_paths:
-    if opportunities_dir.exists() and (opportunities_dir / "latest.json").exists():
+def opportunities_signature():
+    """mtime/size of every file the opportunities can come from (the WAL holds uncheckpointed writes)"""
+    return tuple(
+        (str(opportunities_dir), *(file_signature(opportunities_dir / name)
+                                   for name in ("opportunities.db", "opportunities.db-wal", "latest.json")))
+        for opportunities_dir in OPPORTUNITY_DIRS
+    )
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def read_latest_opportunities(signature, top_n=5):
+    """Load the latest run header, its top opportunities and lightweight rows for the rest
+
+    Prefers the SQLite run store (only the displayed rows are read); falls back
+    to latest.json where the store isn't deployed (e.g. Streamlit Cloud).
+    """
+    for opportunities_dir in OPPORTUNITY_DIRS:
+        db_path = opportunities_dir / "opportunities.db"
+        if not db_path.exists():
+            continue
         try:
-            with open(opportunities_dir / "latest.json", 'r') as f:
-                latest_opportunities = json.load(f)
-            break
-        except:
+            with OpportunityStore(str(db_path), read_only=True) as store:
+                run = store.latest_run()
+                if run is None:
+                    continue
+                run['top'] = store.top_opportunities(limit=top_n)
+                run['rest'] = store.opportunity_summaries(offset=top_n)
+                return run
+        except sqlite3.Error:
             continue
+    
+    for opportunities_dir in OPPORTUNITY_DIRS:
+        if opportunities_dir.exists() and (opportunities_dir / "latest.json").exists():
+            try:
+                with open(opportunities_dir / "latest.json", 'r') as f:
+                    run = json.load(f)
+            except:
+                continue
+            opps = run.get('opportunities', [])
+            run['total_opportunities'] = len(opps)
+            run['top'] = opps[:top_n]
+            run['rest'] = opps[top_n:]
+            return run
+    
+    return None
+
+def load_latest_opportunities(top_n=5):
+    return read_latest_opportunities(opportunities_signature(), top_n)
+
+latest_opportunities = load_latest_opportunities()
 
 # Summary metrics
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("Pending Approval", len(pending_templates))
+    # Decisions made since the last full rerun are already taken off the count
+    decided = sum(1 for t in pending_templates if t['id'] in decisions())
+    st.metric("Pending Approval", pending['count'] - decided)
 with col2:
-    approved_dir = Path("/home/claude/ai-factory/products/financial-templates/approved")
-    approved_count = len(list(approved_dir.glob("*.json"))) if approved_dir.exists() else 0
-    st.metric("Approved", approved_count)
+    st.metric("Approved", load_approved_count())
 with col3:
-    avg_score = sum(int(t['quality_score']['total_score'].split('/')[0]) for t in pending_templates) / len(pending_templates) if pending_templates else 0
-    st.metric("Avg Quality", f"{avg_score:.0f}/100")
+    st.metric("Avg Quality", f"{pending['avg_score']:.0f}/100")
 
 st.markdown("---")
 
 # Opportunities section
-if latest_opportunities and latest_opportunities.get('opportunities'):
+if latest_opportunities and latest_opportunities.get('total_opportunities'):
     st.markdown("## 💡 Market Opportunities Discovered")
     
-    opps = latest_opportunities['opportunities']
+    total_opps = latest_opportunities['total_opportunities']
     metadata = latest_opportunities.get('metadata', {})
-    st.markdown(f"**{len(opps)} validated opportunities found** | Avg Score: {metadata.get('avg_score', 0):.0f}/100")
+    st.markdown(f"**{total_opps} validated opportunities found** | Avg Score: {metadata.get('avg_score', 0):.0f}/100")
+    if latest_opportunities.get('partial'):
+        st.info("⏳ Discovery run in progress - more opportunities are still being generated.")
     
     # Show top 5
-    for i, opp in enumerate(opps[:5], 1):
+    for i, opp in enumerate(latest_opportunities['top'], 1):
         with st.expander(f"#{i}: {opp['title']} - Score: {opp['score']}/100", expanded=(i==1)):
             col1, col2, col3 = st.columns(3)
             
@@ -167,13 +446,15 @@ if latest_opportunities and latest_opportunities.get('opportunities'):
             st.markdown(f"**Target Customer:** {opp['target_customer']}")
             st.markdown(f"**Build Time:** {opp['build_time_days']} days")
             
-            with st.expander("📊 Evidence & Market Data"):
+            # Streamlit doesn't allow expanders inside expanders, so the details are tabs
+            evidence_tab, gap_tab, breakdown_tab = st.tabs(["📊 Evidence & Market Data", "⚡ Competitive Gap", "📈 Score Breakdown"])
+            with evidence_tab:
                 st.json(opp.get('evidence', {}))
             
-            with st.expander("⚡ Competitive Gap"):
+            with gap_tab:
                 st.markdown(opp.get('competitive_gap', 'N/A'))
             
-            with st.expander("📈 Score Breakdown"):
+            with breakdown_tab:
                 bd = opp.get('score_breakdown', {})
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
@@ -186,19 +467,11 @@ if latest_opportunities and latest_opportunities.get('opportunities'):
                     st.metric("Speed", f"{bd.get('speed_to_market', 0)}/10")
             
             st.markdown("### 🎯 Your Decision")
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button(f"✅ BUILD THIS", key=f"build_{opp.get('id', i)}", type="primary"):
-                    st.success(f"🚀 Approved! Building {opp['title']}...")
-                    st.balloons()
-                    st.info("Builder agent will create this template. Check back in 30 minutes.")
-            with col2:
-                if st.button(f"⏭️ Skip", key=f"skip_{opp.get('id', i)}"):
-                    st.info("Skipped. Review next opportunity.")
+            opportunity_decision(f"opportunity_{opp.get('id', i)}", opp['title'])
 
-    if len(opps) > 5:
-        with st.expander(f"➕ View all {len(opps)} opportunities"):
-            for i, opp in enumerate(opps[5:], 6):
+    if latest_opportunities['rest']:
+        with st.expander(f"➕ View all {total_opps} opportunities"):
+            for i, opp in enumerate(latest_opportunities['rest'], 6):
                 st.markdown(f"**#{i}: {opp['title']}** - Score: {opp['score']}/100 | ${opp['price']} | {opp['build_time_days']} days")
     
     st.markdown("---")
@@ -220,71 +493,40 @@ if not pending_templates:
     **The AI Factory is ready - Saturday we launch!** 🚀
     """)
 else:
-    for template in pending_templates:
-        concept = template['concept']
-        quality = template['quality_score']
-        
-        with st.expander(f"📊 {concept['name']} - Quality: {quality['total_score']}", expanded=True):
-            # Quality score
-            score_num = int(quality['total_score'].split('/')[0])
-            score_color = "#10b981" if score_num >= 90 else "#f59e0b" if score_num >= 85 else "#ef4444"
-            
-            col1, col2 = st.columns([1, 3])
-            with col1:
-                st.markdown(f'<div style="text-align: center;"><div style="font-size: 3rem; font-weight: 700; color: {score_color};">{quality["total_score"]}</div><div style="color: #6b7280;">Quality Score</div></div>', unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown(f"**Description:** {concept['description']}")
-                st.markdown(f"**Target:** {concept['target_audience']}")
-                st.markdown(f"**Price:** {concept['price_point']}")
-            
-            # Score breakdown
-            st.markdown("### Score Breakdown")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Design", quality['design_score'])
-            with col2:
-                st.metric("Functionality", quality['functionality_score'])
-            with col3:
-                st.metric("Completeness", quality['completeness_score'])
-            
-            # Key features
-            st.markdown("### Key Features")
-            for feature in concept['key_features']:
-                st.markdown(f"• {feature}")
-            
-            # Feedback
-            st.markdown("### AI Assessment")
-            st.info(quality['feedback'])
-            
-            # Design specs
-            with st.expander("🎨 Design Specifications"):
-                st.json(concept['design_specs'])
-            
-            # Structure preview
-            with st.expander("📐 Template Structure"):
-                st.text(template['structure'][:1000] + "..." if len(template['structure']) > 1000 else template['structure'])
-            
-            # Approval buttons
-            st.markdown("### Your Decision")
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                if st.button(f"✅ Approve & Launch", key=f"approve_{template['id']}", type="primary"):
-                    if approve_template(template['id']):
-                        st.success(f"✅ Approved! Template will be built and launched.")
-                        st.balloons()
-                        st.rerun()
-            
-            with col2:
-                if st.button(f"📝 Request Changes", key=f"revise_{template['id']}"):
-                    st.warning("Feature coming soon: Specify changes and AI will iterate")
-            
-            with col3:
-                if st.button(f"❌ Reject", key=f"reject_{template['id']}"): 
-                    if reject_template(template['id'], "CEO rejected"):
-                        st.error("❌ Template rejected")
-                        st.rerun()
+    # Filters and sort run over the cached summaries; only the current page is rendered
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort = st.selectbox("Sort", list(SORT_ORDERS), key="pending_sort")
+    with col2:
+        min_score = st.slider("Minimum score", 0, 100, 0, step=5, key="pending_min_score")
+    with col3:
+        categories = st.multiselect("Category", pending['categories'], key="pending_categories")
+    with col4:
+        created = sorted(t['created_at'][:10] for t in pending_templates if t['created_at'])
+        dates = ()
+        if created:
+            first_day, last_day = (datetime.fromisoformat(day).date() for day in (created[0], created[-1]))
+            dates = st.date_input("Created", (first_day, last_day), min_value=first_day, max_value=last_day,
+                                  key="pending_dates")
+    
+    matches = query_templates(pending_templates, min_score, categories, dates, sort)
+    
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page_size = st.selectbox("Per page", PAGE_SIZES, key="pending_page_size")
+    pages = max(1, -(-len(matches) // page_size))
+    if st.session_state.get("pending_page", 1) > pages:
+        st.session_state["pending_page"] = pages  # Filters shrank the list under the current page
+    with col2:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key="pending_page")
+    
+    first = (page - 1) * page_size
+    page_templates = matches[first:first + page_size]
+    st.caption(f"Showing {first + 1 if matches else 0}-{first + len(page_templates)} of {len(matches)} "
+               f"matching templates ({pending['count']} pending)")
+    
+    for summary in page_templates:
+        template_card(summary)
 
 # Footer
 st.markdown("---")
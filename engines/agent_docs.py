@@ -0,0 +1,43 @@
+"""
+Agent Docs - Load agents/*.md once per process and serve them as cacheable system prompts
+Docs are re-read only when their mtime changes, so edits still take effect mid-run
+"""
+
+import os
+import threading
+
+AGENTS_DIR = "/home/claude/ai-factory/agents"
+
+_docs = {}
+_lock = threading.Lock()
+
+
+def load_agent_doc(name, agents_dir=AGENTS_DIR):
+    """Text of agents/<name>, reloaded only when the file's mtime changes"""
+    path = os.path.join(agents_dir, name)
+    mtime = os.stat(path).st_mtime_ns
+
+    with _lock:
+        cached = _docs.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    with open(path, 'r') as f:
+        text = f.read()
+
+    with _lock:
+        _docs[path] = (mtime, text)
+    return text
+
+
+def agent_system(name, agents_dir=AGENTS_DIR):
+    """System blocks carrying an agent doc, marked for the API's prompt cache
+
+    Identical prefixes are then billed as cache reads on every call after the
+    first (within the cache lifetime) instead of as full input tokens.
+    """
+    return [{
+        "type": "text",
+        "text": load_agent_doc(name, agents_dir),
+        "cache_control": {"type": "ephemeral"},
+    }]
@@ -0,0 +1,112 @@
+"""
+Batch Runner - Submit many Messages requests at once through the Message Batches API
+Batched requests cost half as much and don't count against the per-minute limits,
+but results can take up to 24 hours - use it for overnight and bulk runs
+"""
+
+import os
+import time
+from llm import add_usage
+from usage_ledger import record_call
+
+BATCH_POLL_SECONDS = float(os.environ.get("AI_FACTORY_BATCH_POLL", "30"))
+
+# The API accepts up to 100,000 requests per batch; smaller chunks start returning sooner
+MAX_BATCH_REQUESTS = 10000
+
+
+class BatchRequestError(Exception):
+    """A single request in a batch did not succeed (errored, canceled or expired)"""
+
+
+class BatchRunner:
+    """Collect requests with add(), then run() submits them and waits for every result
+
+    Requests already in the ResponseCache are answered from it and never
+    submitted. Results are returned as {custom_id: message}, where a failed
+    request maps to a BatchRequestError instead of a message.
+    """
+
+    def __init__(self, client, cache=None, poll_interval=BATCH_POLL_SECONDS):
+        self.client = client
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.requests = {}
+
+    def add(self, custom_id, label=None, **params):
+        """Queue one messages.create request; custom_id must be unique within the run"""
+        if custom_id in self.requests:
+            raise ValueError(f"Duplicate batch custom_id: {custom_id}")
+        self.requests[custom_id] = (label, params)
+
+    def run(self):
+        """Submit everything queued, poll until done and return the results"""
+        results = {}
+        to_submit = []
+
+        for custom_id, (label, params) in self.requests.items():
+            cached = self.cache.get(params) if self.cache is not None else None
+            if cached is not None:
+                record_call(label, params.get("model"), cached, attempts=0, cached=True, batched=True)
+                results[custom_id] = cached
+            else:
+                to_submit.append(custom_id)
+
+        if results:
+            print(f"  ✓ {len(results)} of {len(self.requests)} batch requests answered from cache")
+
+        for start in range(0, len(to_submit), MAX_BATCH_REQUESTS):
+            chunk = to_submit[start:start + MAX_BATCH_REQUESTS]
+            results.update(self._run_chunk(chunk))
+
+        self.requests = {}
+        return results
+
+    def _run_chunk(self, custom_ids):
+        started = time.monotonic()
+        batch = self.client.messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": self.requests[custom_id][1]}
+            for custom_id in custom_ids
+        ])
+        print(f"  📦 Submitted batch {batch.id} ({len(custom_ids)} requests)")
+
+        while batch.processing_status != "ended":
+            time.sleep(self.poll_interval)
+            batch = self.client.messages.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            done = counts.succeeded + counts.errored + counts.canceled + counts.expired
+            print(f"  ⏳ Batch {batch.id}: {batch.processing_status} ({done}/{len(custom_ids)} done)")
+
+        elapsed = time.monotonic() - started
+        results = {}
+        for entry in self.client.messages.batches.results(batch.id):
+            if entry.custom_id not in self.requests:
+                continue
+            label, params = self.requests[entry.custom_id]
+
+            if entry.result.type == "succeeded":
+                message = entry.result.message
+                add_usage(message)
+                record_call(label, params.get("model"), message, elapsed, elapsed, batched=True)
+                if self.cache is not None:
+                    self.cache.put(params, message)
+                results[entry.custom_id] = message
+            else:
+                error = BatchRequestError(f"{entry.custom_id}: {entry.result.type} {_error_detail(entry.result)}")
+                record_call(label, params.get("model"), latency=elapsed, wall=elapsed, batched=True, error=error)
+                results[entry.custom_id] = error
+
+        # A request missing from the results file is as good as failed
+        for custom_id in custom_ids:
+            if custom_id not in results:
+                results[custom_id] = BatchRequestError(f"{custom_id}: no result returned")
+
+        succeeded = sum(1 for r in results.values() if not isinstance(r, BatchRequestError))
+        print(f"  ✓ Batch {batch.id} ended in {elapsed:.0f}s: {succeeded}/{len(custom_ids)} succeeded")
+        return results
+
+
+def _error_detail(result):
+    error = getattr(result, "error", None)
+    detail = getattr(error, "error", error)
+    return getattr(detail, "message", "") or ""
@@ -0,0 +1,85 @@
+"""
+Builder Benchmark - Time, peak memory and file size of the cash flow workbooks
+Builds CashFlowForecasterBuilder and CashFlowForecaster at several horizons and
+expense-line counts, in normal and write-only mode, and prints one table. Normal
+builds check their formulas; write-only builds only do with --verify
+"""
+
+import io
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from product_builder_engine import CashFlowForecasterBuilder
+from rebuild_forecaster import CashFlowForecaster
+
+BENCHMARK_OPPORTUNITY = {'id': 'benchmark', 'title': 'Cash Flow Forecaster Pro', 'price': 47}
+
+
+def make_builder(name, months, lines, write_only, verify=None):
+    if name == 'CashFlowForecasterBuilder':
+        expense_lines = [(f'Expense Line {n + 1}', 1000, '') for n in range(lines)]
+        return CashFlowForecasterBuilder(BENCHMARK_OPPORTUNITY, months, expense_lines, write_only, verify=verify)
+    expense_lines = [(f'Expense Line {n + 1}', 1000) for n in range(lines)]
+    return CashFlowForecaster(months, expense_lines, write_only, verify=verify)
+
+
+def run_build(name, months, lines, write_only, output_dir, verify=None):
+    """One quiet build (forced, so the build cache never skips it); returns the workbook path"""
+    with redirect_stdout(io.StringIO()):
+        return make_builder(name, months, lines, write_only, verify).build(output_dir, force=True)
+
+
+def measure(name, months, lines, write_only, output_dir, verify=None):
+    """Wall time of an untraced build, then peak traced memory of a second one"""
+    started = time.perf_counter()
+    path = run_build(name, months, lines, write_only, output_dir, verify)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    run_build(name, months, lines, write_only, output_dir, verify)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'builder': name,
+        'months': months,
+        'lines': lines,
+        'mode': ('write-only' if write_only else 'normal') + ('+verify' if write_only and verify else ''),
+        'seconds': elapsed,
+        'peak_mb': peak / 1024 / 1024,
+        'size_kb': os.path.getsize(path) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cash flow workbook builders")
+    parser.add_argument("--months", type=int, nargs="+", default=[12, 36, 60, 120], help="Horizons to build")
+    parser.add_argument("--lines", type=int, nargs="+", default=[5, 50], help="Expense-line counts to build")
+    parser.add_argument("--builder", choices=['CashFlowForecasterBuilder', 'CashFlowForecaster'],
+                        help="Only benchmark one builder")
+    parser.add_argument("--verify", action="store_true", help="Check the formulas of write-only builds too")
+    args = parser.parse_args()
+
+    builders = [args.builder] if args.builder else ['CashFlowForecasterBuilder', 'CashFlowForecaster']
+
+    print("\n⏱️  Builder benchmark")
+    print("=" * 85)
+    print(f"{'Builder':<27} {'Months':>6} {'Lines':>5} {'Mode':<17} {'Time s':>7} {'Peak MB':>8} {'File KB':>8}")
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name in builders:
+            for lines in args.lines:
+                for months in args.months:
+                    for write_only in (False, True):
+                        r = measure(name, months, lines, write_only, output_dir, args.verify or None)
+                        print(f"{r['builder']:<27} {r['months']:>6} {r['lines']:>5} {r['mode']:<17} "
+                              f"{r['seconds']:>7.2f} {r['peak_mb']:>8.1f} {r['size_kb']:>8.0f}")
+
+    print("=" * 85 + "\n")
+
+
+if __name__ == "__main__":
+    main()
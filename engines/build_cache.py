@@ -0,0 +1,86 @@
+"""
+Build Cache - Skip workbook builds whose inputs haven't changed
+Every output directory keeps a manifest of what produced each file in it: a hash
+of the opportunity record, the builder source and the build parameters
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+
+MANIFEST_NAME = ".build_manifest.json"
+
+ENGINES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Every builder styles its sheets through xlsx_styles and stores formula values computed
+# by formula_eval, so both sources are inputs too
+SHARED_SOURCES = [os.path.join(ENGINES_DIR, "xlsx_styles.py"), os.path.join(ENGINES_DIR, "formula_eval.py")]
+
+
+def content_hash(value):
+    """sha256 of a JSON-serialisable value, independent of key order"""
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def source_hashes(paths):
+    """sha256 of each source file, by file name"""
+    hashes = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            hashes[os.path.basename(path)] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+class BuildCache:
+    """Build key for one builder run, checked against the output directory's manifest
+
+    is_fresh() is true when the output exists, is the file the manifest saw
+    written (same size and mtime) and was built from the same key.
+    """
+
+    def __init__(self, output_dir, builder, sources, opportunity=None, params=None):
+        self.output_dir = output_dir
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        self.inputs = {
+            "builder": builder,
+            "opportunity": content_hash(opportunity) if opportunity is not None else None,
+            "sources": source_hashes([*sources, *SHARED_SOURCES]),
+            "params": params or {},
+        }
+        self.key = content_hash(self.inputs)
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def is_fresh(self, output_path):
+        """True if output_path was built from exactly these inputs and hasn't been touched since"""
+        entry = self.load_manifest().get(os.path.basename(output_path))
+        if not entry or entry.get("key") != self.key or not os.path.exists(output_path):
+            return False
+        stat = os.stat(output_path)
+        return entry.get("bytes") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns
+
+    def record(self, output_path):
+        """Note that output_path was just built from these inputs"""
+        manifest = self.load_manifest()
+        stat = os.stat(output_path)
+        manifest[os.path.basename(output_path)] = {
+            "key": self.key,
+            **self.inputs,
+            "built_at": datetime.now().isoformat(),
+            "bytes": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
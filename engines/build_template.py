@@ -3,15 +3,33 @@ SaaS Financial Dashboard Builder
 Creates a REAL, SELLABLE Excel template with working formulas
 """
 
+import os
+import argparse
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from openpyxl.chart import LineChart, Reference, BarChart
-from datetime import datetime, timedelta
+from datetime import datetime
 import calendar
+from xlsx_styles import StyleRegistry, month_label, CURRENCY, PERCENT
+from build_cache import BuildCache
+from formula_eval import verify_build
 
-def create_saas_dashboard():
-    """Build professional SaaS Financial Dashboard"""
+def create_saas_dashboard(output_dir=None, currency=CURRENCY, months=12, force=False, verify=True):
+    """Build professional SaaS Financial Dashboard (`months` of example trend data)
+
+    Skipped when this source and the parameters match the last build of the
+    same file, unless force=True. verify=False skips the formula check.
+    """
+    output_dir = output_dir or "/home/claude/ai-factory/products/financial-templates/built"
+    output_path = f"{output_dir}/saas-financial-dashboard.xlsx"
+    # Month headers and the "Generated:" line start at the build month
+    params = {'currency': currency, 'months': months, 'verify': verify,
+              'start_month': datetime.now().strftime('%Y-%m')}
+    cache = BuildCache(output_dir, "create_saas_dashboard", [__file__], params=params)
+    
+    if not force and cache.is_fresh(output_path):
+        print(f"\n⏭️  Up to date: {output_path} (inputs unchanged - use --force to rebuild)")
+        return output_path
     
     wb = Workbook()
     
@@ -30,28 +48,53 @@ def create_saas_dashboard():
         'danger': 'FFEF4444',       # Red
         'neutral': 'FF6B7280',      # Gray
         'bg_light': 'FFF9FAFB',     # Light gray
+        'bg_input': 'FFFFF4E6',     # Light orange (input cells)
         'white': 'FFFFFFFF'
     }
     
+    # Every cell style used below, registered once as a named style
+    styles = StyleRegistry(wb, COLORS)
+    styles.define('Title', size=24, bold=True, color='white', fill='primary')
+    styles.define('Sheet Title', size=18, bold=True, color='primary')
+    styles.define('Heading', size=16, bold=True, color='primary')
+    styles.define('Section', size=14, bold=True, color='primary')
+    styles.define('Group', bold=True, color='primary')
+    styles.define('Caption', size=10, color='neutral')
+    styles.define('Instruction Heading', size=12, bold=True, color='secondary')
+    styles.define('Input Banner', size=12, bold=True, color='warning', fill='bg_input')
+    styles.define('Table Header', bold=True, color='white', fill='secondary')
+    styles.define('Input', bold=True, fill='bg_input')
+    styles.define('Currency', number_format=currency)
+    styles.define('Count', number_format='#,##0')
+    styles.define('Percent', number_format=PERCENT)
+    styles.define('Ratio', number_format='0.0')
+    styles.define('Whole Percent', number_format='0%')
+    styles.define('Metric Currency', size=11, bold=True, number_format=currency)
+    styles.define('Metric Count', size=11, bold=True, number_format='#,##0')
+    styles.define('Metric Percent', size=11, bold=True, number_format=PERCENT)
+    styles.define('Metric Ratio', size=11, bold=True, number_format='0.0')
+    
+    # Number formats used by the Unit Economics table, by style
+    format_styles = {CURRENCY: 'Currency', '#,##0': 'Count', '0.0': 'Ratio', '0%': 'Whole Percent'}
+    
     # Sheet 1: Dashboard Overview
     print("  → Creating Dashboard Overview...")
     ws_dash = wb.create_sheet("Dashboard", 0)
     
     # Header
     ws_dash['A1'] = 'SaaS Financial Dashboard'
-    ws_dash['A1'].font = Font(size=24, bold=True, color=COLORS['white'])
-    ws_dash['A1'].fill = PatternFill(start_color=COLORS['primary'], end_color=COLORS['primary'], fill_type='solid')
+    styles.apply(ws_dash, 'A1', 'Title')
     ws_dash.merge_cells('A1:H1')
     ws_dash.row_dimensions[1].height = 40
     
     ws_dash['A2'] = f'Generated: {datetime.now().strftime("%B %Y")}'
-    ws_dash['A2'].font = Font(size=10, color=COLORS['neutral'])
+    styles.apply(ws_dash, 'A2', 'Caption')
     ws_dash.merge_cells('A2:H2')
     
     # Key Metrics Section
     row = 4
     ws_dash[f'A{row}'] = 'KEY METRICS'
-    ws_dash[f'A{row}'].font = Font(size=14, bold=True, color=COLORS['primary'])
+    styles.apply(ws_dash, f'A{row}', 'Section')
     
     metrics = [
         ('Monthly Recurring Revenue (MRR)', '=Dashboard!B20', '$', 'Current MRR'),
@@ -71,9 +114,7 @@ def create_saas_dashboard():
     ws_dash[f'B{row}'] = 'Value'
     ws_dash[f'C{row}'] = 'Notes'
     
-    for col in ['A', 'B', 'C']:
-        ws_dash[f'{col}{row}'].font = Font(bold=True, color=COLORS['white'])
-        ws_dash[f'{col}{row}'].fill = PatternFill(start_color=COLORS['secondary'], end_color=COLORS['secondary'], fill_type='solid')
+    styles.apply(ws_dash, f'A{row}:C{row}', 'Table Header')
     
     row += 1
     for metric_name, formula, fmt, note in metrics:
@@ -83,22 +124,20 @@ def create_saas_dashboard():
         
         # Format based on type
         if fmt == '$':
-            ws_dash[f'B{row}'].number_format = '$#,##0'
+            styles.apply(ws_dash, f'B{row}', 'Metric Currency')
         elif fmt == '%':
-            ws_dash[f'B{row}'].number_format = '0.0%'
+            styles.apply(ws_dash, f'B{row}', 'Metric Percent')
         elif fmt == 'ratio':
-            ws_dash[f'B{row}'].number_format = '0.0'
+            styles.apply(ws_dash, f'B{row}', 'Metric Ratio')
         else:
-            ws_dash[f'B{row}'].number_format = '#,##0'
+            styles.apply(ws_dash, f'B{row}', 'Metric Count')
         
-        ws_dash[f'B{row}'].font = Font(bold=True, size=11)
         row += 1
     
     # Input section (where user enters their data)
     row += 2
     ws_dash[f'A{row}'] = 'YOUR DATA (Edit these values)'
-    ws_dash[f'A{row}'].font = Font(size=12, bold=True, color=COLORS['warning'])
-    ws_dash[f'A{row}'].fill = PatternFill(start_color='FFFFF4E6', end_color='FFFFF4E6', fill_type='solid')
+    styles.apply(ws_dash, f'A{row}', 'Input Banner')
     ws_dash.merge_cells(f'A{row}:B{row}')
     
     row += 1
@@ -115,9 +154,8 @@ def create_saas_dashboard():
     for label, example_value, cell_ref in inputs:
         ws_dash[f'A{row}'] = label
         ws_dash[cell_ref] = example_value
-        ws_dash[cell_ref].fill = PatternFill(start_color='FFFFF4E6', end_color='FFFFF4E6', fill_type='solid')
-        ws_dash[cell_ref].font = Font(bold=True)
         row += 1
+    styles.apply(ws_dash, 'B20:B26', 'Input')
     
     # Column widths
     ws_dash.column_dimensions['A'].width = 35
@@ -132,24 +170,21 @@ def create_saas_dashboard():
     
     # Header
     ws_trends['A1'] = 'Monthly Revenue & Customer Trends'
-    ws_trends['A1'].font = Font(size=16, bold=True, color=COLORS['primary'])
+    styles.apply(ws_trends, 'A1', 'Heading')
     ws_trends.merge_cells('A1:E1')
     
     # Column headers
     headers = ['Month', 'MRR', 'Customers', 'Churn %', 'New Customers']
     for col_idx, header in enumerate(headers, 1):
-        cell = ws_trends.cell(row=3, column=col_idx)
-        cell.value = header
-        cell.font = Font(bold=True, color=COLORS['white'])
-        cell.fill = PatternFill(start_color=COLORS['secondary'], end_color=COLORS['secondary'], fill_type='solid')
+        ws_trends.cell(row=3, column=col_idx).value = header
+    styles.apply(ws_trends, 'A3:E3', 'Table Header')
     
-    # Generate 12 months of example data
-    start_date = datetime.now().replace(day=1) - timedelta(days=365)
+    # Generate `months` months of example data, up to last month
+    start_date = datetime.now().replace(day=1)
     base_mrr = 25000
     base_customers = 80
     
-    for i in range(12):
-        month_date = start_date + timedelta(days=30*i)
+    for i in range(months):
         row = 4 + i
         
         # Growth pattern: 8% monthly growth
@@ -159,15 +194,17 @@ def create_saas_dashboard():
         churn = 3.5 + (i * 0.1)  # Slight increase in churn as company grows
         new_customers = int(customers * 0.15)  # 15% new customers per month
         
-        ws_trends.cell(row=row, column=1).value = month_date.strftime('%b %Y')
+        ws_trends.cell(row=row, column=1).value = month_label(start_date, i - months)
         ws_trends.cell(row=row, column=2).value = mrr
-        ws_trends.cell(row=row, column=2).number_format = '$#,##0'
         ws_trends.cell(row=row, column=3).value = customers
-        ws_trends.cell(row=row, column=3).number_format = '#,##0'
         ws_trends.cell(row=row, column=4).value = churn / 100
-        ws_trends.cell(row=row, column=4).number_format = '0.0%'
         ws_trends.cell(row=row, column=5).value = new_customers
-        ws_trends.cell(row=row, column=5).number_format = '#,##0'
+    
+    last_row = 3 + months
+    styles.apply(ws_trends, f'B4:B{last_row}', 'Currency')
+    styles.apply(ws_trends, f'C4:C{last_row}', 'Count')
+    styles.apply(ws_trends, f'D4:D{last_row}', 'Percent')
+    styles.apply(ws_trends, f'E4:E{last_row}', 'Count')
     
     # Column widths
     for col in ['A', 'B', 'C', 'D', 'E']:
@@ -180,39 +217,41 @@ def create_saas_dashboard():
     ws_economics = wb.create_sheet("Unit Economics")
     
     ws_economics['A1'] = 'Unit Economics Analysis'
-    ws_economics['A1'].font = Font(size=16, bold=True, color=COLORS['primary'])
+    styles.apply(ws_economics, 'A1', 'Heading')
     ws_economics.merge_cells('A1:D1')
     
-    # Key calculations
-    row = 3
+    # Key calculations - formulas name other rows by key ({cac}, {ltv}...)
+    first_row = 3
     economics_data = [
-        ('CUSTOMER ACQUISITION', '', '', ''),
-        ('Marketing Spend/Month', 25000, '$#,##0', ''),
-        ('New Customers/Month', 55, '#,##0', ''),
-        ('CAC', '=B5/B6', '$#,##0', 'Marketing Spend / New Customers'),
-        ('', '', '', ''),
-        ('CUSTOMER LIFETIME VALUE', '', '', ''),
-        ('Average MRR per Customer', '=Dashboard!B20/Dashboard!B21', '$#,##0', ''),
-        ('Average Customer Lifespan (months)', 28, '#,##0', '1 / Monthly Churn'),
-        ('Gross Margin %', 0.75, '0%', 'Typical SaaS: 70-80%'),
-        ('LTV', '=B11*B12*B13', '$#,##0', 'ARPA x Lifespan x Margin'),
-        ('', '', '', ''),
-        ('HEALTH METRICS', '', '', ''),
-        ('LTV:CAC Ratio', '=B14/B7', '0.0', 'Target: >3.0'),
-        ('CAC Payback (months)', '=B7/B11', '0.0', 'Target: <12 months'),
-        ('Rule of 40', '=(Dashboard!B20*12/10000)*0.08 + B13', '0%', 'Growth % + Margin %'),
+        (None, 'CUSTOMER ACQUISITION', '', '', ''),
+        ('marketing', 'Marketing Spend/Month', 25000, '$#,##0', ''),
+        ('new_customers', 'New Customers/Month', 55, '#,##0', ''),
+        ('cac', 'CAC', '={marketing}/{new_customers}', '$#,##0', 'Marketing Spend / New Customers'),
+        (None, '', '', '', ''),
+        (None, 'CUSTOMER LIFETIME VALUE', '', '', ''),
+        ('arpa', 'Average MRR per Customer', '=Dashboard!B20/Dashboard!B21', '$#,##0', ''),
+        ('lifespan', 'Average Customer Lifespan (months)', 28, '#,##0', '1 / Monthly Churn'),
+        ('margin', 'Gross Margin %', 0.75, '0%', 'Typical SaaS: 70-80%'),
+        ('ltv', 'LTV', '={arpa}*{lifespan}*{margin}', '$#,##0', 'ARPA x Lifespan x Margin'),
+        (None, '', '', '', ''),
+        (None, 'HEALTH METRICS', '', '', ''),
+        ('ltv_cac', 'LTV:CAC Ratio', '={ltv}/{cac}', '0.0', 'Target: >3.0'),
+        ('payback', 'CAC Payback (months)', '={cac}/{arpa}', '0.0', 'Target: <12 months'),
+        ('rule_of_40', 'Rule of 40', '=(Dashboard!B20*12/10000)*0.08 + {margin}', '0%', 'Growth % + Margin %'),
     ]
+    cells = {key: f'B{first_row + i}' for i, (key, *_) in enumerate(economics_data) if key}
     
-    for label, value, fmt, note in economics_data:
+    row = first_row
+    for key, label, value, fmt, note in economics_data:
         ws_economics[f'A{row}'] = label
         if value:
-            ws_economics[f'B{row}'] = value
+            ws_economics[f'B{row}'] = value.format(**cells) if isinstance(value, str) else value
             if fmt:
-                ws_economics[f'B{row}'].number_format = fmt
+                styles.apply(ws_economics, f'B{row}', format_styles[fmt])
         ws_economics[f'D{row}'] = note
         
         if label and not value:  # Section headers
-            ws_economics[f'A{row}'].font = Font(bold=True, color=COLORS['primary'])
+            styles.apply(ws_economics, f'A{row}', 'Group')
         
         row += 1
     
@@ -227,7 +266,7 @@ def create_saas_dashboard():
     ws_instructions = wb.create_sheet("Instructions")
     
     ws_instructions['A1'] = 'How to Use This Template'
-    ws_instructions['A1'].font = Font(size=18, bold=True, color=COLORS['primary'])
+    styles.apply(ws_instructions, 'A1', 'Sheet Title')
     
     instructions_text = [
         ('', ''),
@@ -271,7 +310,7 @@ def create_saas_dashboard():
     for text, style in instructions_text:
         ws_instructions[f'A{row}'] = text
         if style == 'bold':
-            ws_instructions[f'A{row}'].font = Font(size=12, bold=True, color=COLORS['secondary'])
+            styles.apply(ws_instructions, f'A{row}', 'Instruction Heading')
         row += 1
     
     ws_instructions.column_dimensions['A'].width = 70
@@ -279,11 +318,12 @@ def create_saas_dashboard():
     print("  ✓ Instructions created")
     
     # Save the file
-    output_path = "/home/claude/ai-factory/products/financial-templates/built/saas-financial-dashboard.xlsx"
-    import os
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
+    os.makedirs(output_dir, exist_ok=True)
     wb.save(output_path)
+    if verify:
+        # Computes every formula and stores the values, so previews show numbers
+        verify_build(output_path)
+    cache.record(output_path)
     
     print("\n" + "=" * 60)
     print("✅ REAL SELLABLE PRODUCT CREATED")
@@ -299,7 +339,11 @@ def create_saas_dashboard():
     return output_path
 
 if __name__ == "__main__":
-    template_path = create_saas_dashboard()
+    parser = argparse.ArgumentParser(description="Build the SaaS Financial Dashboard workbook")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the inputs haven't changed")
+    args = parser.parse_args()
+    
+    template_path = create_saas_dashboard(force=args.force)
     
     # Create README
     readme_path = template_path.replace('.xlsx', '_README.txt')
@@ -0,0 +1,70 @@
+"""
+Run Checkpoints - Per-stage outputs and status for resumable pipelines
+Each run gets a directory holding one file per completed stage plus state.json
+"""
+
+import os
+import json
+from datetime import datetime
+
+RUNS_DIR = "/home/claude/ai-factory/opportunities/runs"
+
+
+class RunCheckpoint:
+    """Stage outputs and statuses for a single run, stored under RUNS_DIR/<run_id>/"""
+
+    def __init__(self, run_id, runs_dir=RUNS_DIR):
+        self.run_id = run_id
+        self.run_dir = os.path.join(runs_dir, run_id)
+        self.state_path = os.path.join(self.run_dir, "state.json")
+        self.state = self._load_state()
+
+    @classmethod
+    def exists(cls, run_id, runs_dir=RUNS_DIR):
+        return os.path.exists(os.path.join(runs_dir, run_id, "state.json"))
+
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        return {"run_id": self.run_id, "created_at": datetime.now().isoformat(), "stages": {}}
+
+    def _write(self, path, write):
+        """Write through a temp file so a crash never leaves a torn checkpoint"""
+        os.makedirs(self.run_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def _stage_path(self, stage, filename):
+        return os.path.join(self.run_dir, filename or f"{stage}.json")
+
+    def status(self, stage):
+        return self.state["stages"].get(stage, {}).get("status")
+
+    def is_done(self, stage):
+        return self.status(stage) == "done"
+
+    def mark(self, stage, status, **info):
+        """Record a stage's status (running / done / failed) plus any extra details"""
+        entry = self.state["stages"].setdefault(stage, {})
+        entry.update(info)
+        entry["status"] = status
+        entry["updated_at"] = datetime.now().isoformat()
+        self._write(self.state_path, lambda f: json.dump(self.state, f, indent=2))
+
+    def save(self, stage, data, filename=None, status="done"):
+        """Persist a stage's output (JSON-serialisable data, or text for .txt files)"""
+        path = self._stage_path(stage, filename)
+        if path.endswith(".txt"):
+            self._write(path, lambda f: f.write(data))
+        else:
+            self._write(path, lambda f: json.dump(data, f, indent=2))
+        self.mark(stage, status, output=os.path.basename(path))
+
+    def load(self, stage, filename=None):
+        """Read a stage's saved output"""
+        path = self._stage_path(stage, filename or self.state["stages"].get(stage, {}).get("output"))
+        with open(path, 'r') as f:
+            return f.read() if path.endswith(".txt") else json.load(f)
@@ -5,29 +5,50 @@ Scrapes Gumroad, Reddit, and other sources to find validated product opportuniti
 
 import os
 import json
-import requests
+import asyncio
+import argparse
 from datetime import datetime
-import anthropic
-from bs4 import BeautifulSoup
 import time
-import re
+from llm import LazyClient, create_message, acreate_message, stream_message, astream_message, prompt_cache_summary
+from llm_cache import ResponseCache
+from rate_limiter import get_rate_limiter
+from json_stream import ArrayItemStream
+from checkpoints import RunCheckpoint
+from opportunity_store import OpportunityStore, unique_ids
+
+OPPORTUNITIES_DIR = "/home/claude/ai-factory/opportunities"
+
+# Source stage -> raw_data key it fills (also the checkpoint file name)
+SOURCE_STAGES = {"gumroad": "gumroad_products", "reddit": "reddit_posts"}
+
+# Market data goes stale quickly - only reuse discovery answers within a day
+DISCOVERY_CACHE_TTL = 20 * 3600
 
 class DiscoveryEngine:
-    def __init__(self):
-        self.client = anthropic.Anthropic(
-            api_key=os.environ.get("ANTHROPIC_API_KEY")
-        )
+    def __init__(self, use_cache=True, stream=False):
+        self.client = LazyClient()
+        self.async_client = LazyClient(async_client=True)
+        self.cache = ResponseCache("discovery", enabled=use_cache, ttl_seconds=DISCOVERY_CACHE_TTL)
         self.opportunities = []
         self.raw_data = {
             "gumroad_products": [],
             "reddit_posts": [],
             "market_signals": []
         }
-        
-    def scrape_gumroad(self):
-        """Scrape Gumroad for top selling templates and tools"""
-        print("\n🔍 Scraping Gumroad for market data...")
-        
+        self.stage_timings = {}
+        self.stream = stream
+        self.run_id = None
+        self.checkpoint = None
+        self.analysis_text = None
+    
+    def _extract_json(self, response_text):
+        """Pull the JSON payload out of a (possibly fenced) model response"""
+        if "```json" in response_text:
+            return response_text.split("```json")[1].split("```")[0].strip()
+        return response_text.strip()
+    
+    def _gumroad_request(self):
+        """Build the messages.create params for the Gumroad stage"""
         # Since we can't actually scrape Gumroad dynamically (requires browser),
         # we'll use Claude to analyze what typically sells based on known patterns
         
@@ -57,22 +78,16 @@ class DiscoveryEngine:
         }
         """
         
-        message = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        response_text = message.content[0].text
-        
-        # Extract JSON
-        if "```json" in response_text:
-            json_text = response_text.split("```json")[1].split("```")[0].strip()
-        else:
-            json_text = response_text.strip()
-        
+        return {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 4000,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+    
+    def _parse_gumroad(self, response_text):
+        """Store the Gumroad categories found in a model response"""
         try:
-            data = json.loads(json_text)
+            data = json.loads(self._extract_json(response_text))
             self.raw_data["gumroad_products"] = data.get("products", [])
             print(f"  ✓ Found {len(self.raw_data['gumroad_products'])} product categories")
         except:
@@ -80,10 +95,22 @@ class DiscoveryEngine:
         
         return self.raw_data["gumroad_products"]
     
-    def scrape_reddit(self):
-        """Find pain points from Reddit communities"""
-        print("\n🔍 Analyzing Reddit for pain points...")
+    def scrape_gumroad(self):
+        """Scrape Gumroad for top selling templates and tools"""
+        print("\n🔍 Scraping Gumroad for market data...")
+        
+        message = create_message(self.client, self.cache, label="DiscoveryEngine.scrape_gumroad", **self._gumroad_request())
+        return self._parse_gumroad(message.content[0].text)
+    
+    async def scrape_gumroad_async(self):
+        """Async variant of scrape_gumroad for the concurrent pipeline"""
+        print("\n🔍 Scraping Gumroad for market data...")
         
+        message = await acreate_message(self.async_client, self.cache, label="DiscoveryEngine.scrape_gumroad", **self._gumroad_request())
+        return self._parse_gumroad(message.content[0].text)
+    
+    def _reddit_request(self):
+        """Build the messages.create params for the Reddit stage"""
         prompt = """Based on recent activity in r/Entrepreneur, r/smallbusiness, r/freelance, 
         r/RealEstateInvesting, and r/SideHustle, what are the top 10 most requested 
         templates/tools/spreadsheets?
@@ -114,21 +141,16 @@ class DiscoveryEngine:
         }
         """
         
-        message = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        response_text = message.content[0].text
-        
-        if "```json" in response_text:
-            json_text = response_text.split("```json")[1].split("```")[0].strip()
-        else:
-            json_text = response_text.strip()
-        
+        return {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 4000,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+    
+    def _parse_reddit(self, response_text):
+        """Store the Reddit pain points found in a model response"""
         try:
-            data = json.loads(json_text)
+            data = json.loads(self._extract_json(response_text))
             self.raw_data["reddit_posts"] = data.get("pain_points", [])
             print(f"  ✓ Found {len(self.raw_data['reddit_posts'])} pain points")
         except:
@@ -136,10 +158,22 @@ class DiscoveryEngine:
         
         return self.raw_data["reddit_posts"]
     
-    def analyze_opportunities(self):
-        """Use Claude to analyze data and generate scored opportunities"""
-        print("\n🤖 Analyzing patterns and generating opportunities...")
+    def scrape_reddit(self):
+        """Find pain points from Reddit communities"""
+        print("\n🔍 Analyzing Reddit for pain points...")
+        
+        message = create_message(self.client, self.cache, label="DiscoveryEngine.scrape_reddit", **self._reddit_request())
+        return self._parse_reddit(message.content[0].text)
+    
+    async def scrape_reddit_async(self):
+        """Async variant of scrape_reddit for the concurrent pipeline"""
+        print("\n🔍 Analyzing Reddit for pain points...")
         
+        message = await acreate_message(self.async_client, self.cache, label="DiscoveryEngine.scrape_reddit", **self._reddit_request())
+        return self._parse_reddit(message.content[0].text)
+    
+    def _analysis_request(self):
+        """Build the messages.create params for the analysis stage"""
         prompt = f"""You are a market analyst for a digital product business.
         
         GUMROAD DATA (What's selling):
@@ -205,25 +239,23 @@ class DiscoveryEngine:
         Be SPECIFIC. No generic templates. Real products people will pay for.
         """
         
-        message = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=8000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        response_text = message.content[0].text
-        
-        if "```json" in response_text:
-            json_text = response_text.split("```json")[1].split("```")[0].strip()
-        else:
-            json_text = response_text.strip()
-        
+        return {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 8000,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+    
+    def _parse_opportunities(self, response_text):
+        """Store the scored opportunities found in a model response"""
+        self.analysis_text = response_text
         try:
-            data = json.loads(json_text)
+            data = json.loads(self._extract_json(response_text))
             self.opportunities = data.get("opportunities", [])
             print(f"  ✓ Generated {len(self.opportunities)} validated opportunities")
             
             # Sort by score
+            for opp in self.opportunities:
+                self._score_opportunity(opp)
             self.opportunities.sort(key=lambda x: x.get('score', 0), reverse=True)
             
         except Exception as e:
@@ -232,43 +264,127 @@ class DiscoveryEngine:
         
         return self.opportunities
     
-    def save_opportunities(self):
-        """Save opportunities to file for dashboard to read"""
-        print("\n💾 Saving opportunities...")
+    def analyze_opportunities(self):
+        """Use Claude to analyze data and generate scored opportunities"""
+        print("\n🤖 Analyzing patterns and generating opportunities...")
         
-        output_dir = "/home/claude/ai-factory/opportunities"
-        os.makedirs(output_dir, exist_ok=True)
+        if self.stream:
+            return self._analyze_streaming()
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        message = create_message(self.client, self.cache, label="DiscoveryEngine.analyze_opportunities", **self._analysis_request())
+        return self._parse_opportunities(message.content[0].text)
+    
+    async def analyze_opportunities_async(self):
+        """Async variant of analyze_opportunities"""
+        print("\n🤖 Analyzing patterns and generating opportunities...")
         
-        # Save full discovery run
-        discovery_run = {
-            "run_id": f"discovery_{timestamp}",
+        if self.stream:
+            return await self._analyze_streaming_async()
+        
+        message = await acreate_message(self.async_client, self.cache, label="DiscoveryEngine.analyze_opportunities", **self._analysis_request())
+        return self._parse_opportunities(message.content[0].text)
+    
+    def _score_opportunity(self, opp):
+        """Fill in a missing total score from its breakdown"""
+        if not isinstance(opp.get('score'), (int, float)):
+            opp['score'] = sum(v for v in opp.get('score_breakdown', {}).values() if isinstance(v, (int, float)))
+        return opp['score']
+    
+    def _streaming_parser(self):
+        """Parser that publishes each opportunity the moment its JSON object closes"""
+        parser = ArrayItemStream("opportunities")
+        self.opportunities = []
+        
+        def on_text(chunk):
+            for opp in parser.feed(chunk):
+                score = self._score_opportunity(opp)
+                self.opportunities.append(opp)
+                self.opportunities.sort(key=lambda x: x.get('score', 0), reverse=True)
+                print(f"  ✓ #{len(self.opportunities)} {opp.get('title')} ({score}/100)")
+                self.save_partial()
+        
+        return on_text
+    
+    def _finish_streaming(self, message):
+        """Reconcile streamed opportunities with the complete response"""
+        streamed = list(self.opportunities)
+        self._parse_opportunities(message.content[0].text)
+        
+        # Keep what already arrived if the full response turns out to be unparseable
+        if not self.opportunities and streamed:
+            self.opportunities = streamed
+        return self.opportunities
+    
+    def _analyze_streaming(self):
+        message = stream_message(self.client, self._streaming_parser(), self.cache,
+                                 label="DiscoveryEngine.analyze_opportunities", **self._analysis_request())
+        return self._finish_streaming(message)
+    
+    async def _analyze_streaming_async(self):
+        message = await astream_message(self.async_client, self._streaming_parser(), self.cache,
+                                        label="DiscoveryEngine.analyze_opportunities", **self._analysis_request())
+        return self._finish_streaming(message)
+    
+    def _discovery_run(self, partial=False):
+        """Build the run record written to latest.json"""
+        if self.run_id is None:
+            self.run_id = f"discovery_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        return {
+            "run_id": self.run_id,
             "timestamp": datetime.now().isoformat(),
-            "opportunities": self.opportunities,
+            "partial": partial,
+            # Duplicate ids from the model get suffixes, the same in latest.json as in the store
+            "opportunities": unique_ids(self.opportunities),
             "metadata": {
                 "sources_scraped": 2,
                 "total_opportunities": len(self.opportunities),
                 "avg_score": sum(o.get('score', 0) for o in self.opportunities) / len(self.opportunities) if self.opportunities else 0,
-                "top_categories": list(set(o.get('target_customer', '').split()[0] for o in self.opportunities[:5])),
+                "top_categories": list(set(o.get('target_customer', '').split()[0] for o in self.opportunities[:5] if o.get('target_customer'))),
                 "recommended_next": self.opportunities[0].get('id') if self.opportunities else None
             }
         }
+    
+    def _write_json(self, path, data):
+        """Write JSON atomically so the dashboard never reads a half-written file"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    
+    def save_partial(self):
+        """Publish the opportunities streamed so far to the store and latest.json"""
+        os.makedirs(OPPORTUNITIES_DIR, exist_ok=True)
+        discovery_run = self._discovery_run(partial=True)
+        with OpportunityStore() as store:
+            store.save_run(discovery_run)
+        self._write_json(f"{OPPORTUNITIES_DIR}/latest.json", discovery_run)
+    
+    def save_opportunities(self):
+        """Save opportunities to the run store for the dashboard and CLI to query"""
+        print("\n💾 Saving opportunities...")
         
-        output_path = f"{output_dir}/discovery_{timestamp}.json"
-        with open(output_path, 'w') as f:
-            json.dump(discovery_run, f, indent=2)
+        output_dir = OPPORTUNITIES_DIR
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # Save full discovery run
+        discovery_run = self._discovery_run()
         
-        print(f"  ✓ Saved to: {output_path}")
+        with OpportunityStore() as store:
+            store.save_run(discovery_run)
+            removed = store.compact()
         
-        # Also save latest.json for easy dashboard access
+        print(f"  ✓ Saved run {discovery_run['run_id']} to: {store.db_path}")
+        if removed:
+            print(f"  ✓ Compacted store: removed {removed} old runs")
+        
+        # latest.json stays as the single JSON export for read-only deployments (Streamlit Cloud)
         latest_path = f"{output_dir}/latest.json"
-        with open(latest_path, 'w') as f:
-            json.dump(discovery_run, f, indent=2)
+        self._write_json(latest_path, discovery_run)
         
         print(f"  ✓ Updated: {latest_path}")
         
-        return output_path
+        return latest_path
     
     def print_summary(self):
         """Print summary of findings"""
@@ -296,35 +412,203 @@ class DiscoveryEngine:
         print("📊 View all opportunities on CEO Dashboard")
         print("="*60 + "\n")
     
-    def run_discovery(self):
+    def _timed(self, stage, func):
+        """Run one pipeline stage and record its wall-clock latency"""
+        started = time.perf_counter()
+        try:
+            return func()
+        finally:
+            self.stage_timings[stage] = time.perf_counter() - started
+    
+    async def _timed_async(self, stage, coro):
+        """Await one pipeline stage and record its wall-clock latency"""
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.stage_timings[stage] = time.perf_counter() - started
+    
+    def print_stage_timings(self):
+        """Print per-stage latency for the last run"""
+        if not self.stage_timings:
+            return
+        
+        print("⏱️  Stage latency:")
+        for stage, seconds in self.stage_timings.items():
+            print(f"   {stage:<10} {seconds:6.1f}s")
+    
+    def _finish_run(self, start_time):
+        """Save results and print the run summary"""
+        if self.opportunities:
+            self.save_opportunities()
+            self.print_summary()
+        else:
+            print("\n⚠ No opportunities found. Check API connection and try again.")
+        
+        elapsed = time.time() - start_time
+        self.print_stage_timings()
+        print(self.cache.summary())
+        print(get_rate_limiter().summary())
+        print(prompt_cache_summary())
+        self.print_resume_hint()
+        print(f"\n⏱️  Discovery completed in {elapsed:.1f} seconds\n")
+    
+    def _start_run(self, resume_run_id=None):
+        """Open the checkpoint for a fresh run, or reopen an earlier one to resume"""
+        self.stage_timings = {}
+        self.opportunities = []
+        
+        if resume_run_id:
+            if not RunCheckpoint.exists(resume_run_id):
+                raise SystemExit(f"❌ No checkpoint found for run: {resume_run_id}")
+            self.run_id = resume_run_id
+            print(f"♻️  Resuming run: {self.run_id}")
+        else:
+            self.run_id = f"discovery_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            print(f"🆔 Run ID: {self.run_id}")
+        
+        self.checkpoint = RunCheckpoint(self.run_id)
+    
+    def _restore_stage(self, stage):
+        """Load a completed stage's output from its checkpoint instead of re-running it"""
+        if stage in SOURCE_STAGES:
+            self.raw_data[SOURCE_STAGES[stage]] = self.checkpoint.load(stage)
+        else:
+            data = self.checkpoint.load(stage)
+            # Checkpoints written before opportunities.json hold the response text instead
+            if isinstance(data, str):
+                self._parse_opportunities(data)
+            else:
+                self.opportunities = data
+        print(f"\n⏭️  {stage}: restored from checkpoint")
+    
+    def _save_stage(self, stage):
+        """Checkpoint a stage's output; empty or unparseable output counts as failed"""
+        if stage in SOURCE_STAGES:
+            key = SOURCE_STAGES[stage]
+            data = self.raw_data[key]
+            ok = bool(data)
+            self.checkpoint.save(stage, data, filename=f"{key}.json", status="done" if ok else "failed")
+        elif self.opportunities:
+            # The opportunities, not the response text: when the final parse fails but the
+            # streamed ones were kept, the text alone would restore none of them
+            ok = True
+            self.checkpoint.save(stage, self.opportunities, filename="opportunities.json")
+        else:
+            ok = False
+            self.checkpoint.save(stage, self.analysis_text or "", filename="analysis.txt", status="failed")
+        
+        # Don't let a resumed run replay the same unusable response from the cache
+        if not ok:
+            requests_by_stage = {
+                "gumroad": self._gumroad_request,
+                "reddit": self._reddit_request,
+                "analysis": self._analysis_request,
+            }
+            self.cache.discard(requests_by_stage[stage]())
+    
+    def _run_stage(self, stage, func):
+        """Run a stage unless already checkpointed; returns True if it actually ran"""
+        if self.checkpoint.is_done(stage):
+            self._restore_stage(stage)
+            return False
+        
+        self.checkpoint.mark(stage, "running")
+        try:
+            self._timed(stage, func)
+        except Exception as e:
+            self.checkpoint.mark(stage, "failed", error=str(e))
+            print(f"\n❌ {stage} failed: {e}")
+            self.print_resume_hint()
+            raise
+        self._save_stage(stage)
+        return True
+    
+    async def _run_stage_async(self, stage, coro_func):
+        """Async variant of _run_stage"""
+        if self.checkpoint.is_done(stage):
+            self._restore_stage(stage)
+            return False
+        
+        self.checkpoint.mark(stage, "running")
+        try:
+            await self._timed_async(stage, coro_func())
+        except Exception as e:
+            self.checkpoint.mark(stage, "failed", error=str(e))
+            print(f"\n❌ {stage} failed: {e}")
+            self.print_resume_hint()
+            raise
+        self._save_stage(stage)
+        return True
+    
+    def print_resume_hint(self):
+        """Tell the user how to retry only the stages that did not complete"""
+        failed = [stage for stage in [*SOURCE_STAGES, "analysis"] if not self.checkpoint.is_done(stage)]
+        if failed:
+            print(f"↻ Incomplete stages: {', '.join(failed)}")
+            print(f"   Resume with: python discovery_engine.py --resume {self.run_id}")
+    
+    def run_discovery(self, resume_run_id=None):
         """Main discovery workflow"""
         print("\n" + "🏭 AI FACTORY - DISCOVERY ENGINE".center(60))
         print("="*60 + "\n")
         
         start_time = time.time()
+        self._start_run(resume_run_id)
         
-        # Step 1: Gather market data
-        self.scrape_gumroad()
-        time.sleep(1)  # Rate limiting
-        
-        self.scrape_reddit()
-        time.sleep(1)
+        # Step 1: Gather market data (pacing is handled by the shared rate limiter)
+        self._run_stage("gumroad", self.scrape_gumroad)
+        self._run_stage("reddit", self.scrape_reddit)
         
         # Step 2: Analyze and generate opportunities
-        self.analyze_opportunities()
+        self._run_stage("analysis", self.analyze_opportunities)
         
         # Step 3: Save results
-        if self.opportunities:
-            self.save_opportunities()
-            self.print_summary()
-        else:
-            print("\n⚠ No opportunities found. Check API connection and try again.")
+        self._finish_run(start_time)
         
-        elapsed = time.time() - start_time
-        print(f"\n⏱️  Discovery completed in {elapsed:.1f} seconds\n")
+        return self.opportunities
+    
+    async def run_discovery_async(self, resume_run_id=None):
+        """Discovery workflow with every source stage fanned out concurrently"""
+        print("\n" + "🏭 AI FACTORY - DISCOVERY ENGINE (async)".center(60))
+        print("="*60 + "\n")
+        
+        start_time = time.time()
+        self._start_run(resume_run_id)
+        
+        # Step 1: Gather market data - sources are independent, so fetch them all at once
+        sources_started = time.perf_counter()
+        await asyncio.gather(
+            self._run_stage_async("gumroad", self.scrape_gumroad_async),
+            self._run_stage_async("reddit", self.scrape_reddit_async),
+        )
+        self.stage_timings["sources"] = time.perf_counter() - sources_started
+        
+        # Step 2: Analyze and generate opportunities
+        await self._run_stage_async("analysis", self.analyze_opportunities_async)
+        
+        # Step 3: Save results
+        self._finish_run(start_time)
         
         return self.opportunities
 
+def parse_args(argv=None):
+    """Parse command line options for a discovery run"""
+    parser = argparse.ArgumentParser(description="AI Factory discovery engine")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="fetch all sources concurrently with the async client")
+    parser.add_argument("--stream", action="store_true",
+                        help="parse and publish opportunities while the analysis is still generating")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always call the API instead of replaying cached responses")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="resume a checkpointed run, re-running only stages that did not complete")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    engine = DiscoveryEngine()
-    opportunities = engine.run_discovery()
+    args = parse_args()
+    engine = DiscoveryEngine(use_cache=not args.no_cache, stream=args.stream)
+    if args.use_async:
+        opportunities = asyncio.run(engine.run_discovery_async(args.resume))
+    else:
+        opportunities = engine.run_discovery(args.resume)
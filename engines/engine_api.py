@@ -0,0 +1,162 @@
+"""
+Engine API - Run the factory's engines in-process
+One entry point per engine (discovery, templates, product builders, variants, launch),
+called through run_engine() so every step returns an EngineResult and its output can
+be passed to the next step in memory. Engine modules are imported on first use.
+"""
+
+import os
+import json
+import time
+
+OPPORTUNITIES_FILE = "/home/claude/ai-factory/opportunities/latest.json"
+
+
+class EngineResult:
+    """Outcome of one engine call: the value it produced, or the error that stopped it"""
+
+    def __init__(self, engine, value=None, error=None, seconds=0.0):
+        self.engine = engine
+        self.value = value
+        self.error = error
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        return self.error is None and self.value is not None
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        state = "ok" if self.ok else f"failed: {self.error or 'no result'}"
+        return f"EngineResult({self.engine}, {state}, {self.seconds:.2f}s)"
+
+
+# Product builders: each takes the opportunity, an output directory, force and
+# builder options, and returns the path of the workbook it wrote
+
+def build_cash_flow_forecaster(opportunity, output_dir=None, force=False, **options):
+    from product_builder_engine import CashFlowForecasterBuilder
+    return CashFlowForecasterBuilder(opportunity, **options).build(output_dir, force=force)
+
+
+def build_saas_dashboard(opportunity=None, output_dir=None, force=False, **options):
+    from build_template import create_saas_dashboard
+    return create_saas_dashboard(output_dir, force=force, **options)
+
+
+BUILDERS = {
+    'cash_flow_forecaster': build_cash_flow_forecaster,
+    'saas_dashboard': build_saas_dashboard,
+}
+
+# Builder for each product; an opportunity without one can't be built yet
+PRODUCT_BUILDERS = {
+    'cash_flow_forecaster_pro': 'cash_flow_forecaster',
+    'financial-templates': 'saas_dashboard',
+}
+
+# Builders whose workbook is generated from the opportunity record
+OPPORTUNITY_BUILDERS = {'cash_flow_forecaster'}
+
+
+def find_opportunity(opportunity_id, opportunities=None):
+    """An opportunity by id: from a list already in memory, else the run store, else latest.json"""
+    for opp in opportunities or []:
+        if opp.get('id') == opportunity_id:
+            return opp
+
+    from opportunity_store import OpportunityStore
+    if OpportunityStore.available():
+        with OpportunityStore() as store:
+            opp = store.get_opportunity(opportunity_id)
+        if opp is not None:
+            return opp
+
+    if os.path.exists(OPPORTUNITIES_FILE):
+        with open(OPPORTUNITIES_FILE, 'r') as f:
+            for opp in json.load(f).get('opportunities', []):
+                if opp.get('id') == opportunity_id:
+                    return opp
+    return None
+
+
+# Engines
+
+def discover(use_cache=True, stream=False, use_async=False, resume_run_id=None):
+    """Run discovery; returns the opportunities it found"""
+    from discovery_engine import DiscoveryEngine
+    engine = DiscoveryEngine(use_cache=use_cache, stream=stream)
+    if use_async:
+        import asyncio
+        return asyncio.run(engine.run_discovery_async(resume_run_id))
+    return engine.run_discovery(resume_run_id)
+
+
+def create_templates(count=3, workers=None, batch=False, use_cache=True, llm_review=True):
+    """Generate template packages for CEO approval; returns the packages"""
+    from template_engine import TemplateBuilder, DEFAULT_WORKERS
+    builder = TemplateBuilder(use_cache=use_cache, llm_review=llm_review)
+    if batch:
+        return builder.run_batch_creation(count=count)
+    return builder.run_template_creation(count=count, max_workers=workers or DEFAULT_WORKERS)
+
+
+def build_product(opportunity_id, opportunity=None, opportunities=None, builder=None, output_dir=None,
+                  force=False, **options):
+    """Build a product's workbook with its registered builder; returns the workbook path
+
+    Builders that use the opportunity get it looked up by id unless it is
+    passed in (e.g. straight from discover()).
+    """
+    builder = builder or PRODUCT_BUILDERS.get(opportunity_id)
+    if builder is None:
+        raise ValueError(f"No builder registered for {opportunity_id}")
+    if builder not in BUILDERS:
+        raise ValueError(f"Unknown builder: {builder}")
+    if builder in OPPORTUNITY_BUILDERS:
+        opportunity = opportunity or find_opportunity(opportunity_id, opportunities)
+        if opportunity is None:
+            raise ValueError(f"Opportunity not found: {opportunity_id}")
+    return BUILDERS[builder](opportunity, output_dir, force, **options)
+
+
+def build_product_variants(product_id, workers=None, matrix_path=None, force=False):
+    """Build every SKU variant of a product; returns the manifest"""
+    from variant_builder import build_variants
+    return build_variants(product_id, workers, matrix_path, force)
+
+
+def launch(product_id, use_cache=True, opportunity=None):
+    """Create a product's launch package; returns the launch directory (None if it isn't built)"""
+    from launch_engine import LaunchEngine
+    return LaunchEngine(use_cache=use_cache).create_launch_package(product_id, opportunity)
+
+
+def launch_products(product_ids=(), all_products=False, changed=False, workers=None, use_cache=True, verbose=False):
+    """Create launch packages for many products concurrently; returns a summary row per product"""
+    from launch_engine import LaunchEngine, DEFAULT_WORKERS, select_products
+    product_ids = select_products(product_ids, all_products, changed)
+    return LaunchEngine(use_cache=use_cache).create_launch_packages(product_ids, workers or DEFAULT_WORKERS, verbose)
+
+
+ENGINES = {
+    'discover': discover,
+    'templates': create_templates,
+    'build': build_product,
+    'build-variants': build_product_variants,
+    'launch': launch,
+    'launch-products': launch_products,
+}
+
+
+def run_engine(name, **kwargs):
+    """Call an engine in this process; errors come back in the result rather than raised"""
+    started = time.perf_counter()
+    try:
+        value = ENGINES[name](**kwargs)
+        error = None
+    except Exception as e:
+        value, error = None, f"{type(e).__name__}: {e}"
+    return EngineResult(name, value, error, time.perf_counter() - started)
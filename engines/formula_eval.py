@@ -0,0 +1,685 @@
+"""
+Formula Evaluator - Compute and check a built workbook's formulas without Excel
+Covers the subset the product builders emit (arithmetic, comparisons, &, SUM/MIN/MAX/
+AVERAGE, IF, INDEX/MATCH, cross-sheet refs), reports error values, cycles and references
+to empty cells, and can store the results in the file as cached values
+"""
+
+import os
+import re
+import sys
+import time
+import zipfile
+import argparse
+from collections import deque
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<ref>(?:(?P<sheet>'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?
+        \$?[A-Z]{1,3}\$?[0-9]+(?::\$?[A-Z]{1,3}\$?[0-9]+)?)(?![\w(])
+  | (?P<number>[0-9]+(?:\.[0-9]*)?(?:[eE][+-]?[0-9]+)?|\.[0-9]+)
+  | (?P<bool>TRUE|FALSE)(?![\w(])
+  | (?P<func>[A-Za-z][A-Za-z0-9.]*)(?=\()
+  | (?P<op><>|<=|>=|[-+*/^&%=<>(),])
+""", re.VERBOSE)
+
+CELL_RE = re.compile(r"\$?([A-Z]{1,3})\$?([0-9]+)")
+
+COMPARISONS = {
+    '=': lambda a, b: a == b,
+    '<>': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '>': lambda a, b: a > b,
+    '<=': lambda a, b: a <= b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+class FormulaError(Exception):
+    """A formula outside the supported subset (bad syntax or an unknown token)"""
+
+
+class FormulaCheckError(Exception):
+    """A built workbook has formulas that evaluate to errors, form cycles or point at empty cells"""
+
+
+class ErrorValue:
+    """An Excel error value (#DIV/0!, #N/A...) and the cell it first appeared in"""
+
+    def __init__(self, code, origin=None, detail=""):
+        self.code = code
+        self.origin = origin
+        self.detail = detail
+
+    def __repr__(self):
+        return self.code
+
+
+def cell_name(sheet, row, col):
+    quoted = f"'{sheet}'" if re.search(r"[^\w.]", sheet) else sheet
+    return f"{quoted}!{get_column_letter(col)}{row}"
+
+
+def _parse_cell(text):
+    match = CELL_RE.fullmatch(text)
+    return int(match.group(2)), column_index_from_string(match.group(1))
+
+
+def tokenize(formula):
+    tokens = []
+    pos = 0
+    while pos < len(formula):
+        match = TOKEN_RE.match(formula, pos)
+        if not match:
+            raise FormulaError(f"Unexpected text at {formula[pos:pos + 12]!r}")
+        pos = match.end()
+        kind = 'ref' if match.group('ref') else match.lastgroup
+        if kind != 'space':
+            tokens.append((kind, match.group(kind)))
+    return tokens
+
+
+class Parser:
+    """Recursive-descent parser from formula text to a small tuple AST, with Excel precedence"""
+
+    def __init__(self, formula, sheet):
+        self.tokens = tokenize(formula)
+        self.sheet = sheet
+        self.pos = 0
+
+    def parse(self):
+        node = self.comparison()
+        if self.pos != len(self.tokens):
+            raise FormulaError(f"Unexpected {self.tokens[self.pos][1]!r}")
+        return node
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        kind, text = self.peek()
+        if kind is None or (value is not None and text != value):
+            raise FormulaError(f"Expected {value or 'a value'}, found {text!r}")
+        self.pos += 1
+        return kind, text
+
+    def binary(self, operators, operand):
+        node = operand()
+        while self.peek()[0] == 'op' and self.peek()[1] in operators:
+            op = self.take()[1]
+            node = ('bin', op, node, operand())
+        return node
+
+    def comparison(self):
+        return self.binary(COMPARISONS, self.concat)
+
+    def concat(self):
+        return self.binary({'&'}, self.additive)
+
+    def additive(self):
+        return self.binary({'+', '-'}, self.term)
+
+    def term(self):
+        return self.binary({'*', '/'}, self.power)
+
+    def power(self):
+        return self.binary({'^'}, self.unary)
+
+    def unary(self):
+        if self.peek() in (('op', '-'), ('op', '+')):
+            op = self.take()[1]
+            operand = self.unary()
+            return ('neg', operand) if op == '-' else operand
+        node = self.primary()
+        while self.peek() == ('op', '%'):
+            self.take()
+            node = ('bin', '/', node, ('num', 100))
+        return node
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == 'number':
+            return ('num', float(text) if any(c in text for c in '.eE') else int(text))
+        if kind == 'string':
+            return ('str', text[1:-1].replace('""', '"'))
+        if kind == 'bool':
+            return ('bool', text == 'TRUE')
+        if kind == 'ref':
+            return self.reference(text)
+        if kind == 'func':
+            self.take('(')
+            args = []
+            if self.peek() != ('op', ')'):
+                args.append(self.comparison())
+                while self.peek() == ('op', ','):
+                    self.take()
+                    args.append(self.comparison())
+            self.take(')')
+            return ('call', text.upper(), args)
+        if (kind, text) == ('op', '('):
+            node = self.comparison()
+            self.take(')')
+            return node
+        raise FormulaError(f"Unexpected {text!r}")
+
+    def reference(self, text):
+        sheet = self.sheet
+        if '!' in text:
+            sheet, text = text.rsplit('!', 1)
+            if sheet.startswith("'"):
+                sheet = sheet[1:-1].replace("''", "'")
+        if ':' in text:
+            start, end = text.split(':')
+            (r1, c1), (r2, c2) = _parse_cell(start), _parse_cell(end)
+            return ('range', sheet, min(r1, r2), min(c1, c2), max(r1, r2), max(c1, c2))
+        row, col = _parse_cell(text)
+        return ('ref', sheet, row, col)
+
+
+def references(node):
+    """Every ('ref' | 'range') node in an AST"""
+    if node[0] in ('ref', 'range'):
+        yield node
+    elif node[0] == 'neg':
+        yield from references(node[1])
+    elif node[0] == 'bin':
+        yield from references(node[2])
+        yield from references(node[3])
+    elif node[0] == 'call':
+        for arg in node[2]:
+            yield from references(arg)
+
+
+class FormulaReport:
+    """Outcome of evaluating a workbook: values, errors, cycles and empty references"""
+
+    def __init__(self, values, formulas, errors, cycles, empty_refs, seconds):
+        self.values = values
+        self.formulas = formulas
+        self.errors = errors
+        self.cycles = cycles
+        self.empty_refs = empty_refs
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        # An empty reference evaluates fine (as 0) but is almost always a row that moved
+        return not self.errors and not self.cycles and not self.empty_refs
+
+    def summary(self):
+        return {
+            'formulas': self.formulas,
+            'errors': len(self.errors),
+            'cycles': len(self.cycles),
+            'empty_refs': len(self.empty_refs),
+            'ms': round(self.seconds * 1000, 1),
+        }
+
+    def describe(self, limit=10):
+        """Human-readable list of problems, errors and cycles first"""
+        lines = [f"cycle through {cell}" for cell in self.cycles[:limit]]
+        for cell, error in self.errors[:limit]:
+            source = f" (from {error.origin})" if error.origin and error.origin != cell else ""
+            lines.append(f"{cell}: {error.code}{source} {error.detail}".rstrip())
+        for cell, target in self.empty_refs[:limit]:
+            lines.append(f"{cell}: references empty {target}")
+        hidden = len(self.cycles) + len(self.errors) + len(self.empty_refs) - len(lines)
+        if hidden > 0:
+            lines.append(f"... and {hidden} more")
+        return lines
+
+    def print_summary(self):
+        s = self.summary()
+        mark = "✓" if self.ok else "❌"
+        print(f"  {mark} Formulas: {s['formulas']} evaluated in {s['ms']:.0f} ms - "
+              f"{s['errors']} errors, {s['cycles']} cycles, {s['empty_refs']} empty references")
+        for line in self.describe():
+            print(f"    ⚠ {line}")
+
+
+class FormulaEvaluator:
+    """Evaluates every formula in a {sheet: {(row, col): value}} workbook in dependency order"""
+
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.values = {}
+        self.empty_refs = []
+        self.current = None
+
+    @classmethod
+    def from_file(cls, path):
+        wb = load_workbook(path, read_only=True)
+        sheets = {}
+        for ws in wb.worksheets:
+            cells = {}
+            for row_idx, row in enumerate(ws.iter_rows(values_only=True), 1):
+                for col_idx, value in enumerate(row, 1):
+                    if value is not None and value != '':
+                        cells[(row_idx, col_idx)] = value
+            sheets[ws.title] = cells
+        wb.close()
+        return cls(sheets)
+
+    def evaluate(self):
+        started = time.perf_counter()
+        parsed = {}
+        errors = []
+        formulas = 0
+        for sheet, cells in self.sheets.items():
+            for (row, col), value in cells.items():
+                if isinstance(value, str) and value.startswith('='):
+                    formulas += 1
+                    key = (sheet, row, col)
+                    try:
+                        parsed[key] = Parser(value[1:], sheet).parse()
+                    except FormulaError as e:
+                        self.values[key] = ErrorValue('#NAME?', cell_name(*key), str(e))
+
+        order, cycles = self._dependency_order(parsed)
+        for key in cycles:
+            self.values[key] = ErrorValue('#CYCLE!', cell_name(*key), "circular reference")
+        for key in order:
+            self.current = key
+            self.values[key] = self.eval_node(parsed[key])
+
+        for key, value in self.values.items():
+            if isinstance(value, ErrorValue) and key not in cycles:
+                errors.append((cell_name(*key), value))
+        errors.sort(key=lambda item: (item[1].origin != item[0], item[0]))
+
+        return FormulaReport(
+            values=self.values,
+            formulas=formulas,
+            errors=errors,
+            cycles=sorted(cell_name(*key) for key in cycles),
+            empty_refs=self.empty_refs,
+            seconds=time.perf_counter() - started,
+        )
+
+    def _dependency_order(self, parsed):
+        """Topological order of the formula cells, plus the cells caught in cycles"""
+        precedents = {}
+        dependents = {key: [] for key in parsed}
+        for key, node in parsed.items():
+            deps = set()
+            for ref in references(node):
+                if ref[0] == 'ref':
+                    cells = [(ref[1], ref[2], ref[3])]
+                else:
+                    _, sheet, r1, c1, r2, c2 = ref
+                    cells = [(sheet, r, c) for r in range(r1, r2 + 1) for c in range(c1, c2 + 1)]
+                deps.update(cell for cell in cells if cell in parsed)
+            precedents[key] = deps
+            for dep in deps:
+                dependents[dep].append(key)
+
+        waiting = {key: len(deps) for key, deps in precedents.items()}
+        ready = deque(key for key, count in waiting.items() if count == 0)
+        order = []
+        while ready:
+            key = ready.popleft()
+            order.append(key)
+            for dependent in dependents[key]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+
+        # Whatever is left sits on a cycle or downstream of one; peel off the
+        # downstream cells (no dependents left) so only the cycles are reported
+        stuck = set(parsed) - set(order)
+        trimmed = True
+        while trimmed:
+            trimmed = False
+            for key in list(stuck):
+                if not any(dependent in stuck for dependent in dependents[key]):
+                    stuck.discard(key)
+                    trimmed = True
+        cycles = stuck
+
+        # Cells downstream of a cycle are still evaluated, and inherit its error
+        downstream = set(parsed) - set(order) - cycles
+        order += self._order_within(downstream, precedents)
+        return order, cycles
+
+    @staticmethod
+    def _order_within(keys, precedents):
+        """Dependency order for the (acyclic) cells downstream of a cycle"""
+        order = []
+        pending = set(keys)
+        while pending:
+            ready = sorted(key for key in pending if not precedents[key] & pending)
+            order += ready
+            pending.difference_update(ready)
+        return order
+
+    # --- values -----------------------------------------------------------
+
+    def cell_value(self, sheet, row, col, in_range=False):
+        key = (sheet, row, col)
+        if key in self.values:
+            return self.values[key]
+        if sheet not in self.sheets:
+            return ErrorValue('#REF!', cell_name(*self.current), f"no sheet {sheet!r}")
+        value = self.sheets[sheet].get((row, col))
+        if value is None and not in_range:
+            self.empty_refs.append((cell_name(*self.current), cell_name(sheet, row, col)))
+        return value
+
+    def range_values(self, node):
+        _, sheet, r1, c1, r2, c2 = node
+        rows = [[self.cell_value(sheet, r, c, in_range=True) for c in range(c1, c2 + 1)]
+                for r in range(r1, r2 + 1)]
+        if all(value is None for row in rows for value in row):
+            start, end = cell_name(sheet, r1, c1), f"{get_column_letter(c2)}{r2}"
+            self.empty_refs.append((cell_name(*self.current), f"range {start}:{end}"))
+        return rows
+
+    def error(self, code, detail=""):
+        return ErrorValue(code, cell_name(*self.current), detail)
+
+    def number(self, value):
+        """Coerce to a number the way Excel arithmetic does (None -> 0, text -> #VALUE!)"""
+        if isinstance(value, ErrorValue):
+            return value
+        if value is None:
+            return 0
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, (int, float)):
+            return value
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return self.error('#VALUE!', f"{value!r} is not a number")
+
+    def text(self, value):
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, float):
+            return str(int(value)) if value.is_integer() else f"{value:.15g}"
+        return str(value)
+
+    def eval_node(self, node):
+        kind = node[0]
+        if kind in ('num', 'str', 'bool'):
+            return node[1]
+        if kind == 'ref':
+            return self.cell_value(*node[1:])
+        if kind == 'range':
+            return self.range_values(node)
+        if kind == 'neg':
+            value = self.number(self.scalar(self.eval_node(node[1])))
+            return value if isinstance(value, ErrorValue) else -value
+        if kind == 'bin':
+            return self.binary(node[1], self.scalar(self.eval_node(node[2])), self.scalar(self.eval_node(node[3])))
+        if kind == 'call':
+            return self.call(node[1], node[2])
+        raise FormulaError(f"Unknown node {kind}")
+
+    def scalar(self, value):
+        """A range used where one value is expected gives its single cell (or #VALUE!)"""
+        if isinstance(value, list):
+            flat = [v for row in value for v in row]
+            return flat[0] if len(flat) == 1 else self.error('#VALUE!', "range used as a value")
+        return value
+
+    def binary(self, op, left, right):
+        for value in (left, right):
+            if isinstance(value, ErrorValue):
+                return value
+        if op in COMPARISONS:
+            return COMPARISONS[op](*self.comparable(left, right))
+        if op == '&':
+            return self.text(left) + self.text(right)
+
+        a, b = self.number(left), self.number(right)
+        for value in (a, b):
+            if isinstance(value, ErrorValue):
+                return value
+        if op == '+':
+            return a + b
+        if op == '-':
+            return a - b
+        if op == '*':
+            return a * b
+        if op == '/':
+            return a / b if b != 0 else self.error('#DIV/0!')
+        if op == '^':
+            try:
+                result = a ** b
+            except (OverflowError, ZeroDivisionError):
+                return self.error('#NUM!')
+            return result if not isinstance(result, complex) else self.error('#NUM!')
+        raise FormulaError(f"Unknown operator {op}")
+
+    @staticmethod
+    def comparable(a, b):
+        """Excel ordering: numbers < text < booleans; text compares case-insensitively"""
+        def rank(value, other):
+            if value is None:
+                value = "" if isinstance(other, str) else 0
+            if isinstance(value, bool):
+                return (2, value)
+            if isinstance(value, str):
+                return (1, value.lower())
+            return (0, value)
+        return rank(a, b), rank(b, a)
+
+    # --- functions --------------------------------------------------------
+
+    def call(self, name, args):
+        if name == 'IF':
+            if len(args) not in (2, 3):
+                return self.error('#VALUE!', "IF takes 2 or 3 arguments")
+            condition = self.scalar(self.eval_node(args[0]))
+            if isinstance(condition, ErrorValue):
+                return condition
+            truthy = self.number(condition) if not isinstance(condition, str) else self.error('#VALUE!')
+            if isinstance(truthy, ErrorValue):
+                return truthy
+            if truthy:
+                return self.scalar(self.eval_node(args[1]))
+            return self.scalar(self.eval_node(args[2])) if len(args) == 3 else False
+        if name == 'IFERROR':
+            value = self.scalar(self.eval_node(args[0]))
+            return self.scalar(self.eval_node(args[1])) if isinstance(value, ErrorValue) else value
+
+        values = [self.eval_node(arg) for arg in args]
+        if name in ('SUM', 'MIN', 'MAX', 'AVERAGE', 'COUNT'):
+            return self.aggregate(name, values)
+        if name == 'INDEX':
+            return self.index(values)
+        if name == 'MATCH':
+            return self.match(values)
+        if name in ('ABS', 'ROUND'):
+            numbers = [self.number(self.scalar(v)) for v in values]
+            for value in numbers:
+                if isinstance(value, ErrorValue):
+                    return value
+            if name == 'ABS':
+                return abs(numbers[0])
+            return round(numbers[0], int(numbers[1]) if len(numbers) > 1 else 0)
+        if name in ('AND', 'OR'):
+            flags = [self.number(self.scalar(v)) for v in values]
+            for value in flags:
+                if isinstance(value, ErrorValue):
+                    return value
+            return all(flags) if name == 'AND' else any(flags)
+        return self.error('#NAME?', f"unsupported function {name}")
+
+    def aggregate(self, name, values):
+        numbers = []
+        for value in values:
+            if isinstance(value, list):
+                # Ranges skip text, booleans and blanks
+                for item in (v for row in value for v in row):
+                    if isinstance(item, ErrorValue):
+                        return item
+                    if isinstance(item, (int, float)) and not isinstance(item, bool):
+                        numbers.append(item)
+            else:
+                number = self.number(value)
+                if isinstance(number, ErrorValue):
+                    return number
+                numbers.append(number)
+
+        if name == 'SUM':
+            return sum(numbers)
+        if name == 'COUNT':
+            return len(numbers)
+        if name == 'AVERAGE':
+            return sum(numbers) / len(numbers) if numbers else self.error('#DIV/0!')
+        if not numbers:
+            return 0
+        return min(numbers) if name == 'MIN' else max(numbers)
+
+    def index(self, values):
+        if not values or not isinstance(values[0], list):
+            return self.error('#VALUE!', "INDEX needs a range")
+        table = values[0]
+        positions = [self.number(self.scalar(v)) for v in values[1:3]]
+        for value in positions:
+            if isinstance(value, ErrorValue):
+                return value
+        if len(positions) == 1 and len(table) == 1:
+            row, col = 1, int(positions[0])   # one-row range: the number picks a column
+        else:
+            row = int(positions[0]) if positions else 1
+            col = int(positions[1]) if len(positions) > 1 else 1
+        if not (1 <= row <= len(table) and 1 <= col <= len(table[0])):
+            return self.error('#REF!', "INDEX position outside the range")
+        return table[row - 1][col - 1]
+
+    def match(self, values):
+        if len(values) < 2 or not isinstance(values[1], list):
+            return self.error('#N/A', "MATCH needs a lookup range")
+        target = self.scalar(values[0])
+        if isinstance(target, ErrorValue):
+            return target
+        match_type = self.number(self.scalar(values[2])) if len(values) > 2 else 1
+        candidates = [v for row in values[1] for v in row]
+
+        if match_type == 0:
+            for position, candidate in enumerate(candidates, 1):
+                if candidate is None:
+                    continue
+                a, b = self.comparable(candidate, target)
+                if a == b:
+                    return position
+            return self.error('#N/A', f"{self.text(target)} not found")
+
+        # Approximate match on a sorted range: last position not past the target
+        best = None
+        for position, candidate in enumerate(candidates, 1):
+            if candidate is None:
+                continue
+            a, b = self.comparable(candidate, target)
+            if (a <= b) if match_type > 0 else (a >= b):
+                best = position
+            else:
+                break
+        return best if best is not None else self.error('#N/A', f"{self.text(target)} not found")
+
+
+# --- cached values ----------------------------------------------------------
+
+FORMULA_CELL_RE = re.compile(r'<c r="([A-Z]+)([0-9]+)"([^>]*)><f>([^<]*)</f>(?:<v\s*/>|<v>[^<]*</v>)?</c>')
+NS = {
+    'main': "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    'rel': "http://schemas.openxmlformats.org/package/2006/relationships",
+    'r': "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+}
+
+
+def _sheet_parts(archive):
+    """{sheet title: part name} from the workbook's relationships"""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.findall('rel:Relationship', NS)}
+    parts = {}
+    for sheet in workbook.find('main:sheets', NS):
+        target = targets[sheet.get(f"{{{NS['r']}}}id")]
+        parts[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+    return parts
+
+
+def _cached_value(value):
+    """(type attribute, <v> text) for a computed value, or None to leave the cell uncached"""
+    if isinstance(value, ErrorValue):
+        return (' t="e"', value.code) if value.code != '#CYCLE!' else None
+    if isinstance(value, bool):
+        return ' t="b"', '1' if value else '0'
+    if isinstance(value, (int, float)):
+        return '', repr(value) if isinstance(value, float) else str(value)
+    if value is None:
+        return '', '0'
+    return ' t="str"', escape(str(value))
+
+
+def write_cached_values(path, values):
+    """Rewrite the workbook with each formula's computed value stored next to it
+
+    Excel still recalculates on open (openpyxl sets fullCalcOnLoad); the cached
+    values are for previews and readers that don't calculate.
+    """
+    by_sheet = {}
+    for (sheet, row, col), value in values.items():
+        by_sheet.setdefault(sheet, {})[(get_column_letter(col), row)] = value
+
+    tmp_path = f"{path}.tmp"
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        parts = {part: sheet for sheet, part in _sheet_parts(src).items()}
+        for item in src.infolist():
+            data = src.read(item.filename)
+            sheet_values = by_sheet.get(parts.get(item.filename))
+            if sheet_values:
+                def fill(match):
+                    cached = _cached_value(sheet_values.get((match.group(1), int(match.group(2)))))
+                    if cached is None:
+                        return match.group(0)
+                    attrs = re.sub(r'\s+t="[^"]*"', '', match.group(3))
+                    type_attr, text = cached
+                    return (f'<c r="{match.group(1)}{match.group(2)}"{attrs}{type_attr}>'
+                            f'<f>{match.group(4)}</f><v>{text}</v></c>')
+                data = FORMULA_CELL_RE.sub(fill, data.decode('utf-8')).encode('utf-8')
+            dst.writestr(item, data)
+    os.replace(tmp_path, path)
+
+
+def check_workbook(path, write_values=True):
+    """Evaluate every formula in a saved workbook; optionally store the results in it"""
+    report = FormulaEvaluator.from_file(path).evaluate()
+    if write_values:
+        write_cached_values(path, report.values)
+    return report
+
+
+def verify_build(path):
+    """Builder hook: evaluate, cache values and print the summary; raises if formulas are broken"""
+    report = check_workbook(path)
+    report.print_summary()
+    if not report.ok:
+        raise FormulaCheckError(f"{os.path.basename(path)}: " + "; ".join(report.describe(limit=3)))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate and check the formulas in built workbooks")
+    parser.add_argument("paths", nargs="+", help="xlsx files to check")
+    parser.add_argument("--write", action="store_true", help="Store the computed values in each file")
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.paths:
+        print(f"\n🧮 {path}")
+        report = check_workbook(path, write_values=args.write)
+        report.print_summary()
+        failed += not report.ok
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,84 @@
+"""
+Incremental JSON array parser for streamed model output
+Emits each element of a named array as soon as its closing brace arrives
+"""
+
+import json
+
+
+class ArrayItemStream:
+    """Feed text chunks in, get completed objects of `"<key>": [ {...}, ... ]` out
+
+    Scans each character once, tracking string/escape state and brace depth,
+    so it works on partial tokens and ignores any surrounding prose or code
+    fences.
+    """
+
+    def __init__(self, key):
+        self.marker = f'"{key}"'
+        self.buffer = ""
+        self.pos = 0
+        self.in_array = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.item_start = None
+        self.errors = 0
+
+    def feed(self, chunk):
+        """Consume a chunk of text and return the list of newly completed items"""
+        self.buffer += chunk
+        items = []
+
+        if self.done:
+            return items
+
+        if not self.in_array:
+            marker_at = self.buffer.find(self.marker)
+            if marker_at == -1:
+                return items
+            bracket_at = self.buffer.find("[", marker_at + len(self.marker))
+            if bracket_at == -1:
+                return items
+            self.in_array = True
+            self.pos = bracket_at + 1
+
+        while self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                if self.depth == 0:
+                    self.item_start = self.pos
+                self.depth += 1
+            elif char == "}":
+                self.depth -= 1
+                if self.depth == 0 and self.item_start is not None:
+                    item = self._decode(self.buffer[self.item_start:self.pos + 1])
+                    if item is not None:
+                        items.append(item)
+                    self.item_start = None
+            elif char == "]" and self.depth == 0:
+                self.done = True
+                self.pos += 1
+                break
+
+            self.pos += 1
+
+        return items
+
+    def _decode(self, text):
+        try:
+            return json.loads(text)
+        except ValueError:
+            self.errors += 1
+            return None
@@ -4,20 +4,74 @@ Generates all marketing assets, listings, and launch materials
 """
 
 import os
+import sys
+import re
 import json
+import time
+import argparse
+import contextvars
 from datetime import datetime
-import anthropic
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from llm import LazyClient, create_message, prompt_cache_summary
+from llm_cache import ResponseCache
+from rate_limiter import get_rate_limiter
+from batch_runner import BatchRunner, BatchRequestError
+from engine_api import find_opportunity
+from output_capture import OutputCapture
+
+PRODUCTS_DIR = "/home/claude/ai-factory/products"
+
+# Files in a launch package and the name printed when each is saved
+LAUNCH_ASSETS = {
+    'gumroad-listing.md': 'Gumroad listing',
+    'social-posts.md': 'Social posts',
+    'launch-checklist.md': 'Launch checklist',
+    'START-HERE.txt': 'Quick start guide',
+}
+
+# Launch packages generated at once in bulk mode (each makes two API calls)
+DEFAULT_WORKERS = 4
+
+
+def built_products():
+    """Every product with a built/ directory"""
+    if not os.path.isdir(PRODUCTS_DIR):
+        return []
+    return sorted(name for name in os.listdir(PRODUCTS_DIR) if os.path.isdir(f"{PRODUCTS_DIR}/{name}/built"))
+
+
+def launch_is_stale(product_id):
+    """True if the product has no complete launch package or was rebuilt after it was written"""
+    built_dir = f"{PRODUCTS_DIR}/{product_id}/built"
+    assets = [f"{PRODUCTS_DIR}/{product_id}/launch/{name}" for name in LAUNCH_ASSETS]
+    if not all(os.path.exists(path) for path in assets):
+        return True
+    built = [entry.stat().st_mtime for entry in os.scandir(built_dir) if entry.is_file()]
+    return bool(built) and max(built) > min(os.stat(path).st_mtime for path in assets)
+
+
+def parse_listing(content):
+    """Sections of a GUMROAD_LISTING.md, keyed by their ## heading"""
+    sections = {}
+    for block in re.split(r"^## ", content, flags=re.MULTILINE)[1:]:
+        heading, _, body = block.partition("\n")
+        sections[heading.strip()] = body.strip()
+    return sections
+
+
+def select_products(product_ids=(), all_products=False, changed=False):
+    """The products named, else every built one if all_products or changed; changed keeps only stale ones"""
+    product_ids = list(product_ids) or (built_products() if all_products or changed else [])
+    if changed:
+        product_ids = [product_id for product_id in product_ids if launch_is_stale(product_id)]
+    return product_ids
 
 class LaunchEngine:
-    def __init__(self):
-        self.client = anthropic.Anthropic(
-            api_key=os.environ.get("ANTHROPIC_API_KEY")
-        )
-        
-    def generate_gumroad_listing(self, product_info):
-        """Generate optimized Gumroad listing copy"""
-        print("  📝 Generating Gumroad listing...")
+    def __init__(self, use_cache=True):
+        self.client = LazyClient()
+        self.cache = ResponseCache("launch", enabled=use_cache)
         
+    def _listing_request(self, product_info):
         prompt = f"""Create a compelling Gumroad product listing for:
 
 Product: {product_info['title']}
@@ -42,18 +96,20 @@ Generate:
 Format as markdown with clear sections. Be persuasive but honest. Focus on benefits over features.
 """
         
-        message = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
+        return {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 4000,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+    
+    def generate_gumroad_listing(self, product_info):
+        """Generate optimized Gumroad listing copy"""
+        print("  📝 Generating Gumroad listing...")
+        message = create_message(self.client, self.cache, label="LaunchEngine.generate_gumroad_listing",
+                                 **self._listing_request(product_info))
         return message.content[0].text
     
-    def generate_social_posts(self, product_info):
-        """Generate social media launch posts"""
-        print("  📱 Generating social media posts...")
-        
+    def _social_request(self, product_info):
         prompt = f"""Create social media launch posts for:
 
 Product: {product_info['title']}
@@ -84,12 +140,17 @@ Generate:
 Be authentic, helpful, not salesy. Focus on solving problems.
 """
         
-        message = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=3000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
+        return {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 3000,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+    
+    def generate_social_posts(self, product_info):
+        """Generate social media launch posts"""
+        print("  📱 Generating social media posts...")
+        message = create_message(self.client, self.cache, label="LaunchEngine.generate_social_posts",
+                                 **self._social_request(product_info))
         return message.content[0].text
     
     def generate_launch_checklist(self, product_info):
@@ -158,13 +219,16 @@ Questions during launch? Reference:
 """
         return checklist
     
-    def create_launch_package(self, product_id):
-        """Create complete launch package for a product"""
-        print(f"\n🚀 Creating Launch Package: {product_id}")
-        print("="*60)
+    def load_product_info(self, product_id, opportunity=None):
+        """Product details for the launch copy, or None if the product hasn't been built
         
+        The opportunity the product was built from (passed in, else looked up
+        in the opportunity store) supplies the title, price, customer, problem
+        and solution; without one they come from the product's
+        GUMROAD_LISTING.md, and a product with neither is not launched.
+        """
         # Load product info
-        product_dir = f"/home/claude/ai-factory/products/{product_id}/built"
+        product_dir = f"{PRODUCTS_DIR}/{product_id}/built"
         
         if not os.path.exists(product_dir):
             print(f"❌ Product not found: {product_id}")
@@ -172,53 +236,47 @@ Questions during launch? Reference:
         
         # Try to load product metadata
         metadata_path = f"{product_dir}/GUMROAD_LISTING.md"
-        if os.path.exists(metadata_path):
-            # Extract info from existing listing
-            with open(metadata_path, 'r') as f:
-                content = f.read()
-            
+        opportunity = opportunity or find_opportunity(product_id)
+        if opportunity is not None:
             product_info = {
                 'id': product_id,
-                'title': 'Cash Flow Forecaster Pro',
-                'price': 89,
-                'target_customer': 'Small business owners',
-                'problem': 'Small businesses struggle to predict cash shortfalls',
-                'solution': '12-month cash flow forecasting with scenario planning',
+                'title': opportunity['title'],
+                'price': opportunity['price'],
+                'target_customer': opportunity.get('target_customer', 'Small business owners'),
+                'problem': opportunity.get('problem', ''),
+                'solution': opportunity.get('solution', ''),
                 'category': 'Business & Finance',
                 'files': [f for f in os.listdir(product_dir) if f.endswith(('.xlsx', '.txt', '.pdf'))]
             }
-        else:
-            print("⚠️  No metadata found, using defaults")
+        elif os.path.exists(metadata_path):
+            # Extract info from the product's own listing
+            with open(metadata_path, 'r') as f:
+                listing = parse_listing(f.read())
+            
+            price = re.search(r"\d+(?:\.\d+)?", listing.get('Price', ''))
+            if not listing.get('Product Name') or price is None:
+                print(f"❌ {metadata_path} has no product name or price")
+                return None
+            description = listing.get('Description', '').splitlines()
             product_info = {
                 'id': product_id,
-                'title': 'Product',
-                'price': 49,
+                'title': listing['Product Name'].split(' - ')[0],
+                'price': float(price.group()) if '.' in price.group() else int(price.group()),
+                'target_customer': 'Small business owners',
+                'problem': description[0].strip('*') if description else '',
+                'solution': listing.get('Subtitle', ''),
+                'category': 'Business & Finance',
                 'files': [f for f in os.listdir(product_dir) if f.endswith(('.xlsx', '.txt', '.pdf'))]
             }
+        else:
+            # No title or price to sell it under - don't invent them
+            print(f"❌ No opportunity record or GUMROAD_LISTING.md for {product_id}")
+            return None
         
-        # Create launch directory
-        launch_dir = f"/home/claude/ai-factory/products/{product_id}/launch"
-        os.makedirs(launch_dir, exist_ok=True)
-        
-        # Generate assets
-        gumroad_listing = self.generate_gumroad_listing(product_info)
-        social_posts = self.generate_social_posts(product_info)
-        launch_checklist = self.generate_launch_checklist(product_info)
-        
-        # Save all assets
-        with open(f"{launch_dir}/gumroad-listing.md", 'w') as f:
-            f.write(gumroad_listing)
-        print("  ✓ Gumroad listing saved")
-        
-        with open(f"{launch_dir}/social-posts.md", 'w') as f:
-            f.write(social_posts)
-        print("  ✓ Social posts saved")
-        
-        with open(f"{launch_dir}/launch-checklist.md", 'w') as f:
-            f.write(launch_checklist)
-        print("  ✓ Launch checklist saved")
-        
-        # Create quick start guide
+        return product_info
+    
+    def generate_quick_start(self, product_info):
+        """Generate the START-HERE quick start guide"""
         quick_start = f"""# QUICK START - LAUNCH IN 15 MINUTES
 
 ## Files Ready:
@@ -239,10 +297,68 @@ Questions during launch? Reference:
 
 Start with launch-checklist.md →
 """
+        return quick_start
+    
+    def make_launch_dir(self, product_info):
+        launch_dir = f"{PRODUCTS_DIR}/{product_info['id']}/launch"
+        os.makedirs(launch_dir, exist_ok=True)
+        return launch_dir
+    
+    def save_asset(self, launch_dir, filename, text):
+        with open(f"{launch_dir}/{filename}", 'w') as f:
+            f.write(text)
+        print(f"  ✓ {LAUNCH_ASSETS[filename]} saved")
+    
+    def write_local_assets(self, product_info, launch_dir):
+        """Write the checklist and quick start - the assets that need no API call"""
+        self.save_asset(launch_dir, 'launch-checklist.md', self.generate_launch_checklist(product_info))
+        self.save_asset(launch_dir, 'START-HERE.txt', self.generate_quick_start(product_info))
+    
+    def write_launch_package(self, product_info, gumroad_listing, social_posts):
+        """Write the listing, social posts, checklist and quick start into products/<id>/launch"""
+        launch_dir = self.make_launch_dir(product_info)
+        self.save_asset(launch_dir, 'gumroad-listing.md', gumroad_listing)
+        self.save_asset(launch_dir, 'social-posts.md', social_posts)
+        self.write_local_assets(product_info, launch_dir)
+        return launch_dir
+    
+    def print_run_stats(self):
+        print(self.cache.summary())
+        print(get_rate_limiter().summary())
+        print(prompt_cache_summary())
+    
+    def create_launch_package(self, product_id, opportunity=None):
+        """Create complete launch package for a product"""
+        print(f"\n🚀 Creating Launch Package: {product_id}")
+        print("="*60)
         
-        with open(f"{launch_dir}/START-HERE.txt", 'w') as f:
-            f.write(quick_start)
-        print("  ✓ Quick start guide saved")
+        product_info = self.load_product_info(product_id, opportunity)
+        if product_info is None:
+            return None
+        
+        launch_dir = self.make_launch_dir(product_info)
+        
+        # The listing and social posts generate concurrently and each is saved as soon as
+        # it lands; the checklist and quick start are written while both are in flight.
+        # Each call runs in a copy of this thread's context, so an OutputCapture
+        # around this package still gets their prints
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            generations = {
+                pool.submit(contextvars.copy_context().run, self.generate_gumroad_listing, product_info):
+                    'gumroad-listing.md',
+                pool.submit(contextvars.copy_context().run, self.generate_social_posts, product_info):
+                    'social-posts.md',
+            }
+            self.write_local_assets(product_info, launch_dir)
+            
+            errors = []
+            for future in as_completed(generations):
+                try:
+                    self.save_asset(launch_dir, generations[future], future.result())
+                except Exception as e:
+                    errors.append(e)
+        if errors:
+            raise errors[0]
         
         print("\n" + "="*60)
         print("✅ LAUNCH PACKAGE COMPLETE")
@@ -250,17 +366,153 @@ Start with launch-checklist.md →
         print(f"Location: {launch_dir}")
         print(f"Files created: 4")
         print(f"Ready to launch: YES")
+        self.print_run_stats()
         print("="*60)
         print("\n📋 NEXT: Read START-HERE.txt for launch instructions\n")
         
         return launch_dir
+    
+    def _launch(self, product_id):
+        try:
+            launch_dir = self.create_launch_package(product_id)
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
+        return launch_dir, None if launch_dir else "not built or no product details"
+    
+    def _launch_row(self, output, product_id):
+        """Create one package with its output captured; returns its summary row (log included)"""
+        started = time.perf_counter()
+        (launch_dir, error), log = output.capture(self._launch, product_id)
+        return {
+            'product_id': product_id,
+            'status': 'failed' if error else 'launched',
+            'launch_dir': launch_dir,
+            'error': error,
+            'seconds': round(time.perf_counter() - started, 2),
+            'log': log,
+        }
+    
+    def create_launch_packages(self, product_ids, workers=DEFAULT_WORKERS, verbose=False):
+        """Create launch packages for many products at once; returns one summary row per product
+        
+        Up to `workers` packages generate concurrently, every call going
+        through this process's shared rate limiter. Each package's output is
+        kept in its row and printed for failures (for every package if verbose).
+        """
+        if not product_ids:
+            print("\n✅ Every launch package is up to date\n")
+            return []
+        
+        print(f"\n🚀 Creating {len(product_ids)} Launch Packages ({workers} at a time)")
+        print("="*60)
+        
+        rows = []
+        started = time.perf_counter()
+        # Each package's own progress output is captured so the lines below stay readable
+        with OutputCapture() as output, ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._launch_row, output, product_id) for product_id in product_ids]
+            for done, future in enumerate(as_completed(futures), 1):
+                row = future.result()
+                rows.append(row)
+                mark = "✓" if row['status'] == 'launched' else "❌"
+                print(f"  {mark} [{done}/{len(product_ids)}] {row['product_id']} ({row['seconds']:.1f}s)"
+                      f"{': ' + row['error'] if row['error'] else ''}")
+        elapsed = time.perf_counter() - started
+        rows.sort(key=lambda row: row['product_id'])
+        failed = [row for row in rows if row['status'] == 'failed']
+        
+        print("\n" + "="*72)
+        print(f"{'Product':<32} {'Status':<9} {'Time':>7}  Launch package / error")
+        print("-"*72)
+        for row in rows:
+            detail = row['error'] or os.path.relpath(row['launch_dir'], PRODUCTS_DIR)
+            print(f"{row['product_id']:<32} {row['status']:<9} {row['seconds']:>6.1f}s  {detail}")
+        print("="*72)
+        for row in rows:
+            if row['log'] and (verbose or row['status'] == 'failed'):
+                print(f"\n📄 {row['product_id']} output:")
+                print(row['log'].rstrip())
+        if verbose or failed:
+            print("\n" + "="*72)
+        print(f"{'✅' if not failed else '⚠️ '} {len(rows) - len(failed)} launched, {len(failed)} failed in {elapsed:.1f}s "
+              f"({sum(row['seconds'] for row in rows):.1f}s of package time)")
+        self.print_run_stats()
+        print("="*72 + "\n")
+        
+        return rows
+    
+    def create_launch_packages_batch(self, product_ids):
+        """Regenerate launch packages for many products through the Message Batches API
+        
+        The listing and social-post requests for every product go out in one
+        batch; packages are written once the batch ends. Returns {product_id: launch_dir}.
+        """
+        print(f"\n🚀 Creating {len(product_ids)} Launch Packages (batch mode)")
+        print("="*60)
+        
+        products = {}
+        for product_id in product_ids:
+            product_info = self.load_product_info(product_id)
+            if product_info is not None:
+                products[product_id] = product_info
+        
+        runner = BatchRunner(self.client, self.cache)
+        for product_id, product_info in products.items():
+            runner.add(f"{product_id}-listing", label="LaunchEngine.generate_gumroad_listing",
+                       **self._listing_request(product_info))
+            runner.add(f"{product_id}-social", label="LaunchEngine.generate_social_posts",
+                       **self._social_request(product_info))
+        results = runner.run()
+        
+        launch_dirs = {}
+        for product_id, product_info in products.items():
+            listing = results[f"{product_id}-listing"]
+            social = results[f"{product_id}-social"]
+            failed = [r for r in (listing, social) if isinstance(r, BatchRequestError)]
+            if failed:
+                print(f"\n❌ {product_id}: {'; '.join(str(e) for e in failed)}")
+                continue
+            
+            print(f"\n📦 {product_id}")
+            launch_dirs[product_id] = self.write_launch_package(
+                product_info, listing.content[0].text, social.content[0].text
+            )
+        
+        print("\n" + "="*60)
+        print(f"✅ {len(launch_dirs)}/{len(product_ids)} LAUNCH PACKAGES COMPLETE")
+        print("="*60)
+        self.print_run_stats()
+        print("="*60 + "\n")
+        
+        return launch_dirs
 
 if __name__ == "__main__":
-    engine = LaunchEngine()
+    parser = argparse.ArgumentParser(description="Create launch packages for built products")
+    parser.add_argument("product_ids", nargs="*", help="Products to launch (products/<id>/built)")
+    parser.add_argument("--all", action="store_true", help="Every product with a built/ directory")
+    parser.add_argument("--changed", action="store_true",
+                        help="Only products without a launch package or rebuilt since it was written")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Launch packages generated at once (default {DEFAULT_WORKERS})")
+    parser.add_argument("--batch", action="store_true", help="Go through the Message Batches API instead")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
+    parser.add_argument("--verbose", action="store_true", help="Print every package's output, not just failures")
+    args = parser.parse_args()
     
-    # Create launch package for Cash Flow Forecaster
-    product_id = "cash_flow_forecaster_pro"
-    launch_dir = engine.create_launch_package(product_id)
+    if not (args.product_ids or args.all or args.changed or args.batch):
+        parser.error("name a product, or pass --all or --changed")
+    # --batch with nothing named regenerates every built product
+    product_ids = select_products(args.product_ids, args.all or args.batch, args.changed)
+    engine = LaunchEngine(use_cache=not args.no_cache)
     
-    if launch_dir:
-        print(f"✅ Launch package ready: {launch_dir}")
+    if args.batch:
+        engine.create_launch_packages_batch(product_ids)
+    elif len(product_ids) == 1 and not (args.all or args.changed):
+        launch_dir = engine.create_launch_package(product_ids[0])
+        
+        if launch_dir:
+            print(f"✅ Launch package ready: {launch_dir}")
+        sys.exit(0 if launch_dir else 1)
+    else:
+        rows = engine.create_launch_packages(product_ids, args.workers, args.verbose)
+        sys.exit(0 if all(row['status'] == 'launched' for row in rows) else 1)
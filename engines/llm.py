@@ -0,0 +1,317 @@
+"""
+LLM Gateway - Shared entry point for Anthropic messages.create calls
+Every engine routes its API calls through here so caching and rate limiting apply uniformly
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import inspect
+import threading
+from rate_limiter import get_rate_limiter
+from usage_ledger import record_call
+
+# Retries handled here (the SDK's own retries are disabled so the limiter sees every one):
+# 429 / 529 pause the shared limiter, the errors the SDK would retry back off exponentially
+MAX_ATTEMPTS = 6
+RETRY_STATUSES = {408, 409}
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 8.0
+
+# Token totals for API calls made by this process (cache hits are free and not counted)
+usage_totals = {
+    "input_tokens": 0,
+    "output_tokens": 0,
+    "cache_creation_input_tokens": 0,
+    "cache_read_input_tokens": 0,
+}
+_usage_lock = threading.Lock()
+
+
+class LazyClient:
+    """Anthropic client built on first use
+
+    Engines hold one of these instead of a client, so importing an engine -
+    or answering every call from the response cache - never loads the SDK.
+    """
+
+    def __init__(self, async_client=False):
+        self.async_client = async_client
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import anthropic
+                    client_class = anthropic.AsyncAnthropic if self.async_client else anthropic.Anthropic
+                    self._client = client_class(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+def estimate_tokens(params):
+    """Rough input-token estimate (~4 characters per token) charged before sending"""
+    text = json.dumps(params.get("messages", [])) + json.dumps(params.get("system", ""))
+    return len(text) // 4
+
+
+def _usage_tokens(message):
+    usage = getattr(message, "usage", None)
+    return getattr(usage, "input_tokens", 0) + getattr(usage, "output_tokens", 0)
+
+
+def add_usage(message):
+    """Add a response's token usage to the process totals"""
+    usage = getattr(message, "usage", None)
+    with _usage_lock:
+        for key in usage_totals:
+            usage_totals[key] += getattr(usage, key, None) or 0
+
+
+def _account(limiter, message, estimate):
+    """Reconcile the limiter with real usage and add it to the process totals"""
+    limiter.record_usage(_usage_tokens(message), estimate)
+    add_usage(message)
+
+
+def prompt_cache_summary():
+    """One-line report of prompt-cache writes vs reads for end-of-run output"""
+    written = usage_totals["cache_creation_input_tokens"]
+    read = usage_totals["cache_read_input_tokens"]
+    uncached = usage_totals["input_tokens"]
+    total = written + read + uncached
+    read_share = read / total * 100 if total else 0
+    return (f"Prompt cache: {read:,} tokens read, {written:,} written, "
+            f"{uncached:,} uncached input ({read_share:.0f}% of input served from cache)")
+
+
+def _log_failure(label, params, started, attempts, error, streamed=False):
+    record_call(label, params.get("model"), latency=time.monotonic() - started,
+                wall=time.monotonic() - started, attempts=attempts, streamed=streamed, error=error)
+
+
+def _log_cache_hit(label, params, message, streamed=False):
+    record_call(label, params.get("model"), message, attempts=0, cached=True, streamed=streamed)
+
+
+def _is_rate_limited(error):
+    import anthropic
+    return isinstance(error, anthropic.RateLimitError) or getattr(error, "status_code", None) == 529
+
+
+def _is_transient(error):
+    """Connection errors, timeouts, 408, 409 and 5xx - the errors the SDK itself retries"""
+    import anthropic
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None) or 0
+    return status in RETRY_STATUSES or status >= 500
+
+
+def _should_retry(error):
+    return _is_rate_limited(error) or _is_transient(error)
+
+
+def _back_off(limiter, error, label, attempt):
+    """Log a failed attempt; returns the seconds to wait before the next one
+
+    A rate limit pauses the shared limiter itself, so the wait is spent in
+    acquire(); anything else backs off exponentially (with jitter).
+    """
+    if _is_rate_limited(error):
+        pause = limiter.on_rate_limited(error.response.headers)
+        print(f"  ⏳ Rate limited ({error.status_code}) on attempt {attempt} - backing off {pause:.0f}s")
+        return 0.0
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempt - 1)) * random.uniform(0.75, 1.0)
+    print(f"  ⚠ {label or 'LLM call'} attempt {attempt} failed ({type(error).__name__}: {error})"
+          f" - retrying in {delay:.1f}s")
+    return delay
+
+
+def _stream_headers(stream):
+    response = getattr(stream, "response", None)
+    return getattr(response, "headers", None)
+
+
+def _send(client, params, label):
+    """messages.create under the shared rate limiter, retrying 429s and transient errors with backoff"""
+    import anthropic
+    limiter = get_rate_limiter()
+    estimate = estimate_tokens(params)
+    client = client.with_options(max_retries=0)
+    started = time.monotonic()
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        limiter.acquire(estimate)
+        sent = time.monotonic()
+        try:
+            raw = client.messages.with_raw_response.create(**params)
+        except anthropic.APIError as e:
+            if not _should_retry(e) or attempt == MAX_ATTEMPTS:
+                _log_failure(label, params, started, attempt, e)
+                raise
+            time.sleep(_back_off(limiter, e, label, attempt))
+            continue
+
+        limiter.on_success(raw.headers)
+        message = raw.parse()
+        _account(limiter, message, estimate)
+        record_call(label, params.get("model"), message, time.monotonic() - sent,
+                    time.monotonic() - started, attempt)
+        return message
+
+
+async def _asend(client, params, label):
+    """Async variant of _send"""
+    import anthropic
+    limiter = get_rate_limiter()
+    estimate = estimate_tokens(params)
+    client = client.with_options(max_retries=0)
+    started = time.monotonic()
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        await limiter.acquire_async(estimate)
+        sent = time.monotonic()
+        try:
+            raw = await client.messages.with_raw_response.create(**params)
+        except anthropic.APIError as e:
+            if not _should_retry(e) or attempt == MAX_ATTEMPTS:
+                _log_failure(label, params, started, attempt, e)
+                raise
+            await asyncio.sleep(_back_off(limiter, e, label, attempt))
+            continue
+
+        limiter.on_success(raw.headers)
+        message = raw.parse()
+        if inspect.isawaitable(message):
+            message = await message
+        _account(limiter, message, estimate)
+        record_call(label, params.get("model"), message, time.monotonic() - sent,
+                    time.monotonic() - started, attempt)
+        return message
+
+
+def create_message(client, cache=None, label=None, **params):
+    """messages.create with an optional ResponseCache in front of it
+
+    `label` names the calling stage (e.g. "LaunchEngine.generate_social_posts")
+    in the usage ledger.
+    """
+    if cache is not None:
+        cached = cache.get(params)
+        if cached is not None:
+            _log_cache_hit(label, params, cached)
+            return cached
+
+    message = _send(client, params, label)
+
+    if cache is not None:
+        cache.put(params, message)
+    return message
+
+
+async def acreate_message(client, cache=None, label=None, **params):
+    """Async variant of create_message for AsyncAnthropic clients"""
+    if cache is not None:
+        cached = cache.get(params)
+        if cached is not None:
+            _log_cache_hit(label, params, cached)
+            return cached
+
+    message = await _asend(client, params, label)
+
+    if cache is not None:
+        cache.put(params, message)
+    return message
+
+
+def stream_message(client, on_text, cache=None, label=None, **params):
+    """messages.stream that hands each text delta to on_text as it arrives
+
+    A cache hit replays the stored response as a single chunk. A 429 or
+    transient error is only retried if it arrives before any text was delivered.
+    """
+    if cache is not None:
+        cached = cache.get(params)
+        if cached is not None:
+            _log_cache_hit(label, params, cached, streamed=True)
+            on_text(cached.content[0].text)
+            return cached
+
+    import anthropic
+    limiter = get_rate_limiter()
+    estimate = estimate_tokens(params)
+    client = client.with_options(max_retries=0)
+    started = time.monotonic()
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        limiter.acquire(estimate)
+        sent = time.monotonic()
+        delivered = False
+        try:
+            with client.messages.stream(**params) as stream:
+                limiter.on_success(_stream_headers(stream))
+                for text in stream.text_stream:
+                    delivered = True
+                    on_text(text)
+                message = stream.get_final_message()
+            break
+        except anthropic.APIError as e:
+            if delivered or not _should_retry(e) or attempt == MAX_ATTEMPTS:
+                _log_failure(label, params, started, attempt, e, streamed=True)
+                raise
+            time.sleep(_back_off(limiter, e, label, attempt))
+
+    _account(limiter, message, estimate)
+    record_call(label, params.get("model"), message, time.monotonic() - sent,
+                time.monotonic() - started, attempt, streamed=True)
+    if cache is not None:
+        cache.put(params, message)
+    return message
+
+
+async def astream_message(client, on_text, cache=None, label=None, **params):
+    """Async variant of stream_message for AsyncAnthropic clients"""
+    if cache is not None:
+        cached = cache.get(params)
+        if cached is not None:
+            _log_cache_hit(label, params, cached, streamed=True)
+            on_text(cached.content[0].text)
+            return cached
+
+    import anthropic
+    limiter = get_rate_limiter()
+    estimate = estimate_tokens(params)
+    client = client.with_options(max_retries=0)
+    started = time.monotonic()
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        await limiter.acquire_async(estimate)
+        sent = time.monotonic()
+        delivered = False
+        try:
+            async with client.messages.stream(**params) as stream:
+                limiter.on_success(_stream_headers(stream))
+                async for text in stream.text_stream:
+                    delivered = True
+                    on_text(text)
+                message = await stream.get_final_message()
+            break
+        except anthropic.APIError as e:
+            if delivered or not _should_retry(e) or attempt == MAX_ATTEMPTS:
+                _log_failure(label, params, started, attempt, e, streamed=True)
+                raise
+            await asyncio.sleep(_back_off(limiter, e, label, attempt))
+
+    _account(limiter, message, estimate)
+    record_call(label, params.get("model"), message, time.monotonic() - sent,
+                time.monotonic() - started, attempt, streamed=True)
+    if cache is not None:
+        cache.put(params, message)
+    return message
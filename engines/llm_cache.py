@@ -0,0 +1,228 @@
+"""
+LLM Response Cache - Content-addressed on-disk cache for Anthropic responses
+Identical (model, prompt, parameters) requests are answered from disk instead of the API
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from types import SimpleNamespace
+
+CACHE_DIR = "/home/claude/ai-factory/.llm_cache"
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# Between limit checks, writes still rescan the store this often (other processes write to it too)
+EVICT_EVERY_WRITES = 100
+
+# Only complete generations are worth replaying; truncated ones are retried
+CACHEABLE_STOP_REASONS = {"end_turn", "stop_sequence"}
+
+
+def request_key(params):
+    """Hash every request parameter (model, system, messages, max_tokens, temperature...)"""
+    canonical = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def disabled_engines():
+    """Engines opted out via AI_FACTORY_CACHE_DISABLE=discovery,launch (or 'all')"""
+    raw = os.environ.get("AI_FACTORY_CACHE_DISABLE", "")
+    return {name.strip().lower() for name in raw.split(",") if name.strip()}
+
+
+class CachedMessage:
+    """Minimal stand-in for an anthropic Message, rebuilt from a cache entry"""
+
+    def __init__(self, entry):
+        self.id = entry.get("id")
+        self.model = entry.get("model")
+        self.stop_reason = entry.get("stop_reason")
+        self.content = [SimpleNamespace(type="text", text=entry["text"])]
+        self.usage = SimpleNamespace(**entry.get("usage", {}))
+        self.from_cache = True
+
+
+class ResponseCache:
+    """On-disk response cache with TTL, LRU eviction and hit/miss counters
+
+    The store is shared by every engine (keys are content hashes, so the same
+    prompt from two engines is one entry); `engine` only names the caller for
+    opt-out and statistics.
+    """
+
+    def __init__(self, engine, enabled=True, cache_dir=CACHE_DIR,
+                 ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        opted_out = disabled_engines()
+        self.engine = engine
+        self.enabled = enabled and engine.lower() not in opted_out and "all" not in opted_out
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "expired": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._tracked = None  # entries, bytes and writes since the last eviction scan
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self.stats[counter] += amount
+
+    def get(self, params):
+        """Return a CachedMessage for these params, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        path = self._path(request_key(params))
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+
+        if self._expired(entry.get("created_at", 0), time.time()):
+            self._count("expired")
+            self._count("misses")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        # Touch the file so eviction order is least-recently-used (expiry goes by created_at)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        self._count("hits")
+        return CachedMessage(entry)
+
+    def put(self, params, message):
+        """Store a completed API response"""
+        if not self.enabled or getattr(message, "from_cache", False):
+            return
+        if getattr(message, "stop_reason", None) not in CACHEABLE_STOP_REASONS:
+            return
+
+        usage = getattr(message, "usage", None)
+        entry = {
+            "id": getattr(message, "id", None),
+            "model": getattr(message, "model", params.get("model")),
+            "stop_reason": message.stop_reason,
+            "text": "".join(block.text for block in message.content if getattr(block, "type", "text") == "text"),
+            "usage": {
+                "input_tokens": getattr(usage, "input_tokens", 0),
+                "output_tokens": getattr(usage, "output_tokens", 0),
+            },
+            "engine": self.engine,
+            "created_at": time.time(),
+        }
+
+        path = self._path(request_key(params))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        data = json.dumps(entry)
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self._count("writes")
+        if self._over_limits(len(data)):
+            self.evict()
+
+    def _over_limits(self, size):
+        """Add a write to the tracked totals; True when they pass a limit or a rescan is due"""
+        with self._lock:
+            if self._tracked is None:
+                return True
+            self._tracked["entries"] += 1
+            self._tracked["bytes"] += size
+            self._tracked["writes"] += 1
+            return (self._tracked["entries"] > self.max_entries
+                    or self._tracked["bytes"] > self.max_bytes
+                    or self._tracked["writes"] >= EVICT_EVERY_WRITES)
+
+    def _expired(self, created_at, now):
+        return now - created_at > self.ttl_seconds
+
+    def _created_at(self, path):
+        """created_at of a stored entry (0 for one that can't be read, so it counts as expired)"""
+        try:
+            with open(path, 'r') as f:
+                return json.load(f).get("created_at", 0)
+        except (OSError, ValueError):
+            return 0
+
+    def discard(self, params):
+        """Forget a stored response (e.g. one whose content turned out to be unusable)"""
+        try:
+            os.remove(self._path(request_key(params)))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop expired entries, then least-recently-used ones until under the size limits"""
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        now = time.time()
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for item in os.scandir(shard.path):
+                if not item.name.endswith(".json"):
+                    continue
+                try:
+                    st = item.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, item.path))
+
+        # Expiry goes by created_at, as in get(); the mtime, bumped on every hit, only orders
+        # the LRU. created_at is never later than the mtime, so only entries used within the
+        # TTL have to be read
+        expired = {path for mtime, _, path in entries
+                   if self._expired(mtime, now) or self._expired(self._created_at(path), now)}
+        removed = 0
+        for path in expired:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+
+        entries = sorted(entry for entry in entries if entry[2] not in expired)
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_bytes -= size
+            removed += 1
+
+        with self._lock:
+            self._tracked = {"entries": len(entries), "bytes": total_bytes, "writes": 0}
+            self.stats["evictions"] += removed
+
+    def summary(self):
+        """One-line hit/miss report for end-of-run output"""
+        if not self.enabled:
+            return f"LLM cache ({self.engine}): disabled"
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups * 100 if lookups else 0
+        return (f"LLM cache ({self.engine}): {self.stats['hits']} hits, "
+                f"{self.stats['misses']} misses ({hit_rate:.0f}% hit rate), "
+                f"{self.stats['evictions']} evicted")
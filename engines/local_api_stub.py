@@ -0,0 +1,284 @@
+"""
+Local API Stub - Minimal stand-in for the Anthropic Messages API
+Runs the engines offline and exercises rate limiting: it enforces its own
+requests-per-minute limit, answers with 429s and rate-limit headers, and can
+inject extra failures on demand (429s, or any --fail-status such as 500 or 529).
+
+Also serves the Message Batches endpoints: a batch ends --batch-seconds after it
+is created, with every request succeeding (or every --fail-every'th one errored).
+
+Usage:
+    python local_api_stub.py --port 8765 --rpm 20 --fail-every 5
+    python local_api_stub.py --port 8765 --fail-every 3 --fail-status 500
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=stub python template_engine.py
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 AI_FACTORY_BATCH_POLL=1 ANTHROPIC_API_KEY=stub python template_engine.py --batch
+"""
+
+import json
+import time
+import uuid
+import argparse
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# One JSON document that satisfies every engine's parser (discovery, templates, quality check)
+DEFAULT_REPLY = {
+    "products": [{"category": "Financial Dashboards", "price_range": "29-79",
+                  "examples": ["SaaS Metrics Dashboard"], "why_sells": "Saves hours",
+                  "volume_estimate": "500/month"}],
+    "pain_points": [{"need": "Cash flow forecasting", "pain": "Surprise cash shortfalls",
+                     "engagement": "high", "subreddit": "r/smallbusiness", "price_willing": "49"}],
+    "opportunities": [{"id": "stub_opportunity", "title": "Stub Opportunity", "problem": "A problem",
+                       "solution": "A template", "target_customer": "Small business owners", "price": 49,
+                       "evidence": {"gumroad": "stub", "reddit": "stub", "market_size": "stub"},
+                       "competitive_gap": "stub", "build_time_days": 1, "score": 80,
+                       "score_breakdown": {"market_demand": 32, "revenue_potential": 24,
+                                           "competitive_advantage": 16, "speed_to_market": 8},
+                       "monthly_revenue_estimate": 1000}],
+    "name": "Stub Template",
+    "description": "A template generated by the local API stub",
+    "target_audience": "Testers",
+    "key_features": ["Feature one", "Feature two", "Feature three"],
+    "price_point": "$49",
+    "quality_score_prediction": "90/100",
+    "design_specs": {"color_scheme": ["#1e3a8a", "#3b82f6"], "layout": "Grid",
+                     "key_sections": ["Dashboard", "Inputs"]},
+    "example_use_case": "Offline testing",
+    "total_score": "90/100",
+    "design_score": "36/40",
+    "functionality_score": "27/30",
+    "completeness_score": "27/30",
+    "passes_threshold": True,
+    "feedback": "Generated by the local API stub",
+}
+
+
+# Error type in the body of each status the stub answers with
+ERROR_TYPES = {408: "timeout_error", 409: "conflict_error", 429: "rate_limit_error", 529: "overloaded_error"}
+
+
+class StubState:
+    """Shared counters and the sliding request window"""
+
+    def __init__(self, rpm, fail_every, latency, reply_text, batch_seconds=2.0, fail_status=429):
+        self.rpm = rpm
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.latency = latency
+        self.reply_text = reply_text
+        self.batch_seconds = batch_seconds
+        self.batches = {}
+        self.window = deque()
+        self.count = 0
+        self.cached_prefixes = set()
+        self.lock = threading.Lock()
+
+    def admit(self):
+        """Return (status, retry_after, remaining) for a new request; status 200 admits it"""
+        with self.lock:
+            now = time.time()
+            while self.window and now - self.window[0] >= 60:
+                self.window.popleft()
+            self.count += 1
+
+            if self.fail_every and self.count % self.fail_every == 0:
+                return self.fail_status, 1.0, max(0, self.rpm - len(self.window))
+            if len(self.window) >= self.rpm:
+                return 429, 60 - (now - self.window[0]), 0
+
+            self.window.append(now)
+            return 200, 0.0, self.rpm - len(self.window)
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            print(f"[stub] {self.command} {self.path} -> {args[1] if len(args) > 1 else ''}")
+
+        def _rate_headers(self, remaining, retry_after=None):
+            reset = (datetime.now(timezone.utc) + timedelta(seconds=retry_after or 60)).isoformat()
+            self.send_header("anthropic-ratelimit-requests-limit", str(state.rpm))
+            self.send_header("anthropic-ratelimit-requests-remaining", str(remaining))
+            self.send_header("anthropic-ratelimit-requests-reset", reset)
+            if retry_after is not None:
+                self.send_header("retry-after", f"{retry_after:.0f}")
+
+        def _send_json(self, status, body, remaining, retry_after=None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(payload)))
+            self._rate_headers(remaining, retry_after)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _usage(self, request):
+            """Token usage, splitting cache_control system blocks into cache writes/reads"""
+            usage = {"input_tokens": len(json.dumps(request.get("messages", []))) // 4,
+                     "output_tokens": len(state.reply_text) // 4,
+                     "cache_creation_input_tokens": 0,
+                     "cache_read_input_tokens": 0}
+            system = request.get("system")
+            if isinstance(system, list) and any("cache_control" in block for block in system):
+                prefix = json.dumps(system, sort_keys=True)
+                key = "cache_creation_input_tokens"
+                with state.lock:
+                    if prefix in state.cached_prefixes:
+                        key = "cache_read_input_tokens"
+                    state.cached_prefixes.add(prefix)
+                usage[key] = len(prefix) // 4
+            elif system:
+                usage["input_tokens"] += len(json.dumps(system)) // 4
+            return usage
+
+        def _message(self, request):
+            return {
+                "id": f"msg_stub_{uuid.uuid4().hex[:12]}",
+                "type": "message",
+                "role": "assistant",
+                "model": request.get("model", "stub"),
+                "content": [{"type": "text", "text": state.reply_text}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": self._usage(request),
+            }
+
+        def _stream(self, message, remaining):
+            self.send_response(200)
+            self.send_header("content-type", "text/event-stream")
+            self._rate_headers(remaining)
+            self.end_headers()
+
+            def event(name, data):
+                self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+                self.wfile.flush()
+
+            text = message["content"][0]["text"]
+            start = dict(message, content=[], stop_reason=None,
+                         usage=dict(message["usage"], output_tokens=0))
+            event("message_start", {"type": "message_start", "message": start})
+            event("content_block_start", {"type": "content_block_start", "index": 0,
+                                          "content_block": {"type": "text", "text": ""}})
+            for i in range(0, len(text), 40):
+                event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                              "delta": {"type": "text_delta", "text": text[i:i + 40]}})
+            event("content_block_stop", {"type": "content_block_stop", "index": 0})
+            event("message_delta", {"type": "message_delta",
+                                    "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                    "usage": {"output_tokens": message["usage"]["output_tokens"]}})
+            event("message_stop", {"type": "message_stop"})
+
+        def _batch(self, batch_id):
+            batch = state.batches[batch_id]
+            ended = time.time() >= batch["ends_at"]
+            results = batch["results"]
+            errored = sum(1 for r in results if r["result"]["type"] == "errored")
+            created = datetime.fromtimestamp(batch["created_at"], timezone.utc)
+            return {
+                "id": batch_id,
+                "type": "message_batch",
+                "processing_status": "ended" if ended else "in_progress",
+                "request_counts": {
+                    "processing": 0 if ended else len(results),
+                    "succeeded": len(results) - errored if ended else 0,
+                    "errored": errored if ended else 0,
+                    "canceled": 0,
+                    "expired": 0,
+                },
+                "created_at": created.isoformat(),
+                "expires_at": (created + timedelta(hours=24)).isoformat(),
+                "ended_at": datetime.fromtimestamp(batch["ends_at"], timezone.utc).isoformat() if ended else None,
+                "cancel_initiated_at": None,
+                "archived_at": None,
+                "results_url": (f"http://{self.headers.get('host')}/v1/messages/batches/{batch_id}/results"
+                                if ended else None),
+            }
+
+        def _create_batch(self, body):
+            batch_id = f"msgbatch_stub_{uuid.uuid4().hex[:12]}"
+            results = []
+            for i, item in enumerate(body.get("requests", []), 1):
+                if state.fail_every and i % state.fail_every == 0:
+                    result = {"type": "errored", "error": {"type": "error", "error": {
+                        "type": "api_error", "message": "Stub batch failure"}}}
+                else:
+                    result = {"type": "succeeded", "message": self._message(item["params"])}
+                results.append({"custom_id": item["custom_id"], "result": result})
+
+            now = time.time()
+            state.batches[batch_id] = {"created_at": now, "ends_at": now + state.batch_seconds, "results": results}
+            self._send_json(200, self._batch(batch_id), state.rpm)
+
+        def do_GET(self):
+            parts = self.path.split("?")[0].strip("/").split("/")
+            if parts[:3] != ["v1", "messages", "batches"] or len(parts) < 4 or parts[3] not in state.batches:
+                self._send_json(404, {"type": "error", "error": {"type": "not_found_error",
+                                                                 "message": self.path}}, 0)
+                return
+
+            if len(parts) == 5 and parts[4] == "results":
+                payload = "".join(json.dumps(r) + "\n" for r in state.batches[parts[3]]["results"]).encode()
+                self.send_response(200)
+                self.send_header("content-type", "application/binary")
+                self.send_header("content-length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            else:
+                self._send_json(200, self._batch(parts[3]), state.rpm)
+
+        def do_POST(self):
+            length = int(self.headers.get("content-length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+
+            # Batches have their own limits and don't count against the per-minute window
+            if self.path.split("?")[0].rstrip("/") == "/v1/messages/batches":
+                self._create_batch(request)
+                return
+
+            if not self.path.startswith("/v1/messages"):
+                self._send_json(404, {"type": "error", "error": {"type": "not_found_error",
+                                                                 "message": self.path}}, 0)
+                return
+
+            status, retry_after, remaining = state.admit()
+            if status != 200:
+                error_type = ERROR_TYPES.get(status, "api_error")
+                self._send_json(status, {"type": "error", "error": {"type": error_type,
+                                                                    "message": f"Stub {error_type}"}},
+                                remaining, retry_after)
+                return
+
+            time.sleep(state.latency)
+            message = self._message(request)
+            if request.get("stream"):
+                self._stream(message, remaining)
+            else:
+                self._send_json(200, message, remaining)
+
+    return Handler
+
+
+def serve(port=8765, rpm=50, fail_every=0, latency=0.2, reply_text=None, batch_seconds=2.0, fail_status=429):
+    """Start the stub server (blocking)"""
+    state = StubState(rpm, fail_every, latency, reply_text or json.dumps(DEFAULT_REPLY, indent=2), batch_seconds,
+                      fail_status)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    print(f"🧪 Local API stub on http://127.0.0.1:{port} ({rpm} RPM, {fail_status} every {fail_every or '-'} requests)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Anthropic Messages API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rpm", type=int, default=50, help="requests per minute before answering 429")
+    parser.add_argument("--fail-every", type=int, default=0, help="also answer every Nth request with an error")
+    parser.add_argument("--fail-status", type=int, default=429, help="status of those errors (default 429)")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to wait before answering")
+    parser.add_argument("--reply-file", help="file whose text is returned as the model reply")
+    parser.add_argument("--batch-seconds", type=float, default=2.0, help="seconds until a message batch ends")
+    args = parser.parse_args()
+
+    reply = open(args.reply_file).read() if args.reply_file else None
+    serve(args.port, args.rpm, args.fail_every, args.latency, reply, args.batch_seconds, args.fail_status)
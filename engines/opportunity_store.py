@@ -0,0 +1,230 @@
+"""
+Opportunity Store - Indexed SQLite storage for discovery runs
+One row per run and per opportunity, so readers query only what they display
+"""
+
+import os
+import sys
+import json
+import glob
+import sqlite3
+
+DB_PATH = "/home/claude/ai-factory/opportunities/opportunities.db"
+
+DEFAULT_KEEP_RUNS = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    partial INTEGER NOT NULL DEFAULT 0,
+    total_opportunities INTEGER NOT NULL DEFAULT 0,
+    avg_score REAL NOT NULL DEFAULT 0,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs (timestamp);
+
+CREATE TABLE IF NOT EXISTS opportunities (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    title TEXT,
+    score REAL NOT NULL DEFAULT 0,
+    price REAL,
+    build_time_days REAL,
+    monthly_revenue_estimate REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (run_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_opportunities_run_score ON opportunities (run_id, score DESC);
+CREATE INDEX IF NOT EXISTS idx_opportunities_id ON opportunities (id);
+"""
+
+# Columns callers can ask for without decoding the full JSON document
+SUMMARY_COLUMNS = "id, title, score, price, build_time_days, monthly_revenue_estimate"
+
+
+def unique_ids(opportunities):
+    """The opportunities with ids made unique within the run (changed ones are copies)
+
+    The model sometimes returns two opportunities with the same id; the later
+    ones get a -2, -3... suffix instead of replacing the first. A missing id
+    becomes opportunity_<n>.
+    """
+    seen = set()
+    unique = []
+    for i, opp in enumerate(opportunities, 1):
+        base = str(opp.get("id") or f"opportunity_{i}")
+        opp_id, n = base, 1
+        while opp_id in seen:
+            n += 1
+            opp_id = f"{base}-{n}"
+        seen.add(opp_id)
+        unique.append(opp if opp.get("id") == opp_id else {**opp, "id": opp_id})
+    return unique
+
+
+class OpportunityStore:
+    """Discovery runs and their opportunities in one WAL-mode SQLite file"""
+
+    def __init__(self, db_path=DB_PATH, read_only=False):
+        self.db_path = db_path
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        else:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self.conn = sqlite3.connect(db_path)
+            # WAL lets the dashboard read while a discovery run is writing
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys=ON")
+
+    @classmethod
+    def available(cls, db_path=DB_PATH):
+        return os.path.exists(db_path)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save_run(self, run):
+        """Insert or replace a run (as written to latest.json) and all its opportunities"""
+        opportunities = unique_ids(run.get("opportunities", []))
+        metadata = run.get("metadata", {})
+        rows = [
+            (run["run_id"], opp["id"], opp.get("title"), opp.get("score", 0), opp.get("price"),
+             opp.get("build_time_days"), opp.get("monthly_revenue_estimate"), json.dumps(opp))
+            for opp in opportunities
+        ]
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (run_id, timestamp, partial, total_opportunities, avg_score, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (run_id) DO UPDATE SET timestamp = excluded.timestamp, partial = excluded.partial, "
+                "total_opportunities = excluded.total_opportunities, avg_score = excluded.avg_score, "
+                "metadata = excluded.metadata",
+                (run["run_id"], run["timestamp"], int(bool(run.get("partial"))), len(rows),
+                 metadata.get("avg_score", 0), json.dumps(metadata)),
+            )
+            self.conn.execute("DELETE FROM opportunities WHERE run_id = ?", (run["run_id"],))
+            self.conn.executemany(
+                "INSERT INTO opportunities "
+                "(run_id, id, title, score, price, build_time_days, monthly_revenue_estimate, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def latest_run(self):
+        """Most recent run's header (no opportunities), or None"""
+        row = self.conn.execute(
+            "SELECT * FROM runs ORDER BY timestamp DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        run = dict(row)
+        run["partial"] = bool(run["partial"])
+        run["metadata"] = json.loads(run["metadata"])
+        return run
+
+    def _resolve_run(self, run_id):
+        if run_id is not None:
+            return run_id
+        run = self.latest_run()
+        return run["run_id"] if run else None
+
+    def count_opportunities(self, run_id=None):
+        """Number of opportunities in a run (latest run by default)"""
+        run_id = self._resolve_run(run_id)
+        if run_id is None:
+            return 0
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM opportunities WHERE run_id = ?", (run_id,)
+        ).fetchone()[0]
+
+    def top_opportunities(self, limit=5, offset=0, run_id=None):
+        """Full opportunity records for a run, best score first"""
+        run_id = self._resolve_run(run_id)
+        if run_id is None:
+            return []
+        rows = self.conn.execute(
+            "SELECT data FROM opportunities WHERE run_id = ? ORDER BY score DESC LIMIT ? OFFSET ?",
+            (run_id, limit, offset),
+        ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def opportunity_summaries(self, limit=-1, offset=0, run_id=None):
+        """Lightweight rows (id, title, score, price...) without decoding the full records"""
+        run_id = self._resolve_run(run_id)
+        if run_id is None:
+            return []
+        rows = self.conn.execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM opportunities WHERE run_id = ? ORDER BY score DESC LIMIT ? OFFSET ?",
+            (run_id, limit, offset),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_opportunity(self, opportunity_id):
+        """The newest stored record for an opportunity id, or None"""
+        row = self.conn.execute(
+            "SELECT o.data FROM opportunities o JOIN runs r ON r.run_id = o.run_id "
+            "WHERE o.id = ? ORDER BY r.timestamp DESC LIMIT 1",
+            (opportunity_id,),
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def compact(self, keep_runs=DEFAULT_KEEP_RUNS):
+        """Retention policy: keep the newest `keep_runs` runs, drop the rest and reclaim space"""
+        with self.conn:
+            stale = [row[0] for row in self.conn.execute(
+                "SELECT run_id FROM runs ORDER BY timestamp DESC LIMIT -1 OFFSET ?", (keep_runs,)
+            )]
+            self.conn.executemany("DELETE FROM runs WHERE run_id = ?", [(run_id,) for run_id in stale])
+
+        if stale:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.execute("VACUUM")
+        return len(stale)
+
+    def import_json(self, path):
+        """Load a discovery_*.json / latest.json file written by older versions"""
+        with open(path, 'r') as f:
+            run = json.load(f)
+        if "run_id" not in run or "timestamp" not in run:
+            return False
+        self.save_run(run)
+        return True
+
+
+def main(argv=None):
+    # Only the CLI needs argparse; factory.py's read-only commands import this module too
+    import argparse
+    parser = argparse.ArgumentParser(description="Manage the discovery run store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = sub.add_parser("import", help="import discovery JSON files into the store")
+    import_cmd.add_argument("paths", nargs="*", help="JSON files (default: opportunities/discovery_*.json)")
+
+    compact_cmd = sub.add_parser("compact", help="apply the run retention policy")
+    compact_cmd.add_argument("--keep", type=int, default=DEFAULT_KEEP_RUNS, help="number of newest runs to keep")
+
+    args = parser.parse_args(argv)
+
+    with OpportunityStore() as store:
+        if args.command == "import":
+            paths = args.paths or sorted(glob.glob(os.path.join(os.path.dirname(DB_PATH), "discovery_*.json")))
+            imported = sum(1 for path in paths if store.import_json(path))
+            print(f"✓ Imported {imported} runs into {DB_PATH}")
+        elif args.command == "compact":
+            removed = store.compact(args.keep)
+            print(f"✓ Removed {removed} old runs (kept newest {args.keep})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Output Capture - Per-task stdout for engines running side by side
+While installed as sys.stdout, what a task run through capture() prints goes to that
+task's own buffer, so concurrent launches or pipeline nodes don't interleave their
+progress lines; everything else still reaches the console
+"""
+
+import io
+import sys
+import contextvars
+
+
+class OutputCapture:
+    """sys.stdout stand-in routing each captured task's prints to its own buffer
+
+    The buffer is a context variable, so it also catches threads a task
+    starts with contextvars.copy_context().run.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.log = contextvars.ContextVar('captured_output', default=None)
+
+    def __enter__(self):
+        sys.stdout = self
+        return self
+
+    def __exit__(self, *exc):
+        sys.stdout = self.stream
+
+    def capture(self, fn, *args, **kwargs):
+        """Call fn; returns (its result, what it printed)"""
+        log = io.StringIO()
+        token = self.log.set(log)
+        try:
+            return fn(*args, **kwargs), log.getvalue()
+        finally:
+            self.log.reset(token)
+
+    def write(self, text):
+        return (self.log.get() or self.stream).write(text)
+
+    def flush(self):
+        (self.log.get() or self.stream).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
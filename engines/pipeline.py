@@ -0,0 +1,284 @@
+"""
+Pipeline - Run the whole factory as one dependency graph
+discover -> build:<id> -> launch:<id> for every opportunity found that has a registered
+builder (the rest are reported as "no builder"). Each stage has its own bounded worker
+pool, branches run side by side, a stage holds back new work while the next stage's
+queue is full, and every node's status and timing go to a resumable state file, so a
+run takes about as long as its slowest branch
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from collections import deque
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from checkpoints import RunCheckpoint, RUNS_DIR as CHECKPOINT_RUNS_DIR
+from engine_api import EngineResult, PRODUCT_BUILDERS, run_engine
+from output_capture import OutputCapture
+
+RUNS_DIR = os.path.join(CHECKPOINT_RUNS_DIR, "pipeline")
+
+# Stage -> (pool, default workers), in graph order. Builds are CPU-bound openpyxl
+# work, so they get processes; discovery and launches wait on the API, so they run
+# in threads and share this process's rate limiter
+STAGES = {
+    'discover': ('thread', 1),
+    'build': ('process', os.cpu_count() or 1),
+    'launch': ('thread', 4),
+}
+
+# A stage stops starting nodes while this many per worker of the next stage are queued for it
+BACKLOG_PER_WORKER = 2
+
+
+class Node:
+    """One engine call in the graph, runnable once every node in `deps` is done"""
+
+    def __init__(self, node_id, stage, engine, kwargs, deps=(), expand=None):
+        self.id = node_id
+        self.stage = stage
+        self.engine = engine
+        self.kwargs = kwargs
+        self.deps = list(deps)
+        self.expand = expand  # called with the node's result to add the nodes that depend on it
+        self.status = 'pending'
+        self.result = None
+        self.error = None
+        self.started = None
+        self.seconds = 0.0
+
+
+def _run_in_thread(output, engine, kwargs):
+    return output.capture(run_engine, engine, **kwargs)
+
+
+def _run_in_process(engine, kwargs):
+    with redirect_stdout(io.StringIO()) as log:
+        return run_engine(engine, **kwargs), log.getvalue()
+
+
+class Pipeline:
+    """Dependency-graph scheduler with a worker pool per stage and a resumable state file"""
+
+    def __init__(self, run_id=None, workers=None, runs_dir=RUNS_DIR):
+        self.run_id = run_id or datetime.now().strftime("run-%Y%m%d-%H%M%S")
+        self.checkpoint = RunCheckpoint(self.run_id, runs_dir)
+        self.log_dir = os.path.join(self.checkpoint.run_dir, "logs")
+        self.workers = {stage: (workers or {}).get(stage) or default for stage, (_, default) in STAGES.items()}
+        self.nodes = {}
+        self.dependents = {}
+        self.ready = {stage: deque() for stage in STAGES}
+        self.no_builder = []
+        self.started = None
+
+    @property
+    def options(self):
+        """Options the run was started with, kept in the state file for --resume"""
+        return self.checkpoint.state.setdefault('options', {})
+
+    def add(self, node_id, stage, engine, deps=(), expand=None, **kwargs):
+        """Add a node; one the state file already has as done is restored instead of queued"""
+        node = Node(node_id, stage, engine, kwargs, deps, expand)
+        self.nodes[node_id] = node
+        for dep in node.deps:
+            self.dependents.setdefault(dep, []).append(node_id)
+
+        if self.checkpoint.is_done(node_id):
+            entry = self.checkpoint.state['stages'][node_id]
+            node.status = 'done'
+            node.seconds = entry.get('seconds', 0.0)
+            node.result = self.checkpoint.load(node_id) if 'output' in entry else entry.get('result')
+            print(f"  ⏭️  {node_id} done in an earlier run")
+            if node.expand:
+                node.expand(node.result)
+        elif all(self.nodes[dep].status == 'done' for dep in node.deps):
+            self.ready[stage].append(node_id)
+        return node
+
+    def _held_back(self, stage):
+        """True while the next stage already has a full queue of work from this one"""
+        stages = list(STAGES)
+        downstream = stages[stages.index(stage) + 1] if stage != stages[-1] else None
+        return downstream is not None and len(self.ready[downstream]) >= BACKLOG_PER_WORKER * self.workers[downstream]
+
+    def _submit_ready(self, pools, running, output):
+        # Later stages first, so finished work drains before new work starts
+        for stage in reversed(list(STAGES)):
+            in_flight = sum(1 for node in running.values() if node.stage == stage)
+            while self.ready[stage] and in_flight < self.workers[stage] and not self._held_back(stage):
+                node = self.nodes[self.ready[stage].popleft()]
+                node.status = 'running'
+                node.started = time.perf_counter()
+                self.checkpoint.mark(node.id, 'running')
+                if STAGES[stage][0] == 'process':
+                    future = pools[stage].submit(_run_in_process, node.engine, node.kwargs)
+                else:
+                    future = pools[stage].submit(_run_in_thread, output, node.engine, node.kwargs)
+                running[future] = node
+                in_flight += 1
+
+    def _write_log(self, node, log):
+        if not log:
+            return None
+        os.makedirs(self.log_dir, exist_ok=True)
+        path = os.path.join(self.log_dir, f"{node.id.replace(':', '-')}.log")
+        with open(path, 'w') as f:
+            f.write(log)
+        return path
+
+    def _finish(self, node, future):
+        try:
+            result, log = future.result()
+        except Exception as e:
+            # A worker process that died takes its node with it; the rest of the run carries on
+            result, log = EngineResult(node.engine, error=f"{type(e).__name__}: {e}"), ""
+        node.seconds = time.perf_counter() - node.started
+        log_path = self._write_log(node, log)
+
+        if not result.ok:
+            node.status = 'failed'
+            node.error = result.error or "no result"
+            self.checkpoint.mark(node.id, 'failed', error=node.error, seconds=round(node.seconds, 3), log=log_path)
+            print(f"  ❌ {node.id} failed after {node.seconds:.1f}s: {node.error}")
+            if log_path:
+                print(f"     Log: {log_path}")
+            self._skip_dependents(node)
+            return
+
+        node.status = 'done'
+        node.result = result.value
+        if isinstance(result.value, (list, dict)):
+            self.checkpoint.save(node.id, result.value, filename=f"{node.id}.json", status='running')
+            self.checkpoint.mark(node.id, 'done', seconds=round(node.seconds, 3), log=log_path)
+        else:
+            self.checkpoint.mark(node.id, 'done', result=result.value, seconds=round(node.seconds, 3), log=log_path)
+        print(f"  ✓ {node.id} ({node.seconds:.1f}s)")
+
+        if node.expand:
+            node.expand(node.result)
+        for node_id in self.dependents.get(node.id, []):
+            dependent = self.nodes[node_id]
+            if dependent.status == 'pending' and node_id not in self.ready[dependent.stage] and all(
+                    self.nodes[dep].status == 'done' for dep in dependent.deps):
+                self.ready[dependent.stage].append(node_id)
+
+    def _skip_dependents(self, node):
+        for node_id in self.dependents.get(node.id, []):
+            dependent = self.nodes[node_id]
+            if dependent.status == 'pending':
+                dependent.status = 'skipped'
+                dependent.error = f"{node.id} failed"
+                if node_id in self.ready[dependent.stage]:
+                    self.ready[dependent.stage].remove(node_id)
+                self.checkpoint.mark(node_id, 'skipped', error=dependent.error)
+                print(f"  ⏭️  {node_id} skipped ({dependent.error})")
+                self._skip_dependents(dependent)
+
+    def run(self):
+        """Run every node to completion; returns the nodes"""
+        self.started = time.perf_counter()
+        # Process workers start from a forkserver: forking this process while discovery and
+        # launch threads hold locks (and sys.stdout is swapped out) could deadlock them
+        context = multiprocessing.get_context('forkserver')
+        pools = {stage: ProcessPoolExecutor(max_workers=self.workers[stage], mp_context=context) if kind == 'process'
+                 else ThreadPoolExecutor(max_workers=self.workers[stage])
+                 for stage, (kind, _) in STAGES.items()}
+        running = {}
+
+        # What each thread node prints goes to its log rather than the console
+        try:
+            with OutputCapture() as output:
+                while True:
+                    self._submit_ready(pools, running, output)
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._finish(running.pop(future), future)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(cancel_futures=True)
+
+        self.checkpoint.state['finished_at'] = datetime.now().isoformat()
+        self.checkpoint.mark('pipeline', 'done', seconds=round(time.perf_counter() - self.started, 3))
+        return self.nodes
+
+    def print_summary(self):
+        elapsed = time.perf_counter() - self.started
+        total = sum(node.seconds for node in self.nodes.values() if node.started is not None)
+
+        print("\n" + "=" * 72)
+        print(f"{'Node':<40} {'Status':<8} {'Start':>8} {'Time':>8}")
+        print("-" * 72)
+        for node in self.nodes.values():
+            start = f"{node.started - self.started:.1f}s" if node.started is not None else "-"
+            print(f"{node.id:<40} {node.status:<8} {start:>8} {node.seconds:>7.1f}s")
+        print("=" * 72)
+
+        counts = {}
+        for node in self.nodes.values():
+            counts[node.status] = counts.get(node.status, 0) + 1
+        print(", ".join(f"{count} {status}" for status, count in counts.items()))
+        if self.no_builder:
+            print(f"No builder for {len(self.no_builder)} opportunities: {', '.join(self.no_builder)}")
+        print(f"Wall time {elapsed:.1f}s for {total:.1f}s of node time ({total / elapsed if elapsed else 0:.1f}x)")
+        print(f"State: {self.checkpoint.state_path}")
+        print("=" * 72 + "\n")
+
+
+def run_factory(run_id=None, top=None, use_cache=True, use_async=False, force=False, workers=None):
+    """discover -> build -> launch for every buildable opportunity (the best `top` of them if given)
+
+    Pass the run_id of an interrupted run to resume it: nodes that finished
+    are restored from its state file and only the rest run again.
+    """
+    if run_id and not RunCheckpoint.exists(run_id, RUNS_DIR):
+        raise ValueError(f"No run to resume: {run_id}")
+    pipeline = Pipeline(run_id, workers)
+    options = pipeline.options
+    if run_id and options:
+        top, use_cache, use_async, force = options['top'], options['use_cache'], options['use_async'], options['force']
+    options.update(top=top, use_cache=use_cache, use_async=use_async, force=force)
+
+    def add_branches(opportunities):
+        ranked = sorted(opportunities or [], key=lambda opp: opp.get('score', 0), reverse=True)
+        # Only products with a registered builder can be built; the rest aren't failures
+        buildable = [opp for opp in ranked if opp['id'] in PRODUCT_BUILDERS]
+        pipeline.no_builder = [opp['id'] for opp in ranked if opp['id'] not in PRODUCT_BUILDERS]
+        pipeline.checkpoint.state['no_builder'] = pipeline.no_builder
+        if pipeline.no_builder:
+            print(f"  ⏭️  No builder registered for {len(pipeline.no_builder)} of {len(ranked)} opportunities")
+        for opp in buildable[:top] if top else buildable:
+            build = pipeline.add(f"build:{opp['id']}", 'build', 'build', deps=['discover'],
+                                 opportunity_id=opp['id'], opportunity=opp, force=force)
+            pipeline.add(f"launch:{opp['id']}", 'launch', 'launch', deps=[build.id],
+                         product_id=opp['id'], opportunity=opp, use_cache=use_cache)
+
+    print(f"\n🏭 Factory run {pipeline.run_id}"
+          f" ({', '.join(f'{stage} x{count}' for stage, count in pipeline.workers.items())})")
+    print("=" * 72)
+    pipeline.add('discover', 'discover', 'discover', expand=add_branches, use_cache=use_cache, use_async=use_async)
+    pipeline.run()
+    pipeline.print_summary()
+    return pipeline
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run discovery, builds and launches as one dependency graph")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Resume an earlier run from its state file")
+    parser.add_argument("--top", type=int, help="Only build and launch the N best opportunities")
+    parser.add_argument("--build-workers", type=int, help=f"Build processes (default {STAGES['build'][1]})")
+    parser.add_argument("--launch-workers", type=int, help=f"Concurrent launches (default {STAGES['launch'][1]})")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Fetch discovery sources concurrently")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
+    parser.add_argument("--force", action="store_true", help="Rebuild products whose inputs haven't changed")
+    args = parser.parse_args()
+
+    pipeline = run_factory(args.resume, args.top, not args.no_cache, args.use_async, args.force,
+                           {'build': args.build_workers, 'launch': args.launch_workers})
+    sys.exit(0 if all(node.status == 'done' for node in pipeline.nodes.values()) else 1)
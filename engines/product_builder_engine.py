@@ -1,21 +1,51 @@
 """
 Product Builder Engine - Cash Flow Forecaster
 Builds professional 12-month cash flow forecasting tool with scenario planning
+Longer horizons and extra expense lines are supported; write_only=True streams
+each sheet to disk row by row so memory stays flat for large builds (the formula
+check, which holds every formula in memory, is then opt-in with verify=True)
 """
 
 import os
 import json
+import argparse
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, numbers
 from openpyxl.utils import get_column_letter
-from datetime import datetime, timedelta
-import calendar
+from xlsx_styles import StyleRegistry, SheetWriter, month_label, CURRENCY, PERCENT
+from build_cache import BuildCache
+from formula_eval import verify_build
+from datetime import datetime
+
+# (label, default monthly amount, note) for each operating expense line
+DEFAULT_EXPENSE_LINES = [
+    ('Operating Expenses', 18000, 'Rent, payroll, utilities, etc.'),
+]
+
+# Share of revenue spent on marketing & sales in every scenario
+MARKETING_RATIO = 0.15
+
+# Fixed seed so a rebuild with the same inputs produces the same Monte Carlo sheet
+MONTE_CARLO_SEED = 2024
+
 
 class CashFlowForecasterBuilder:
-    def __init__(self, opportunity):
+    def __init__(self, opportunity, months=12, expense_lines=None, write_only=False, currency=CURRENCY,
+                 monte_carlo_paths=0, verify=None):
         self.opportunity = opportunity
-        self.wb = Workbook()
-        self.wb.remove(self.wb.active)
+        self.currency = currency
+        self.months = months
+        self.expense_lines = expense_lines or DEFAULT_EXPENSE_LINES
+        self.last_col = get_column_letter(months + 2)
+        self.monte_carlo_paths = monte_carlo_paths  # 0 = standard edition, no Monte Carlo sheet
+        self.input_rows = {}
+        self.input_values = {}
+        self.scenario_rows = {}
+        
+        self.write_only = write_only
+        self.verify = not write_only if verify is None else verify
+        self.wb = Workbook(write_only=write_only)
+        if not write_only:
+            self.wb.remove(self.wb.active)
         
         # Professional color scheme
         self.colors = {
@@ -29,310 +59,287 @@ class CashFlowForecasterBuilder:
             'bg_input': 'FFFFF4E6',     # Light orange (input cells)
             'white': 'FFFFFFFF'
         }
+        self.styles = StyleRegistry(self.wb, self.colors)
+        self.define_styles()
+    
+    def define_styles(self):
+        """Register every cell style the sheets use, once per workbook"""
+        define = self.styles.define
+        define('Title', size=24, bold=True, color='white', fill='primary')
+        define('Sheet Title', size=18, bold=True, color='primary')
+        define('Subtitle', size=11, color='neutral')
+        define('Caption', size=10, color='neutral')
+        define('Hint', size=10, color='warning')
+        define('Section', size=14, bold=True, color='primary')
+        define('Group', bold=True, color='primary')
+        define('Instruction Heading', size=12, bold=True, color='secondary')
+        define('Alert Heading', size=12, bold=True, color='danger')
+        define('Table Header', bold=True, color='white', fill='secondary')
+        define('Inflows Label', bold=True, color='success')
+        define('Outflows Label', bold=True, color='danger')
+        define('Row Heading', size=11, bold=True)
+        define('Bold', bold=True)
+        define('Currency', number_format=self.currency)
+        define('Currency Bold', bold=True, number_format=self.currency)
+        define('Total', bold=True, fill='bg_light', number_format=self.currency)
+        define('Input', bold=True, fill='bg_input')
+        define('Input Currency', bold=True, fill='bg_input', number_format=self.currency)
+        define('Input Percent', bold=True, fill='bg_input', number_format=PERCENT)
+        define('Linked Input', fill='bg_input', number_format=self.currency)
+        define('Percent', number_format=PERCENT)
+        define('Percent Bold', bold=True, number_format=PERCENT)
+        define('Note', size=9, italic=True, color='neutral')
         
     def create_dashboard_sheet(self):
         """Create the main dashboard overview"""
         ws = self.wb.create_sheet("Dashboard", 0)
+        sheet = SheetWriter(ws, self.styles, {'A': 35, 'B': 20, 'C': 20, 'D': 20})
+        rows = self.scenario_rows
+        months = f'C{rows["months"]}:{self.last_col}{rows["months"]}'
         
         # Header
-        ws['A1'] = 'CASH FLOW FORECASTER'
-        ws['A1'].font = Font(size=24, bold=True, color=self.colors['white'])
-        ws['A1'].fill = PatternFill(start_color=self.colors['primary'], end_color=self.colors['primary'], fill_type='solid')
-        ws.merge_cells('A1:H1')
-        ws.row_dimensions[1].height = 40
-        
-        ws['A2'] = f'12-Month Cash Flow Projection & Scenario Planning'
-        ws['A2'].font = Font(size=11, color=self.colors['neutral'])
-        ws.merge_cells('A2:H2')
+        sheet.append(('CASH FLOW FORECASTER', 'Title'), height=40)
+        sheet.merge('A1:H1')
+        sheet.append((f'{self.months}-Month Cash Flow Projection & Scenario Planning', 'Subtitle'))
+        sheet.merge('A2:H2')
         
         # Key Metrics Section
-        row = 4
-        ws[f'A{row}'] = 'EXECUTIVE SUMMARY'
-        ws[f'A{row}'].font = Font(size=14, bold=True, color=self.colors['primary'])
+        sheet.skip()
+        sheet.append(('EXECUTIVE SUMMARY', 'Section'))
+        sheet.skip()
         
-        row = 6
         headers = ['Metric', 'Realistic Scenario', 'Optimistic', 'Pessimistic']
-        for col_idx, header in enumerate(headers, 1):
-            cell = ws.cell(row=row, column=col_idx)
-            cell.value = header
-            cell.font = Font(bold=True, color=self.colors['white'])
-            cell.fill = PatternFill(start_color=self.colors['secondary'], end_color=self.colors['secondary'], fill_type='solid')
+        sheet.append(*[(header, 'Table Header') for header in headers])
+        
+        first = sheet.row + 1
+        start, inflows, outflows, net, ending, lowest = range(first, first + 6)
+        scenarios = [('B', 'Realistic'), ('C', 'Optimistic'), ('D', 'Pessimistic')]
+        
+        def per_scenario(template):
+            return [template.format(col=col, sheet=name) for col, name in scenarios]
         
-        row += 1
         metrics = [
-            ('Starting Cash Balance', '=Inputs!B5', '=Inputs!B5', '=Inputs!B5'),
-            ('Total Cash Inflows (12mo)', '=SUM(Realistic!C5:N5)', '=SUM(Optimistic!C5:N5)', '=SUM(Pessimistic!C5:N5)'),
-            ('Total Cash Outflows (12mo)', '=SUM(Realistic!C20:N20)', '=SUM(Optimistic!C20:N20)', '=SUM(Pessimistic!C20:N20)'),
-            ('Net Cash Flow', '=B8-B9', '=C8-C9', '=D8-D9'),
-            ('Ending Cash Balance', '=B7+B10', '=C7+C10', '=D7+D10'),
-            ('Lowest Cash Point', '=MIN(Realistic!C22:N22)', '=MIN(Optimistic!C22:N22)', '=MIN(Pessimistic!C22:N22)'),
-            ('Month of Lowest Cash', '=INDEX(Realistic!C4:N4,MATCH(B12,Realistic!C22:N22,0))', '=INDEX(Optimistic!C4:N4,MATCH(C12,Optimistic!C22:N22,0))', '=INDEX(Pessimistic!C4:N4,MATCH(D12,Pessimistic!C22:N22,0))'),
+            ('Starting Cash Balance', per_scenario(f'=Inputs!B{self.input_rows["start"]}')),
+            (f'Total Cash Inflows ({self.months}mo)', per_scenario(f'=SUM({{sheet}}!C{rows["inflows"]}:{self.last_col}{rows["inflows"]})')),
+            (f'Total Cash Outflows ({self.months}mo)', per_scenario(f'=SUM({{sheet}}!C{rows["outflows"]}:{self.last_col}{rows["outflows"]})')),
+            ('Net Cash Flow', per_scenario(f'={{col}}{inflows}-{{col}}{outflows}')),
+            ('Ending Cash Balance', per_scenario(f'={{col}}{start}+{{col}}{net}')),
+            ('Lowest Cash Point', per_scenario(f'=MIN({{sheet}}!C{rows["ending"]}:{self.last_col}{rows["ending"]})')),
+            ('Month of Lowest Cash', per_scenario(
+                f'=INDEX({{sheet}}!{months},MATCH({{col}}{lowest},{{sheet}}!C{rows["ending"]}:{self.last_col}{rows["ending"]},0))')),
         ]
         
-        for metric_name, realistic_formula, optimistic_formula, pessimistic_formula in metrics:
-            ws[f'A{row}'] = metric_name
-            ws[f'B{row}'] = realistic_formula
-            ws[f'C{row}'] = optimistic_formula
-            ws[f'D{row}'] = pessimistic_formula
-            
-            # Format currency
+        for metric_name, formulas in metrics:
+            # Bold metric values, formatted as currency where they are amounts
             if 'Balance' in metric_name or 'Flow' in metric_name or 'Inflows' in metric_name or 'Outflows' in metric_name or 'Point' in metric_name:
-                for col in ['B', 'C', 'D']:
-                    ws[f'{col}{row}'].number_format = '$#,##0'
-            
-            # Bold metric values
-            for col in ['B', 'C', 'D']:
-                ws[f'{col}{row}'].font = Font(bold=True)
-            
-            row += 1
+                style = 'Currency Bold'
+            else:
+                style = 'Bold'
+            sheet.append(metric_name, *[(formula, style) for formula in formulas])
         
         # Cash Shortage Alert
-        row += 2
-        ws[f'A{row}'] = '⚠️ CASH SHORTAGE ALERTS'
-        ws[f'A{row}'].font = Font(size=12, bold=True, color=self.colors['danger'])
-        
-        row += 1
-        ws[f'A{row}'] = 'If cash balance drops below:'
-        ws[f'B{row}'] = '=Inputs!B6'
-        ws[f'B{row}'].fill = PatternFill(start_color=self.colors['bg_input'], end_color=self.colors['bg_input'], fill_type='solid')
-        ws[f'B{row}'].number_format = '$#,##0'
-        
-        row += 1
-        ws[f'A{row}'] = 'Alert Status (Realistic):'
-        ws[f'B{row}'] = '=IF(Dashboard!B12<Dashboard!B16,"🔴 ACTION REQUIRED","✅ On Track")'
-        ws[f'B{row}'].font = Font(bold=True)
-        
-        row += 1
-        ws[f'A{row}'] = 'Recommended Action Date:'
-        ws[f'B{row}'] = '=IF(B17="🔴 ACTION REQUIRED",Dashboard!B13&" - Start fundraising 60 days prior","N/A")'
-        
-        # Column widths
-        ws.column_dimensions['A'].width = 35
-        ws.column_dimensions['B'].width = 20
-        ws.column_dimensions['C'].width = 20
-        ws.column_dimensions['D'].width = 20
+        sheet.skip(2)
+        sheet.append(('⚠️ CASH SHORTAGE ALERTS', 'Alert Heading'))
+        threshold = sheet.append('If cash balance drops below:', (f'=Inputs!B{self.input_rows["alert"]}', 'Linked Input'))
+        status = sheet.append('Alert Status (Realistic):',
+                              (f'=IF(Dashboard!B{lowest}<Dashboard!B{threshold},"🔴 ACTION REQUIRED","✅ On Track")', 'Bold'))
+        sheet.append('Recommended Action Date:',
+                     f'=IF(B{status}="🔴 ACTION REQUIRED",Dashboard!B{lowest + 1}&" - Start fundraising 60 days prior","N/A")')
         
         print("  ✓ Dashboard sheet created")
     
     def create_inputs_sheet(self):
         """Create the inputs sheet where user enters their data"""
         ws = self.wb.create_sheet("Inputs")
+        sheet = SheetWriter(ws, self.styles, {'A': 35, 'B': 20, 'D': 40})
         
         # Header
-        ws['A1'] = 'DATA INPUTS'
-        ws['A1'].font = Font(size=18, bold=True, color=self.colors['primary'])
-        ws.merge_cells('A1:D1')
+        sheet.append(('DATA INPUTS', 'Sheet Title'))
+        sheet.merge('A1:D1')
+        sheet.append(('Enter your business data in the YELLOW cells', 'Hint'))
+        sheet.merge('A2:D2')
+        sheet.skip()
+        sheet.append(('BUSINESS INFORMATION', 'Group'))
         
-        ws['A2'] = 'Enter your business data in the YELLOW cells'
-        ws['A2'].font = Font(size=10, color=self.colors['warning'])
-        ws.merge_cells('A2:D2')
-        
-        row = 4
-        ws[f'A{row}'] = 'BUSINESS INFORMATION'
-        ws[f'A{row}'].font = Font(bold=True, color=self.colors['primary'])
-        
-        row += 1
         inputs = [
-            ('Starting Cash Balance', 50000, 'How much cash you have today'),
-            ('Minimum Cash Alert Level', 15000, 'Alert when cash drops below this'),
-            ('', '', ''),
-            ('REVENUE ASSUMPTIONS', '', ''),
-            ('Monthly Revenue (Current)', 25000, 'Your current monthly revenue'),
-            ('Revenue Growth Rate (Optimistic)', 0.15, '15% = 0.15'),
-            ('Revenue Growth Rate (Realistic)', 0.08, '8% = 0.08'),
-            ('Revenue Growth Rate (Pessimistic)', 0.03, '3% = 0.03'),
-            ('Seasonal Factor - Q1', 0.85, '0.85 = 15% below average'),
-            ('Seasonal Factor - Q2', 1.00, '1.00 = average'),
-            ('Seasonal Factor - Q3', 0.95, '0.95 = 5% below average'),
-            ('Seasonal Factor - Q4', 1.20, '1.20 = 20% above average'),
-            ('', '', ''),
-            ('EXPENSE ASSUMPTIONS', '', ''),
-            ('Monthly Operating Expenses', 18000, 'Rent, payroll, utilities, etc.'),
-            ('Expense Growth Rate (Annual)', 0.05, '5% = 0.05'),
-            ('One-time Expenses (if any)', 0, 'Equipment, hiring, etc.'),
-            ('One-time Expense Month', 6, 'Month 1-12'),
+            ('start', 'Starting Cash Balance', 50000, 'How much cash you have today'),
+            ('alert', 'Minimum Cash Alert Level', 15000, 'Alert when cash drops below this'),
+            (None, '', '', ''),
+            (None, 'REVENUE ASSUMPTIONS', '', ''),
+            ('revenue', 'Monthly Revenue (Current)', 25000, 'Your current monthly revenue'),
+            ('growth_optimistic', 'Revenue Growth Rate (Optimistic)', 0.15, '15% = 0.15'),
+            ('growth_realistic', 'Revenue Growth Rate (Realistic)', 0.08, '8% = 0.08'),
+            ('growth_pessimistic', 'Revenue Growth Rate (Pessimistic)', 0.03, '3% = 0.03'),
+            ('seasonal_1', 'Seasonal Factor - Q1', 0.85, '0.85 = 15% below average'),
+            ('seasonal_2', 'Seasonal Factor - Q2', 1.00, '1.00 = average'),
+            ('seasonal_3', 'Seasonal Factor - Q3', 0.95, '0.95 = 5% below average'),
+            ('seasonal_4', 'Seasonal Factor - Q4', 1.20, '1.20 = 20% above average'),
+            (None, '', '', ''),
+            (None, 'EXPENSE ASSUMPTIONS', '', ''),
+        ]
+        for index, (label, amount, note) in enumerate(self.expense_lines):
+            inputs.append((f'expense_{index}', f'Monthly {label}', amount, note))
+        inputs += [
+            ('expense_growth', 'Expense Growth Rate (Annual)', 0.05, '5% = 0.05'),
+            ('one_time', 'One-time Expenses (if any)', 0, 'Equipment, hiring, etc.'),
+            ('one_time_month', 'One-time Expense Month', 6, f'Month 1-{self.months}'),
         ]
         
-        for label, value, note in inputs:
-            ws[f'A{row}'] = label
+        for key, label, value, note in inputs:
+            label_cell = (label, 'Group') if 'ASSUMPTIONS' in label else label
+            value_cell = None
             if value != '':
-                ws[f'B{row}'] = value
-                ws[f'B{row}'].fill = PatternFill(start_color=self.colors['bg_input'], end_color=self.colors['bg_input'], fill_type='solid')
-                ws[f'B{row}'].font = Font(bold=True)
-                
                 # Format percentages
                 if 'Rate' in label or 'Factor' in label:
-                    ws[f'B{row}'].number_format = '0.0%'
-                elif 'Balance' in label or 'Expenses' in label or 'Revenue' in label or 'Level' in label:
-                    ws[f'B{row}'].number_format = '$#,##0'
+                    value_cell = (value, 'Input Percent')
+                elif 'Balance' in label or 'Expenses' in label or 'Revenue' in label or 'Level' in label or (key or '').startswith('expense_'):
+                    value_cell = (value, 'Input Currency')
+                else:
+                    value_cell = (value, 'Input')
             
-            ws[f'D{row}'] = note
-            ws[f'D{row}'].font = Font(size=9, color=self.colors['neutral'], italic=True)
-            
-            if 'ASSUMPTIONS' in label:
-                ws[f'A{row}'].font = Font(bold=True, color=self.colors['primary'])
-            
-            row += 1
-        
-        ws.column_dimensions['A'].width = 35
-        ws.column_dimensions['B'].width = 20
-        ws.column_dimensions['D'].width = 40
+            row = sheet.append(label_cell, value_cell, None, (note, 'Note'))
+            if key:
+                self.input_rows[key] = row
+                self.input_values[key] = value
         
         print("  ✓ Inputs sheet created")
     
-    def create_scenario_sheet(self, scenario_name, growth_rate_cell):
+    def create_scenario_sheet(self, scenario_name, growth_rate_key):
         """Create a scenario projection sheet (Realistic, Optimistic, Pessimistic)"""
         ws = self.wb.create_sheet(scenario_name)
+        widths = {'A': 25, 'B': 12}
+        widths.update({get_column_letter(month_num + 3): 11 for month_num in range(self.months)})
+        sheet = SheetWriter(ws, self.styles, widths)
         
-        # Header
-        ws['A1'] = f'{scenario_name.upper()} SCENARIO'
-        ws['A1'].font = Font(size=16, bold=True, color=self.colors['white'])
-        fill_color = self.colors['success'] if 'Optimistic' in scenario_name else self.colors['danger'] if 'Pessimistic' in scenario_name else self.colors['secondary']
-        ws['A1'].fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-        ws.merge_cells('A1:N1')
+        inputs = {key: f'Inputs!$B${row}' for key, row in self.input_rows.items()}
+        growth_rate_cell = inputs[growth_rate_key]
+        cols = [get_column_letter(month_num + 3) for month_num in range(self.months)]
+        rows = {}  # Every scenario sheet has the same layout; the Dashboard reads it from here
         
-        ws['A2'] = f'12-Month Cash Flow Projection'
-        ws['A2'].font = Font(size=10, color=self.colors['neutral'])
-        ws.merge_cells('A2:N2')
+        def month_row(label, formula, style='Currency', label_style=None):
+            """One row with a value per month; formula(month_num, col) gives each cell"""
+            label_cell = (label, label_style) if label_style else label
+            return sheet.append(label_cell, None, *[(formula(m, col), style) for m, col in enumerate(cols)])
         
-        # Month headers
-        row = 4
-        ws[f'A{row}'] = 'Month'
-        ws[f'B{row}'] = 'Starting'
+        # Header
+        fill_color = 'success' if 'Optimistic' in scenario_name else 'danger' if 'Pessimistic' in scenario_name else 'secondary'
+        title_style = self.styles.define(f'{scenario_name} Title', size=16, bold=True, color='white', fill=fill_color)
+        sheet.append((f'{scenario_name.upper()} SCENARIO', title_style))
+        sheet.merge(f'A1:{self.last_col}1')
+        sheet.append((f'{self.months}-Month Cash Flow Projection', 'Caption'))
+        sheet.merge(f'A2:{self.last_col}2')
+        sheet.skip()
         
+        # Month headers
         start_date = datetime.now().replace(day=1)
-        for month_num in range(12):
-            month_date = start_date + timedelta(days=30*month_num)
-            col = get_column_letter(month_num + 3)
-            ws[f'{col}{row}'] = month_date.strftime('%b %Y')
-            ws[f'{col}{row}'].font = Font(bold=True, color=self.colors['white'])
-            ws[f'{col}{row}'].fill = PatternFill(start_color=self.colors['secondary'], end_color=self.colors['secondary'], fill_type='solid')
+        rows['months'] = sheet.append('Month', 'Starting',
+                                      *[(month_label(start_date, m), 'Table Header') for m in range(self.months)])
         
         # Cash Inflows
-        row += 1
-        ws[f'A{row}'] = 'CASH INFLOWS'
-        ws[f'A{row}'].font = Font(bold=True, color=self.colors['success'])
-        
-        row += 1
-        ws[f'A{row}'] = 'Revenue (with seasonality)'
-        for month_num in range(12):
-            col = get_column_letter(month_num + 3)
-            quarter = (month_num // 3) + 1
-            seasonal_cell = f'Inputs!$B${9 + quarter}'  # Q1-Q4 seasonal factors
-            
+        sheet.append(('CASH INFLOWS', 'Inflows Label'))
+        
+        revenue_row = sheet.row + 1
+        
+        def revenue(month_num, col):
+            quarter = (month_num // 3) % 4 + 1
+            seasonal_cell = inputs[f'seasonal_{quarter}']  # Q1-Q4 seasonal factors
             if month_num == 0:
-                ws[f'{col}{row}'] = f'=Inputs!$B$9*{seasonal_cell}'
-            else:
-                prev_col = get_column_letter(month_num + 2)
-                ws[f'{col}{row}'] = f'={prev_col}{row}*(1+{growth_rate_cell})*{seasonal_cell}'
-            
-            ws[f'{col}{row}'].number_format = '$#,##0'
-        
-        row += 1
-        ws[f'A{row}'] = 'Other Income'
-        for month_num in range(12):
-            col = get_column_letter(month_num + 3)
-            ws[f'{col}{row}'] = 0
-            ws[f'{col}{row}'].number_format = '$#,##0'
-        
-        row += 1
-        ws[f'A{row}'] = 'Total Inflows'
-        ws[f'A{row}'].font = Font(bold=True)
-        for month_num in range(12):
-            col = get_column_letter(month_num + 3)
-            ws[f'{col}{row}'] = f'={col}{row-2}+{col}{row-1}'
-            ws[f'{col}{row}'].number_format = '$#,##0'
-            ws[f'{col}{row}'].font = Font(bold=True)
-            ws[f'{col}{row}'].fill = PatternFill(start_color=self.colors['bg_light'], end_color=self.colors['bg_light'], fill_type='solid')
+                return f'={inputs["revenue"]}*{seasonal_cell}'
+            prev_col = get_column_letter(month_num + 2)
+            return f'={prev_col}{revenue_row}*(1+{growth_rate_cell})*{seasonal_cell}'
+        
+        month_row('Revenue (with seasonality)', revenue)
+        other_row = month_row('Other Income', lambda m, col: 0)
+        rows['inflows'] = month_row('Total Inflows', lambda m, col: f'={col}{revenue_row}+{col}{other_row}', 'Total', 'Bold')
         
         # Cash Outflows
-        row += 2
-        ws[f'A{row}'] = 'CASH OUTFLOWS'
-        ws[f'A{row}'].font = Font(bold=True, color=self.colors['danger'])
-        
-        row += 1
-        ws[f'A{row}'] = 'Operating Expenses'
-        for month_num in range(12):
-            col = get_column_letter(month_num + 3)
-            monthly_growth = '(1+Inputs!$B$20/12)'  # Annual expense growth
-            ws[f'{col}{row}'] = f'=Inputs!$B$19*{monthly_growth}^{month_num}'
-            ws[f'{col}{row}'].number_format = '$#,##0'
-        
-        row += 1
-        ws[f'A{row}'] = 'One-time Expenses'
-        for month_num in range(12):
-            col = get_column_letter(month_num + 3)
-            ws[f'{col}{row}'] = f'=IF({month_num+1}=Inputs!$B$22,Inputs!$B$21,0)'
-            ws[f'{col}{row}'].number_format = '$#,##0'
-        
-        row += 1
-        ws[f'A{row}'] = 'Marketing & Sales'
-        for month_num in range(12):
-            col = get_column_letter(month_num + 3)
-            ws[f'{col}{row}'] = f'={col}6*0.15'  # 15% of revenue
-            ws[f'{col}{row}'].number_format = '$#,##0'
-        
-        row += 1
-        ws[f'A{row}'] = 'Total Outflows'
-        ws[f'A{row}'].font = Font(bold=True)
-        for month_num in range(12):
-            col = get_column_letter(month_num + 3)
-            ws[f'{col}{row}'] = f'=SUM({col}{row-3}:{col}{row-1})'
-            ws[f'{col}{row}'].number_format = '$#,##0'
-            ws[f'{col}{row}'].font = Font(bold=True)
-            ws[f'{col}{row}'].fill = PatternFill(start_color=self.colors['bg_light'], end_color=self.colors['bg_light'], fill_type='solid')
+        sheet.skip()
+        sheet.append(('CASH OUTFLOWS', 'Outflows Label'))
+        
+        monthly_growth = f'(1+{inputs["expense_growth"]}/12)'  # Annual expense growth
+        first_expense = sheet.row + 1
+        for index, (label, amount, note) in enumerate(self.expense_lines):
+            expense_cell = inputs[f'expense_{index}']
+            month_row(label, lambda m, col: f'={expense_cell}*{monthly_growth}^{m}')
+        month_row('One-time Expenses', lambda m, col: f'=IF({m + 1}={inputs["one_time_month"]},{inputs["one_time"]},0)')
+        marketing_row = month_row('Marketing & Sales', lambda m, col: f'={col}{revenue_row}*{MARKETING_RATIO}')
+        rows['outflows'] = month_row('Total Outflows', lambda m, col: f'=SUM({col}{first_expense}:{col}{marketing_row})',
+                                     'Total', 'Bold')
         
         # Net Cash Flow
-        row += 2
-        ws[f'A{row}'] = 'NET CASH FLOW'
-        ws[f'A{row}'].font = Font(bold=True, size=11)
-        for month_num in range(12):
-            col = get_column_letter(month_num + 3)
-            ws[f'{col}{row}'] = f'={col}8-{col}20'
-            ws[f'{col}{row}'].number_format = '$#,##0'
-            ws[f'{col}{row}'].font = Font(bold=True)
+        sheet.skip()
+        rows['net'] = month_row('NET CASH FLOW', lambda m, col: f'={col}{rows["inflows"]}-{col}{rows["outflows"]}',
+                  'Currency Bold', 'Row Heading')
         
         # Ending Cash Balance
-        row += 1
-        ws[f'A{row}'] = 'ENDING CASH BALANCE'
-        ws[f'A{row}'].font = Font(bold=True, size=11)
-        ws[f'B{row}'] = '=Inputs!$B$5'
-        ws[f'B{row}'].number_format = '$#,##0'
-        ws[f'B{row}'].font = Font(bold=True)
-        
-        for month_num in range(12):
-            col = get_column_letter(month_num + 3)
-            prev_col = get_column_letter(month_num + 2)
-            ws[f'{col}{row}'] = f'={prev_col}{row}+{col}{row-1}'
-            ws[f'{col}{row}'].number_format = '$#,##0'
-            ws[f'{col}{row}'].font = Font(bold=True)
-            
-            # Conditional formatting - red if below threshold
-            ws[f'{col}{row}'].fill = PatternFill(start_color=self.colors['bg_light'], end_color=self.colors['bg_light'], fill_type='solid')
-        
-        # Column widths
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 12
-        for month_num in range(12):
-            col = get_column_letter(month_num + 3)
-            ws.column_dimensions[col].width = 11
+        rows['ending'] = sheet.row + 1
+        sheet.append(('ENDING CASH BALANCE', 'Row Heading'), (f'={inputs["start"]}', 'Currency Bold'),
+                     *[(f'={get_column_letter(m + 2)}{rows["ending"]}+{col}{rows["net"]}', 'Total')
+                       for m, col in enumerate(cols)])
         
+        self.scenario_rows = rows
         print(f"  ✓ {scenario_name} scenario sheet created")
     
+    def create_monte_carlo_sheet(self):
+        """Create the premium Monte Carlo sheet: precomputed percentile bands from simulated paths"""
+        # NumPy is only loaded for premium builds
+        from monte_carlo import simulate_cash_flow, PERCENTILES
+        ws = self.wb.create_sheet("Monte Carlo")
+        widths = {'A': 38}
+        widths.update({get_column_letter(col): 14 for col in range(2, len(PERCENTILES) + 3)})
+        sheet = SheetWriter(ws, self.styles, widths)
+        
+        result = simulate_cash_flow(self.input_values, self.months, self.monte_carlo_paths,
+                                    marketing_ratio=MARKETING_RATIO, seed=MONTE_CARLO_SEED)
+        
+        sheet.append(('MONTE CARLO SIMULATION', 'Sheet Title'))
+        sheet.merge('A1:G1')
+        sheet.append((f'{result["paths"]:,} simulated {self.months}-month paths of the Realistic scenario', 'Caption'))
+        sheet.merge('A2:G2')
+        sheet.append(('Precomputed from the default Inputs - editing Inputs does not re-run the simulation', 'Note'))
+        sheet.merge('A3:G3')
+        sheet.skip()
+        
+        sheet.append(('SIMULATION SUMMARY', 'Section'))
+        sheet.append('Mean Monthly Revenue Growth', (result['growth_mean'], 'Percent'))
+        sheet.append('Growth Spread Between Paths (Std Dev)', (result['growth_std'], 'Percent'))
+        sheet.append('Monthly Growth Volatility (Std Dev)', (result['volatility'], 'Percent'))
+        sheet.append('Minimum Cash Alert Level', (result['alert'], 'Currency'))
+        sheet.append(f'Chance of Dropping Below Alert ({self.months}mo)', (result['breach_probability'], 'Percent Bold'))
+        sheet.append('Median Ending Cash Balance', (result['median_ending'], 'Currency Bold'))
+        sheet.append('Median Lowest Cash Point', (result['median_lowest'], 'Currency Bold'))
+        sheet.skip()
+        
+        # One row per month: ending cash percentiles and the share of paths that have breached the alert so far
+        sheet.append(('ENDING CASH BALANCE BY MONTH', 'Section'))
+        headers = ['Month', *[f'{p}th Percentile' if p != 50 else 'Median' for p in PERCENTILES], 'Below Alert']
+        sheet.append(*[(header, 'Table Header') for header in headers])
+        start_date = datetime.now().replace(day=1)
+        for m, (band, breach) in enumerate(zip(result['bands'], result['breach_by_month'])):
+            median_style = ['Currency Bold' if p == 50 else 'Currency' for p in PERCENTILES]
+            sheet.append(month_label(start_date, m), *zip(band, median_style), (breach, 'Percent'))
+        
+        print(f"  ✓ Monte Carlo sheet created ({result['paths']:,} paths in {result['seconds'] * 1000:.0f} ms)")
+    
     def create_instructions_sheet(self):
         """Create instructions sheet"""
         ws = self.wb.create_sheet("Instructions")
+        sheet = SheetWriter(ws, self.styles, {'A': 80})
         
-        ws['A1'] = 'HOW TO USE THIS CASH FLOW FORECASTER'
-        ws['A1'].font = Font(size=18, bold=True, color=self.colors['primary'])
+        sheet.append(('HOW TO USE THIS CASH FLOW FORECASTER', 'Sheet Title'))
+        sheet.skip()
         
         instructions = [
             ('', ''),
             ('QUICK START', 'bold'),
             ('1. Go to the "Inputs" sheet', ''),
             ('2. Enter your data in the YELLOW cells', ''),
-            ('3. Go to "Dashboard" to see your 12-month forecast', ''),
+            (f'3. Go to "Dashboard" to see your {self.months}-month forecast', ''),
             ('4. Review all 3 scenarios: Realistic, Optimistic, Pessimistic', ''),
+        ]
+        if self.monte_carlo_paths:
+            instructions.append(('5. See "Monte Carlo" for the range of likely outcomes and your chance of a cash shortage', ''))
+        instructions += [
             ('', ''),
             ('UNDERSTANDING THE SCENARIOS', 'bold'),
             ('', ''),
@@ -378,42 +385,74 @@ class CashFlowForecasterBuilder:
             (f'Created: {datetime.now().strftime("%B %Y")}', ''),
         ]
         
-        row = 3
         for text, style in instructions:
-            ws[f'A{row}'] = text
-            if style == 'bold':
-                ws[f'A{row}'].font = Font(size=12, bold=True, color=self.colors['secondary'])
-            row += 1
-        
-        ws.column_dimensions['A'].width = 80
+            sheet.append((text, 'Instruction Heading') if style == 'bold' else text)
         
         print("  ✓ Instructions sheet created")
     
-    def build(self):
-        """Main build process"""
+    def build_params(self):
+        """Constructor parameters that shape the workbook (part of the build cache key)"""
+        return {
+            'months': self.months,
+            'expense_lines': self.expense_lines,
+            'write_only': self.write_only,
+            'currency': self.currency,
+            'monte_carlo_paths': self.monte_carlo_paths,
+            'verify': self.verify,
+            # Month headers and the "Created:" line start at the build month
+            'start_month': datetime.now().strftime('%Y-%m'),
+        }
+    
+    def build_sources(self):
+        """Source files the workbook is generated from (part of the build cache key)"""
+        sources = [__file__]
+        if self.monte_carlo_paths:
+            sources.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "monte_carlo.py"))
+        return sources
+    
+    def build(self, output_dir=None, force=False):
+        """Main build process (writes to the product's built/ directory unless output_dir is given)
+
+        Skipped when the opportunity, builder source and parameters match the
+        last build of the same file, unless force=True.
+        """
+        product_dir = output_dir or f"/home/claude/ai-factory/products/{self.opportunity['id']}/built"
+        output_path = f"{product_dir}/cash-flow-forecaster-pro.xlsx"
+        cache = BuildCache(product_dir, type(self).__name__, self.build_sources(), self.opportunity, self.build_params())
+        
+        if not force and cache.is_fresh(output_path):
+            print(f"\n⏭️  Up to date: {output_path} (inputs unchanged - use --force to rebuild)")
+            return output_path
+        
         print(f"\n🏗️  Building: {self.opportunity['title']}")
         print("="*60)
         
         # Create all sheets
         self.create_inputs_sheet()
-        self.create_scenario_sheet("Realistic", "Inputs!$B$11")
-        self.create_scenario_sheet("Optimistic", "Inputs!$B$10")
-        self.create_scenario_sheet("Pessimistic", "Inputs!$B$12")
+        self.create_scenario_sheet("Realistic", "growth_realistic")
+        self.create_scenario_sheet("Optimistic", "growth_optimistic")
+        self.create_scenario_sheet("Pessimistic", "growth_pessimistic")
+        if self.monte_carlo_paths:
+            self.create_monte_carlo_sheet()
         self.create_dashboard_sheet()
         self.create_instructions_sheet()
         
         # Save
-        product_dir = f"/home/claude/ai-factory/products/{self.opportunity['id']}/built"
         os.makedirs(product_dir, exist_ok=True)
-        
-        output_path = f"{product_dir}/cash-flow-forecaster-pro.xlsx"
         self.wb.save(output_path)
+        if self.verify:
+            # Computes every formula and stores the values, so previews show numbers
+            verify_build(output_path)
+        cache.record(output_path)
         
         print("\n" + "="*60)
         print("✅ PRODUCT BUILD COMPLETE")
         print("="*60)
         print(f"File: {output_path}")
-        print(f"Sheets: 6 (Dashboard, Inputs, 3 Scenarios, Instructions)")
+        if self.monte_carlo_paths:
+            print(f"Sheets: 7 (Dashboard, Inputs, 3 Scenarios, Monte Carlo, Instructions)")
+        else:
+            print(f"Sheets: 6 (Dashboard, Inputs, 3 Scenarios, Instructions)")
         print(f"Formulas: 150+ working calculations")
         print(f"Price: ${self.opportunity['price']}")
         print(f"Ready to sell: YES")
@@ -422,6 +461,16 @@ class CashFlowForecasterBuilder:
         return output_path
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the Cash Flow Forecaster workbook")
+    parser.add_argument("--months", type=int, default=12, help="Forecast horizon in months (default 12)")
+    parser.add_argument("--write-only", action="store_true", help="Stream rows to disk (flat memory for long horizons)")
+    parser.add_argument("--verify", action="store_true",
+                        help="Check the formulas and store their values even with --write-only")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the inputs haven't changed")
+    parser.add_argument("--monte-carlo", type=int, default=0, metavar="PATHS",
+                        help="Add the premium Monte Carlo sheet simulating PATHS paths (e.g. 100000)")
+    args = parser.parse_args()
+    
     # Load the opportunity
     with open("/home/claude/ai-factory/opportunities/latest.json", 'r') as f:
         discovery = json.load(f)
@@ -430,8 +479,9 @@ if __name__ == "__main__":
     opportunity = discovery['opportunities'][0]
     
     # Build it
-    builder = CashFlowForecasterBuilder(opportunity)
-    product_path = builder.build()
+    builder = CashFlowForecasterBuilder(opportunity, months=args.months, write_only=args.write_only,
+                                        monte_carlo_paths=args.monte_carlo, verify=args.verify or None)
+    product_path = builder.build(force=args.force)
     
     # Create README
     readme_path = product_path.replace('.xlsx', '_README.txt')
@@ -440,7 +490,7 @@ if __name__ == "__main__":
 
 WHAT YOU GET:
 - Professional Excel template with 6 worksheets
-- 12-month cash flow projections
+- {builder.months}-month cash flow projections
 - 3 scenario planning (Optimistic, Realistic, Pessimistic)
 - Seasonal adjustment factors
 - Cash shortage alert system
@@ -455,7 +505,7 @@ HOW TO USE:
 5. Review all 3 scenarios
 
 WHAT IT DOES:
-- Projects your cash position for next 12 months
+- Projects your cash position for next {builder.months} months
 - Shows you when you might run low on cash
 - Helps you plan fundraising timing
 - Accounts for seasonal variations
@@ -0,0 +1,229 @@
+"""
+Quality Scorer - Rule-based template scoring against TEMPLATE_BUILDER_AGENT.md
+Scores a template concept and structure on the agent's quality checklist (design 40,
+functionality 30, completeness 30) in milliseconds and returns the same quality_score
+JSON the LLM grader does, so the same inputs always get the same score
+"""
+
+import re
+import json
+import argparse
+from agent_docs import load_agent_doc
+
+AGENT_DOC = "TEMPLATE_BUILDER_AGENT.md"
+
+PASS_THRESHOLD = 85
+
+# Scores this close to the threshold can be sent to the LLM grader for a second opinion
+BORDERLINE_MARGIN = 5
+
+# Concept fields the template builder asks for
+REQUIRED_CONCEPT_FIELDS = ["name", "description", "target_audience", "key_features", "price_point", "design_specs"]
+
+# Parts of the structure specification the builder asks for, and (lower-case) phrases that show each one
+STRUCTURE_SECTIONS = {
+    "sheet names": r"\b(sheet|tab)s?\b",
+    "section layouts": r"\b(section|layout|header|panel)s?\b",
+    "formula descriptions": r"\bformulas?\b|=\s*[a-z]+\(",
+    "color coding": r"\bcolou?r[- ]?(cod|scheme)|\bpalette\b|#[0-9a-f]{6}\b",
+    "example data": r"\b(example|sample|demo|dummy)\b.{0,20}\bdata\b",
+}
+
+# AI-slop markers from the agent's "No AI Slop" rules
+SLOP_PATTERNS = {
+    "purple gradients": r"\b(purple|violet|magenta)\b|\bgradients?\b",
+    "Lucide icons": r"\blucide\b",
+    "generic layouts": r"\b(generic|cookie[- ]cutter|placeholder) (layout|design|template)s?\b",
+}
+
+HEX_RE = re.compile(r"#([0-9a-fA-F]{6})\b")
+FORMULA_RE = re.compile(r"=\s*[A-Z][A-Z0-9.]*\(|=\s*'?[A-Za-z][\w ]*'?![A-Z]{1,3}\$?[0-9]+|\b(?:SUM|AVERAGE|INDEX|MATCH|VLOOKUP|XLOOKUP|SUMIFS?|IF|IFERROR|NPV|IRR)\(")
+SHEET_REF_RE = re.compile(r"(?:'([^']+)'|\b([A-Za-z][\w]*))![A-Z]{1,3}\$?[0-9]+")
+
+
+def agent_rules(text):
+    """Approved palette, preferred fonts and fonts to avoid, read from the agent doc"""
+    palette_section = text.split("**Color Palette**", 1)[-1].split("4. **Layout**", 1)[0]
+    typography = text.split("**Typography**", 1)[-1].split("3. **Color Palette**", 1)[0]
+
+    palette = {f"#{code.lower()}" for code in HEX_RE.findall(palette_section)}
+    # "Green for positive" -> "green"
+    palette_names = {name.lower().split(" for ")[0]
+                     for name in re.findall(r"#[0-9a-fA-F]{6} \(([^)]+)\)", palette_section)}
+    fonts = set()
+    avoid = set()
+    for line in typography.splitlines():
+        if "Avoid" in line:
+            avoid.add("calibri")  # Excel's default font
+            avoid.update(word.lower() for word in re.findall(r"\b(Arial|Comic Sans|Times New Roman)\b", line))
+        elif ":" in line:
+            for font in re.split(r" or |,", line.split(":", 1)[1]):
+                font = re.sub(r"\b(Bold|Regular)\b|\(.*\)", "", font).strip()
+                if font:
+                    fonts.add(font.lower())
+    return {"palette": palette, "palette_names": palette_names, "fonts": fonts, "avoid_fonts": avoid}
+
+
+def color_names(scheme):
+    """Named (non-hex) colors in a design spec's color_scheme
+
+    The model returns a list, but sometimes one string ("navy and gold") or a
+    {role: color} mapping; hex codes are skipped, the text is scored for those.
+    """
+    if isinstance(scheme, dict):
+        scheme = list(scheme.values())
+    elif isinstance(scheme, str):
+        scheme = re.split(r",|;|/|&|\band\b|\bwith\b", HEX_RE.sub("", scheme))
+    elif not isinstance(scheme, (list, tuple)):
+        return []
+    names = [str(color).strip().lower() for color in scheme]
+    return [name for name in names if name and not HEX_RE.fullmatch(name)]
+
+
+def _points(fraction, points):
+    return round(max(0.0, min(1.0, fraction)) * points)
+
+
+class QualityScorer:
+    """Deterministic quality checklist scoring for template packages"""
+
+    def __init__(self, agent_text=None):
+        self.rules = agent_rules(agent_text if agent_text is not None else load_agent_doc(AGENT_DOC))
+
+    def score(self, concept, structure):
+        """quality_score dict for a concept and its structure text"""
+        specs = concept.get("design_specs") or {}
+        text = f"{json.dumps(concept)}\n{structure}"
+        lower = text.lower()
+        notes = []
+
+        design = self.design_points(specs, lower, notes)
+        functionality = self.functionality_points(structure, lower, notes)
+        completeness = self.completeness_points(concept, lower, notes)
+        total = design + functionality + completeness
+
+        return {
+            "total_score": f"{total}/100",
+            "design_score": f"{design}/40",
+            "functionality_score": f"{functionality}/30",
+            "completeness_score": f"{completeness}/30",
+            "passes_threshold": total >= PASS_THRESHOLD,
+            "feedback": "; ".join(notes) if notes else "Meets every checklist item",
+            "scorer": "rules",
+        }
+
+    def design_points(self, specs, lower, notes):
+        # Professional color scheme (10): hex colors used should come from the agent palette
+        colors = {f"#{code.lower()}" for code in HEX_RE.findall(lower)}
+        named = color_names(specs.get("color_scheme"))
+        on_palette = len(colors & self.rules["palette"]) + sum(
+            1 for name in named if any(p in name for p in self.rules["palette_names"]))
+        used = len(colors) + len(named)
+        if used:
+            palette_points = _points(on_palette / used, 10)
+            if on_palette < used:
+                off = sorted(colors - self.rules["palette"])
+                notes.append(f"Colors outside the finance palette: {', '.join(off) if off else 'named colors'}")
+        else:
+            palette_points = 5
+            notes.append("No color scheme specified")
+
+        # Consistent typography (10): the agent's fonts, not Excel defaults
+        fonts = [font for font in self.rules["fonts"] if font in lower]
+        avoided = [font for font in self.rules["avoid_fonts"] if font in lower]
+        typography_points = (10 if fonts else 6) - 4 * len(avoided)
+        if avoided:
+            notes.append(f"Uses default fonts: {', '.join(sorted(avoided))}")
+        elif not fonts:
+            notes.append("No typography from the design system (Inter, Newsreader, Fira Code)")
+
+        # Clean layout (10): the structure covers every part the builder asked for
+        covered = [name for name, pattern in STRUCTURE_SECTIONS.items() if re.search(pattern, lower)]
+        missing = [name for name in STRUCTURE_SECTIONS if name not in covered]
+        layout_points = 2 * len(covered)
+        if missing:
+            notes.append(f"Structure is missing: {', '.join(missing)}")
+
+        # No AI slop (10): five points off per marker
+        slop = [name for name, pattern in SLOP_PATTERNS.items() if re.search(pattern, lower)]
+        slop_points = 10 - 5 * len(slop)
+        if slop:
+            notes.append(f"AI slop: {', '.join(slop)}")
+
+        return sum(max(0, p) for p in (palette_points, typography_points, layout_points, slop_points))
+
+    def functionality_points(self, structure, lower, notes):
+        # Formulas work correctly (15): concrete formulas described, five or more for full marks
+        formulas = len(FORMULA_RE.findall(structure))
+        formula_points = _points(formulas / 5, 15)
+        if formulas < 5:
+            notes.append(f"Only {formulas} formulas described")
+
+        # Easy to customize (10): clearly marked inputs and assumptions
+        customize = sum(1 for pattern in (r"\binputs?\b", r"\bassumptions?\b", r"\b(dropdown|data validation)\b",
+                                          r"\b(editable|customi[sz]e|adjust)\w*")
+                        if re.search(pattern, lower))
+        customize_points = _points(customize / 3, 10)
+        if customize < 3:
+            notes.append("Few customization points (inputs, assumptions, dropdowns)")
+
+        # No broken references (5): cross-sheet references name sheets the structure defines
+        referenced = {(quoted or bare).lower() for quoted, bare in SHEET_REF_RE.findall(structure)}
+        broken = sorted(name for name in referenced if lower.count(name) == lower.count(f"{name}!") + lower.count(f"{name}'!"))
+        reference_points = 5 - 2 * len(broken)
+        if broken:
+            notes.append(f"References to undefined sheets: {', '.join(broken)}")
+
+        return sum(max(0, p) for p in (formula_points, customize_points, reference_points))
+
+    def completeness_points(self, concept, lower, notes):
+        # Instructions included (10)
+        instruction_points = 10 if re.search(r"\b(instructions?|how to use|user guide|readme|getting started)\b",
+                                             lower) else 0
+        if not instruction_points:
+            notes.append("No instructions")
+
+        # Example data provided (10)
+        example_points = 10 if re.search(STRUCTURE_SECTIONS["example data"], lower) else 0
+        if not example_points:
+            notes.append("No example data")
+
+        # Multiple variations/styles (10)
+        variation_points = 10 if re.search(r"\b(variations?|versions?|editions?|industry[- ]specific|styles)\b",
+                                           lower) else 4
+        if variation_points < 10:
+            notes.append("No variations or alternate styles")
+
+        # Each concept field the builder asked for but didn't get costs two points
+        missing = [field for field in REQUIRED_CONCEPT_FIELDS if not concept.get(field)]
+        if len(concept.get("key_features") or []) < 3 and "key_features" not in missing:
+            missing.append("key_features (3+)")
+        if missing:
+            notes.append(f"Concept is missing: {', '.join(missing)}")
+
+        return max(0, instruction_points + example_points + variation_points - 2 * len(missing))
+
+
+def score_value(quality_score):
+    """The numeric total of a quality_score dict ("87/100" -> 87)"""
+    return int(str(quality_score["total_score"]).split("/")[0])
+
+
+def is_borderline(quality_score, margin=BORDERLINE_MARGIN):
+    return abs(score_value(quality_score) - PASS_THRESHOLD) <= margin
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score template packages with the rule-based scorer")
+    parser.add_argument("packages", nargs="+", help="Template package JSON files (products/.../pending/*.json)")
+    args = parser.parse_args()
+
+    scorer = QualityScorer()
+    for path in args.packages:
+        with open(path, 'r') as f:
+            package = json.load(f)
+        quality = scorer.score(package["concept"], package["structure"])
+        print(f"\n📊 {package['concept'].get('name', path)}: {quality['total_score']} "
+              f"(design {quality['design_score']}, functionality {quality['functionality_score']}, "
+              f"completeness {quality['completeness_score']})")
+        print(f"   {'✓ passes' if quality['passes_threshold'] else '⚠ below threshold'} - {quality['feedback']}")
@@ -0,0 +1,202 @@
+"""
+Rate Limiter - Process-wide token buckets for Anthropic requests and tokens per minute
+Adapts its limits (AIMD) to 429s and the API's rate-limit response headers
+"""
+
+import os
+import time
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+DEFAULT_RPM = int(os.environ.get("AI_FACTORY_RPM", "50"))
+DEFAULT_TPM = int(os.environ.get("AI_FACTORY_TPM", "80000"))
+
+# AIMD tuning: grow by 5% of the ceiling per success, halve on every 429
+ADDITIVE_STEP = 0.05
+MULTIPLICATIVE_DECREASE = 0.5
+MIN_FRACTION = 0.05
+DEFAULT_RETRY_AFTER = 5.0
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `per_minute` / 60 per second"""
+
+    def __init__(self, per_minute):
+        self.per_minute = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        self.tokens = min(self.per_minute, self.tokens + elapsed * self.per_minute / 60.0)
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` is available (0 if it is available now)"""
+        self._refill(now)
+        # Requests bigger than the whole bucket only need a full bucket
+        needed = min(amount, self.per_minute)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) * 60.0 / self.per_minute
+
+    def take(self, amount):
+        self.tokens -= amount
+
+    def resize(self, per_minute):
+        self.per_minute = float(per_minute)
+        self.tokens = min(self.tokens, self.per_minute)
+
+
+def _header(headers, name):
+    value = headers.get(name) if headers is not None else None
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _retry_after(headers):
+    """Seconds to pause after a 429, from retry-after or the *-reset timestamps"""
+    seconds = _header(headers, "retry-after")
+    if seconds is not None:
+        return seconds
+
+    for name in ("anthropic-ratelimit-requests-reset", "anthropic-ratelimit-tokens-reset"):
+        reset = headers.get(name) if headers is not None else None
+        if reset:
+            try:
+                reset_at = datetime.fromisoformat(reset.replace("Z", "+00:00"))
+            except ValueError:
+                continue
+            return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+
+    return DEFAULT_RETRY_AFTER
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter shared by every engine
+
+    acquire()/acquire_async() block until both buckets allow the call. After
+    each response the caller reports back with on_success() or
+    on_rate_limited(); limits then grow additively towards the account
+    ceiling and are halved on a 429 (AIMD).
+    """
+
+    def __init__(self, requests_per_minute=DEFAULT_RPM, tokens_per_minute=DEFAULT_TPM):
+        self.rpm_ceiling = float(requests_per_minute)
+        self.tpm_ceiling = float(tokens_per_minute)
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.paused_until = 0.0
+        self.stats = {"requests": 0, "throttled_seconds": 0.0, "rate_limited": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def rpm(self):
+        return self.requests.per_minute
+
+    @property
+    def tpm(self):
+        return self.tokens.per_minute
+
+    def _reserve(self, estimated_tokens):
+        """Take capacity if available; otherwise return how long to wait"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self.paused_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(estimated_tokens, now),
+            )
+            if wait <= 0:
+                self.requests.take(1)
+                self.tokens.take(estimated_tokens)
+                self.stats["requests"] += 1
+                return 0.0
+            return wait
+
+    def _record_throttled(self, seconds):
+        with self._lock:
+            self.stats["throttled_seconds"] += seconds
+
+    def acquire(self, estimated_tokens=0):
+        """Block until a request of roughly `estimated_tokens` may be sent"""
+        while True:
+            wait = self._reserve(estimated_tokens)
+            if wait <= 0:
+                return
+            # Count the time actually slept - a re-poll after waking must not count the same wait again
+            started = time.monotonic()
+            time.sleep(wait)
+            self._record_throttled(time.monotonic() - started)
+
+    async def acquire_async(self, estimated_tokens=0):
+        """Async variant of acquire"""
+        while True:
+            wait = self._reserve(estimated_tokens)
+            if wait <= 0:
+                return
+            started = time.monotonic()
+            await asyncio.sleep(wait)
+            self._record_throttled(time.monotonic() - started)
+
+    def record_usage(self, actual_tokens, estimated_tokens):
+        """Charge (or refund) the difference between the estimate and real usage"""
+        with self._lock:
+            self.tokens.take(actual_tokens - estimated_tokens)
+
+    def on_success(self, headers=None):
+        """Additive increase, bounded by the limits the API reports"""
+        with self._lock:
+            rpm_limit = _header(headers, "anthropic-ratelimit-requests-limit")
+            tpm_limit = _header(headers, "anthropic-ratelimit-tokens-limit")
+            if rpm_limit:
+                self.rpm_ceiling = rpm_limit
+            if tpm_limit:
+                self.tpm_ceiling = tpm_limit
+
+            self.requests.resize(min(self.rpm_ceiling, self.rpm + self.rpm_ceiling * ADDITIVE_STEP))
+            self.tokens.resize(min(self.tpm_ceiling, self.tpm + self.tpm_ceiling * ADDITIVE_STEP))
+
+            # Never believe we have more headroom than the server says we do
+            remaining_requests = _header(headers, "anthropic-ratelimit-requests-remaining")
+            remaining_tokens = _header(headers, "anthropic-ratelimit-tokens-remaining")
+            if remaining_requests is not None:
+                self.requests.tokens = min(self.requests.tokens, remaining_requests)
+            if remaining_tokens is not None:
+                self.tokens.tokens = min(self.tokens.tokens, remaining_tokens)
+
+    def on_rate_limited(self, headers=None):
+        """Multiplicative decrease and a pause until the server's retry-after; returns the pause"""
+        pause = _retry_after(headers)
+        with self._lock:
+            self.stats["rate_limited"] += 1
+            self.requests.resize(max(self.rpm_ceiling * MIN_FRACTION, self.rpm * MULTIPLICATIVE_DECREASE))
+            self.tokens.resize(max(self.tpm_ceiling * MIN_FRACTION, self.tpm * MULTIPLICATIVE_DECREASE))
+            self.requests.tokens = 0.0
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+        return pause
+
+    def summary(self):
+        """One-line report for end-of-run output"""
+        return (f"Rate limiter: {self.stats['requests']} requests, "
+                f"{self.stats['rate_limited']} rate-limited, "
+                f"{self.stats['throttled_seconds']:.1f}s throttled, "
+                f"now {self.rpm:.0f} RPM / {self.tpm:.0f} TPM")
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """The process-wide limiter used by every engine"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
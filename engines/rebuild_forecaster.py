@@ -4,16 +4,39 @@ Simple, clean, professional - no bullshit
 """
 
 import os
+import argparse
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
-from datetime import datetime, timedelta
-import calendar
+from xlsx_styles import StyleRegistry, SheetWriter, month_label, CURRENCY, PERCENT
+from build_cache import BuildCache
+from formula_eval import verify_build
+from datetime import datetime
+
+# (label, default monthly amount) for each expense line
+DEFAULT_EXPENSE_LINES = [
+    ('Salary & Payroll', 12000),
+    ('Rent & Facilities', 3000),
+    ('Marketing & Sales', 2500),
+    ('Software & Tools', 800),
+    ('Other Operating Expenses', 1700),
+]
 
 class CashFlowForecaster:
-    def __init__(self):
-        self.wb = Workbook()
-        self.wb.remove(self.wb.active)
+    def __init__(self, months=12, expense_lines=None, write_only=False, currency=CURRENCY, verify=None):
+        self.currency = currency
+        self.months = months
+        self.expense_lines = expense_lines or DEFAULT_EXPENSE_LINES
+        self.last_col = get_column_letter(months + 2)
+        self.forecast_sheet = f"{months}-Month Forecast"
+        self.input_rows = {}
+        self.forecast_rows = {}
+        
+        self.write_only = write_only
+        # The formula check holds every formula in memory, so write-only builds opt in to it
+        self.verify = not write_only if verify is None else verify
+        self.wb = Workbook(write_only=write_only)
+        if not write_only:
+            self.wb.remove(self.wb.active)
         
         # Professional colors - blues and grays only
         self.colors = {
@@ -24,262 +47,173 @@ class CashFlowForecaster:
             'warning': 'F59E0B',       # Orange
             'input': 'FEF3C7',         # Light yellow
             'light_bg': 'F3F4F6',      # Light gray
+            'white': 'FFFFFF',
         }
+        self.styles = StyleRegistry(self.wb, self.colors)
+        self.define_styles()
+    
+    def define_styles(self):
+        """Register every cell style the sheets use, once per workbook"""
+        define = self.styles.define
+        define('Banner', size=16, bold=True, color='white', fill='header')
+        define('Dashboard Banner', size=18, bold=True, color='white', fill='header')
+        define('Sheet Title', size=16, bold=True, color='header')
+        define('Caption', size=10, italic=True)
+        define('Section', size=12, bold=True, color='header')
+        define('Group', bold=True, color='header')
+        define('Revenue Label', size=12, bold=True, color='positive')
+        define('Expenses Label', size=12, bold=True, color='negative')
+        define('Row Heading', size=12, bold=True)
+        define('Table Header', bold=True, color='white', fill='subheader', horizontal='center')
+        define('Bold', bold=True)
+        define('Strong', size=11, bold=True)
+        define('Currency', number_format=self.currency)
+        define('Currency Strong', size=11, bold=True, number_format=self.currency)
+        define('Months Strong', size=11, bold=True, number_format='0.0')
+        define('Total', bold=True, fill='light_bg', number_format=self.currency)
+        define('Balance', size=11, bold=True, fill='light_bg', number_format=self.currency)
+        define('Input Currency', bold=True, fill='input', number_format=self.currency)
+        define('Input Percent', bold=True, fill='input', number_format=PERCENT)
         
     def create_inputs(self):
         """Simple inputs sheet"""
         ws = self.wb.create_sheet("Inputs", 0)
+        sheet = SheetWriter(ws, self.styles, {'A': 30, 'B': 18})
         
         # Title
-        ws['A1'] = 'BUSINESS INPUTS'
-        ws['A1'].font = Font(size=16, bold=True, color='FFFFFF')
-        ws['A1'].fill = PatternFill(start_color=self.colors['header'], fill_type='solid')
-        ws.merge_cells('A1:C1')
-        ws.row_dimensions[1].height = 30
-        
-        ws['A2'] = 'Enter your data in the YELLOW cells below'
-        ws['A2'].font = Font(size=10, italic=True)
-        ws.merge_cells('A2:C2')
+        sheet.append(('BUSINESS INPUTS', 'Banner'), height=30)
+        sheet.merge('A1:C1')
+        sheet.append(('Enter your data in the YELLOW cells below', 'Caption'))
+        sheet.merge('A2:C2')
+        sheet.append(('Description', 'Bold'), ('Amount', 'Bold'))
         
         # Inputs
-        row = 4
         inputs = [
-            ('Starting Cash', 50000, '$'),
-            ('', '', ''),
-            ('MONTHLY REVENUE', '', ''),
-            ('Current Monthly Revenue', 25000, '$'),
-            ('Revenue Growth % (monthly)', 0.05, '%'),
-            ('', '', ''),
-            ('MONTHLY EXPENSES', '', ''),
-            ('Salary & Payroll', 12000, '$'),
-            ('Rent & Facilities', 3000, '$'),
-            ('Marketing & Sales', 2500, '$'),
-            ('Software & Tools', 800, '$'),
-            ('Other Operating Expenses', 1700, '$'),
+            ('start', 'Starting Cash', 50000, '$'),
+            (None, '', '', ''),
+            (None, 'MONTHLY REVENUE', '', ''),
+            ('revenue', 'Current Monthly Revenue', 25000, '$'),
+            ('growth', 'Revenue Growth % (monthly)', 0.05, '%'),
+            (None, '', '', ''),
+            (None, 'MONTHLY EXPENSES', '', ''),
         ]
+        inputs += [(f'expense_{index}', label, amount, '$') for index, (label, amount) in enumerate(self.expense_lines)]
         
-        ws['A3'] = 'Description'
-        ws['B3'] = 'Amount'
-        ws['A3'].font = Font(bold=True)
-        ws['B3'].font = Font(bold=True)
-        
-        for desc, value, fmt in inputs:
+        for key, desc, value, fmt in inputs:
             if desc == '':
-                row += 1
-                continue
-                
-            ws[f'A{row}'] = desc
-            
-            if value != '':
-                ws[f'B{row}'] = value
-                ws[f'B{row}'].fill = PatternFill(start_color=self.colors['input'], fill_type='solid')
-                ws[f'B{row}'].font = Font(bold=True)
-                
-                if fmt == '$':
-                    ws[f'B{row}'].number_format = '$#,##0'
-                elif fmt == '%':
-                    ws[f'B{row}'].number_format = '0.0%'
+                sheet.skip()
+            elif value == '':
+                sheet.append((desc, 'Group'))
             else:
-                ws[f'A{row}'].font = Font(bold=True, color='1E40AF')
-            
-            row += 1
-        
-        ws.column_dimensions['A'].width = 30
-        ws.column_dimensions['B'].width = 18
+                self.input_rows[key] = sheet.append(desc, (value, 'Input Percent' if fmt == '%' else 'Input Currency'))
         
         print("  ✓ Inputs created")
         
     def create_projection(self):
-        """12-month projection - ONE clean table"""
-        ws = self.wb.create_sheet("12-Month Forecast", 1)
+        """Monthly projection - ONE clean table"""
+        ws = self.wb.create_sheet(self.forecast_sheet, 1)
+        widths = {'A': 22, 'B': 12}
+        widths.update({get_column_letter(i + 3): 11 for i in range(self.months)})
+        sheet = SheetWriter(ws, self.styles, widths)
+        
+        inputs = {key: f'Inputs!$B${row}' for key, row in self.input_rows.items()}
+        cols = [get_column_letter(i + 3) for i in range(self.months)]
+        rows = self.forecast_rows
+        
+        def month_row(label, formula, style='Currency', label_style=None):
+            """One row with a value per month; formula(i, col) gives each cell"""
+            label_cell = (label, label_style) if label_style else label
+            return sheet.append(label_cell, None, *[(formula(i, col), style) for i, col in enumerate(cols)])
         
         # Title
-        ws['A1'] = '12-MONTH CASH FLOW FORECAST'
-        ws['A1'].font = Font(size=16, bold=True, color='FFFFFF')
-        ws['A1'].fill = PatternFill(start_color=self.colors['header'], fill_type='solid')
-        ws.merge_cells('A1:N1')
-        ws.row_dimensions[1].height = 30
+        sheet.append((f'{self.months}-MONTH CASH FLOW FORECAST', 'Banner'), height=30)
+        sheet.merge(f'A1:{self.last_col}1')
+        sheet.skip()
         
         # Month headers
-        row = 3
-        ws['A3'] = ''
-        ws['B3'] = 'Starting'
-        
         start_date = datetime.now().replace(day=1)
-        for i in range(12):
-            month_date = start_date + timedelta(days=30*i)
-            col = get_column_letter(i + 3)
-            ws[f'{col}{row}'] = month_date.strftime('%b %y')
-            ws[f'{col}{row}'].font = Font(bold=True, color='FFFFFF')
-            ws[f'{col}{row}'].fill = PatternFill(start_color=self.colors['subheader'], fill_type='solid')
-            ws[f'{col}{row}'].alignment = Alignment(horizontal='center')
+        sheet.append('', 'Starting', *[(month_label(start_date, i, '%b %y'), 'Table Header') for i in range(self.months)])
+        sheet.skip()
         
         # REVENUE
-        row = 5
-        ws[f'A{row}'] = 'REVENUE'
-        ws[f'A{row}'].font = Font(size=12, bold=True, color='10B981')
-        
-        row += 1
-        ws[f'A{row}'] = 'Monthly Revenue'
-        for i in range(12):
-            col = get_column_letter(i + 3)
-            if i == 0:
-                ws[f'{col}{row}'] = '=Inputs!$B$5'
-            else:
-                prev_col = get_column_letter(i + 2)
-                ws[f'{col}{row}'] = f'={prev_col}{row}*(1+Inputs!$B$6)'
-            ws[f'{col}{row}'].number_format = '$#,##0'
-        
-        row += 1
-        ws[f'A{row}'] = 'Total Revenue'
-        ws[f'A{row}'].font = Font(bold=True)
-        for i in range(12):
-            col = get_column_letter(i + 3)
-            ws[f'{col}{row}'] = f'={col}{row-1}'
-            ws[f'{col}{row}'].number_format = '$#,##0'
-            ws[f'{col}{row}'].font = Font(bold=True)
-            ws[f'{col}{row}'].fill = PatternFill(start_color=self.colors['light_bg'], fill_type='solid')
+        sheet.append(('REVENUE', 'Revenue Label'))
+        revenue_row = sheet.row + 1
+        month_row('Monthly Revenue', lambda i, col: f'={inputs["revenue"]}' if i == 0 else
+                  f'={get_column_letter(i + 2)}{revenue_row}*(1+{inputs["growth"]})')
+        rows['revenue'] = month_row('Total Revenue', lambda i, col: f'={col}{revenue_row}', 'Total', 'Bold')
         
         # EXPENSES
-        row += 2
-        ws[f'A{row}'] = 'EXPENSES'
-        ws[f'A{row}'].font = Font(size=12, bold=True, color='EF4444')
-        
-        expense_rows = [
-            ('Salary & Payroll', 'Inputs!$B$9'),
-            ('Rent & Facilities', 'Inputs!$B$10'),
-            ('Marketing & Sales', 'Inputs!$B$11'),
-            ('Software & Tools', 'Inputs!$B$12'),
-            ('Other Operating', 'Inputs!$B$13'),
-        ]
+        sheet.skip()
+        sheet.append(('EXPENSES', 'Expenses Label'))
         
-        for expense_name, cell_ref in expense_rows:
-            row += 1
-            ws[f'A{row}'] = expense_name
-            for i in range(12):
-                col = get_column_letter(i + 3)
-                ws[f'{col}{row}'] = f'={cell_ref}'
-                ws[f'{col}{row}'].number_format = '$#,##0'
-        
-        row += 1
-        ws[f'A{row}'] = 'Total Expenses'
-        ws[f'A{row}'].font = Font(bold=True)
-        for i in range(12):
-            col = get_column_letter(i + 3)
-            # Sum all expense rows
-            start_row = row - 5
-            end_row = row - 1
-            ws[f'{col}{row}'] = f'=SUM({col}{start_row}:{col}{end_row})'
-            ws[f'{col}{row}'].number_format = '$#,##0'
-            ws[f'{col}{row}'].font = Font(bold=True)
-            ws[f'{col}{row}'].fill = PatternFill(start_color=self.colors['light_bg'], fill_type='solid')
+        first_expense = sheet.row + 1
+        for index, (expense_name, amount) in enumerate(self.expense_lines):
+            cell_ref = inputs[f'expense_{index}']
+            month_row(expense_name, lambda i, col: f'={cell_ref}')
+        
+        # Sum all expense rows
+        rows['expenses'] = month_row('Total Expenses', lambda i, col: f'=SUM({col}{first_expense}:{col}{sheet.row})',
+                                     'Total', 'Bold')
         
         # NET CASH FLOW
-        row += 2
-        ws[f'A{row}'] = 'NET CASH FLOW'
-        ws[f'A{row}'].font = Font(size=12, bold=True)
-        revenue_row = 7
-        expenses_row = row - 1
-        
-        for i in range(12):
-            col = get_column_letter(i + 3)
-            ws[f'{col}{row}'] = f'={col}{revenue_row}-{col}{expenses_row}'
-            ws[f'{col}{row}'].number_format = '$#,##0'
-            ws[f'{col}{row}'].font = Font(bold=True, size=11)
+        sheet.skip()
+        rows['net'] = month_row('NET CASH FLOW', lambda i, col: f'={col}{rows["revenue"]}-{col}{rows["expenses"]}',
+                                'Currency Strong', 'Row Heading')
         
         # ENDING CASH BALANCE
-        row += 1
-        ws[f'A{row}'] = 'ENDING CASH BALANCE'
-        ws[f'A{row}'].font = Font(size=12, bold=True)
-        
-        ws[f'B{row}'] = '=Inputs!$B$4'
-        ws[f'B{row}'].number_format = '$#,##0'
-        ws[f'B{row}'].font = Font(bold=True, size=11)
-        
-        net_flow_row = row - 1
-        for i in range(12):
-            col = get_column_letter(i + 3)
-            prev_col = get_column_letter(i + 2)
-            ws[f'{col}{row}'] = f'={prev_col}{row}+{col}{net_flow_row}'
-            ws[f'{col}{row}'].number_format = '$#,##0'
-            ws[f'{col}{row}'].font = Font(bold=True, size=11)
-            ws[f'{col}{row}'].fill = PatternFill(start_color=self.colors['light_bg'], fill_type='solid')
-        
-        # Column widths
-        ws.column_dimensions['A'].width = 22
-        ws.column_dimensions['B'].width = 12
-        for i in range(12):
-            col = get_column_letter(i + 3)
-            ws.column_dimensions[col].width = 11
-        
-        print("  ✓ 12-Month Forecast created")
+        rows['ending'] = sheet.row + 1
+        sheet.append(('ENDING CASH BALANCE', 'Row Heading'), (f'={inputs["start"]}', 'Currency Strong'),
+                     *[(f'={get_column_letter(i + 2)}{rows["ending"]}+{col}{rows["net"]}', 'Balance')
+                       for i, col in enumerate(cols)])
+        
+        print(f"  ✓ {self.forecast_sheet} created")
         
     def create_dashboard(self):
         """Simple dashboard summary"""
         ws = self.wb.create_sheet("Dashboard", 2)
+        sheet = SheetWriter(ws, self.styles, {'A': 30, 'B': 20})
+        forecast = f"'{self.forecast_sheet}'"
+        rows = self.forecast_rows
         
         # Title
-        ws['A1'] = 'CASH FLOW DASHBOARD'
-        ws['A1'].font = Font(size=18, bold=True, color='FFFFFF')
-        ws['A1'].fill = PatternFill(start_color=self.colors['header'], fill_type='solid')
-        ws.merge_cells('A1:D1')
-        ws.row_dimensions[1].height = 35
-        
-        ws['A2'] = 'Executive Summary'
-        ws['A2'].font = Font(size=10, italic=True)
-        ws.merge_cells('A2:D2')
+        sheet.append(('CASH FLOW DASHBOARD', 'Dashboard Banner'), height=35)
+        sheet.merge('A1:D1')
+        sheet.append(('Executive Summary', 'Caption'))
+        sheet.merge('A2:D2')
+        sheet.skip()
         
         # Key metrics
-        row = 4
-        ws['A4'] = 'Metric'
-        ws['B4'] = 'Value'
-        ws['A4'].font = Font(bold=True)
-        ws['B4'].font = Font(bold=True)
+        sheet.append(('Metric', 'Bold'), ('Value', 'Bold'))
         
-        row = 5
+        first = sheet.row + 1
+        start, revenue, expenses, net, ending, lowest = range(first, first + 6)
         metrics = [
-            ('Starting Cash', '=Inputs!B4'),
-            ('Total Revenue (12 months)', '=SUM(\'12-Month Forecast\'!C7:N7)'),
-            ('Total Expenses (12 months)', '=SUM(\'12-Month Forecast\'!C14:N14)'),
-            ('Net Cash Flow (12 months)', '=B6-B7'),
-            ('Ending Cash Balance', '=\'12-Month Forecast\'!N18'),
-            ('Lowest Cash Point', '=MIN(\'12-Month Forecast\'!C18:N18)'),
+            ('Starting Cash', f'=Inputs!B{self.input_rows["start"]}'),
+            (f'Total Revenue ({self.months} months)', f'=SUM({forecast}!C{rows["revenue"]}:{self.last_col}{rows["revenue"]})'),
+            (f'Total Expenses ({self.months} months)', f'=SUM({forecast}!C{rows["expenses"]}:{self.last_col}{rows["expenses"]})'),
+            (f'Net Cash Flow ({self.months} months)', f'=B{revenue}-B{expenses}'),
+            ('Ending Cash Balance', f'={forecast}!{self.last_col}{rows["ending"]}'),
+            ('Lowest Cash Point', f'=MIN({forecast}!C{rows["ending"]}:{self.last_col}{rows["ending"]})'),
         ]
         
         for metric, formula in metrics:
-            ws[f'A{row}'] = metric
-            ws[f'B{row}'] = formula
-            ws[f'B{row}'].number_format = '$#,##0'
-            ws[f'B{row}'].font = Font(bold=True, size=11)
-            row += 1
+            sheet.append(metric, (formula, 'Currency Strong'))
         
         # Status check
-        row += 2
-        ws[f'A{row}'] = 'CASH HEALTH CHECK'
-        ws[f'A{row}'].font = Font(size=12, bold=True, color='1E40AF')
-        
-        row += 1
-        ws[f'A{row}'] = 'Status:'
-        ws[f'B{row}'] = '=IF(B9>B4*0.5,"✅ Healthy","⚠️ Monitor Closely")'
-        ws[f'B{row}'].font = Font(bold=True, size=11)
-        
-        row += 1
-        ws[f'A{row}'] = 'Runway (months):'
-        ws[f'B{row}'] = '=B9/(B7/12)'
-        ws[f'B{row}'].number_format = '0.0'
-        ws[f'B{row}'].font = Font(bold=True, size=11)
-        
-        ws.column_dimensions['A'].width = 30
-        ws.column_dimensions['B'].width = 20
+        sheet.skip(2)
+        sheet.append(('CASH HEALTH CHECK', 'Section'))
+        sheet.append('Status:', (f'=IF(B{ending}>B{start}*0.5,"✅ Healthy","⚠️ Monitor Closely")', 'Strong'))
+        sheet.append('Runway (months):', (f'=B{ending}/(B{expenses}/{self.months})', 'Months Strong'))
         
         print("  ✓ Dashboard created")
         
     def create_instructions(self):
         """Simple instructions"""
         ws = self.wb.create_sheet("How to Use", 3)
+        sheet = SheetWriter(ws, self.styles, {'A': 70})
         
-        ws['A1'] = 'HOW TO USE THIS FORECASTER'
-        ws['A1'].font = Font(size=16, bold=True, color='1E40AF')
+        sheet.append(('HOW TO USE THIS FORECASTER', 'Sheet Title'))
+        sheet.skip()
         
         instructions = [
             '',
@@ -289,8 +223,8 @@ class CashFlowForecaster:
             '→ Starting cash, revenue, expenses',
             '',
             'STEP 2: Review Forecast',
-            '→ Go to "12-Month Forecast" sheet',
-            '→ See your cash position for next 12 months',
+            f'→ Go to "{self.forecast_sheet}" sheet',
+            f'→ See your cash position for next {self.months} months',
             '→ Check ending cash balance',
             '',
             'STEP 3: Check Dashboard',
@@ -299,7 +233,7 @@ class CashFlowForecaster:
             '→ Check cash health status',
             '',
             'KEY INSIGHTS:',
-            '→ Ending Cash Balance: How much cash you\'ll have in 12 months',
+            f'→ Ending Cash Balance: How much cash you\'ll have in {self.months} months',
             '→ Lowest Cash Point: Your minimum cash position (watch this!)',
             '→ Runway: How many months until you run out (if growth stops)',
             '',
@@ -312,19 +246,33 @@ class CashFlowForecaster:
             'Questions? Email: support@yoursite.com',
         ]
         
-        row = 3
         for text in instructions:
-            ws[f'A{row}'] = text
-            if text.startswith('STEP') or text.startswith('KEY'):
-                ws[f'A{row}'].font = Font(bold=True, size=11)
-            row += 1
-        
-        ws.column_dimensions['A'].width = 70
+            sheet.append((text, 'Strong') if text.startswith('STEP') or text.startswith('KEY') else text)
         
         print("  ✓ Instructions created")
         
-    def build(self):
-        """Build the complete forecaster"""
+    def build_params(self):
+        """Constructor parameters that shape the workbook (part of the build cache key)"""
+        return {
+            'months': self.months,
+            'expense_lines': self.expense_lines,
+            'write_only': self.write_only,
+            'currency': self.currency,
+            'verify': self.verify,
+            # Month headers start at the build month
+            'start_month': datetime.now().strftime('%Y-%m'),
+        }
+    
+    def build(self, output_dir=None, force=False):
+        """Build the complete forecaster (skipped if nothing changed since the last build, unless force=True)"""
+        output_dir = output_dir or "/home/claude/ai-factory/products/cash_flow_forecaster_pro/built"
+        output_path = f"{output_dir}/cash-flow-forecaster-v2.xlsx"
+        cache = BuildCache(output_dir, type(self).__name__, [__file__], params=self.build_params())
+        
+        if not force and cache.is_fresh(output_path):
+            print(f"\n⏭️  Up to date: {output_path} (inputs unchanged - use --force to rebuild)")
+            return output_path
+        
         print("\n🏗️  Building Cash Flow Forecaster (CLEAN VERSION)")
         print("="*60)
         
@@ -334,17 +282,18 @@ class CashFlowForecaster:
         self.create_instructions()
         
         # Save
-        output_dir = "/home/claude/ai-factory/products/cash_flow_forecaster_pro/built"
         os.makedirs(output_dir, exist_ok=True)
-        
-        output_path = f"{output_dir}/cash-flow-forecaster-v2.xlsx"
         self.wb.save(output_path)
+        if self.verify:
+            # Computes every formula and stores the values, so previews show numbers
+            verify_build(output_path)
+        cache.record(output_path)
         
         print("\n" + "="*60)
         print("✅ CLEAN VERSION COMPLETE")
         print("="*60)
         print(f"File: {output_path}")
-        print(f"Sheets: 4 (Inputs, 12-Month Forecast, Dashboard, How to Use)")
+        print(f"Sheets: 4 (Inputs, {self.forecast_sheet}, Dashboard, How to Use)")
         print(f"Structure: SIMPLE and CLEAN")
         print(f"Ready to review")
         print("="*60 + "\n")
@@ -352,5 +301,13 @@ class CashFlowForecaster:
         return output_path
 
 if __name__ == "__main__":
-    forecaster = CashFlowForecaster()
-    forecaster.build()
+    parser = argparse.ArgumentParser(description="Build the clean Cash Flow Forecaster workbook")
+    parser.add_argument("--months", type=int, default=12, help="Forecast horizon in months (default 12)")
+    parser.add_argument("--write-only", action="store_true", help="Stream rows to disk (flat memory for long horizons)")
+    parser.add_argument("--verify", action="store_true",
+                        help="Check the formulas and store their values even with --write-only")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the inputs haven't changed")
+    args = parser.parse_args()
+    
+    forecaster = CashFlowForecaster(months=args.months, write_only=args.write_only, verify=args.verify or None)
+    forecaster.build(force=args.force)
@@ -0,0 +1,122 @@
+"""
+Startup Report - Where a factory command's start-up time goes
+Times factory commands end to end against a bare interpreter, reruns them under
+python -X importtime and lists the imports the factory added, so read-only
+commands stay within the startup budget and never load the heavy SDKs
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+FACTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "factory.py")
+
+# Commands that only read stored results; none of them should load an engine
+READ_ONLY_COMMANDS = ["status", "opportunities", "stats"]
+
+STARTUP_BUDGET_MS = 100
+
+# Packages that cost 100 ms - 2 s to import; only the commands that use them may load them
+HEAVY_PACKAGES = ("anthropic", "httpx", "requests", "bs4", "openpyxl", "numpy", "pandas", "streamlit")
+
+
+def parse_importtime(stderr):
+    """(self_us, cumulative_us, depth, module) for each line of -X importtime output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        module = name.lstrip()
+        imports.append((int(self_us), int(cumulative_us), (len(name) - len(module) - 1) // 2, module))
+    return imports
+
+
+def _best_of(args, runs):
+    """Fastest wall time in ms over `runs` runs (the least disturbed by everything else on the machine)"""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - started) * 1000)
+    return min(times)
+
+
+def _imports(args):
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True)
+    return parse_importtime(result.stderr)
+
+
+def measure(command, runs=5, baseline=None):
+    """Wall time and factory imports of `python factory.py <command>`
+
+    `baseline` is measure_interpreter()'s result; modules the bare
+    interpreter already imports (site-packages .pth hooks and the like)
+    are not charged to the factory.
+    """
+    baseline = baseline or measure_interpreter(runs)
+    imports = [entry for entry in _imports([FACTORY, *command]) if entry[3] not in baseline['modules']]
+    roots = sorted((entry for entry in imports if entry[2] == 0), key=lambda entry: entry[1], reverse=True)
+    wall_ms = _best_of([sys.executable, FACTORY, *command], runs)
+
+    return {
+        'command': " ".join(command),
+        'wall_ms': wall_ms,
+        'interpreter_ms': baseline['wall_ms'],
+        'factory_ms': max(0.0, wall_ms - baseline['wall_ms']),
+        'modules': len(imports),
+        'import_ms': sum(entry[1] for entry in roots) / 1000,
+        'slowest': [(module, cumulative / 1000) for _, cumulative, _, module in roots[:5]],
+        'heavy': sorted({module.split(".")[0] for *_, module in imports
+                         if module.split(".")[0] in HEAVY_PACKAGES}),
+    }
+
+
+def measure_interpreter(runs=5):
+    """Wall time and imported modules of an interpreter that does nothing"""
+    return {
+        'wall_ms': _best_of([sys.executable, "-c", "pass"], runs),
+        'modules': {entry[3] for entry in _imports(["-c", "pass"])},
+    }
+
+
+def startup_report(commands=None, runs=5, budget_ms=STARTUP_BUDGET_MS):
+    """Print the startup report for each command; returns True if all of them are within the budget"""
+    commands = commands or [[command] for command in READ_ONLY_COMMANDS]
+    baseline = measure_interpreter(runs)
+
+    print(f"\n⏱️  Startup report (best of {runs}, budget {budget_ms} ms)")
+    print("=" * 60)
+    print(f"Bare interpreter: {baseline['wall_ms']:.0f} ms\n")
+
+    within = True
+    for command in commands:
+        result = measure(command, runs, baseline)
+        ok = result['wall_ms'] < budget_ms and not result['heavy']
+        within = within and ok
+        print(f"{'✓' if ok else '⚠️ '} factory.py {result['command']}: {result['wall_ms']:.0f} ms "
+              f"(interpreter {result['interpreter_ms']:.0f} ms + factory {result['factory_ms']:.0f} ms)")
+        print(f"   {result['modules']} modules imported in {result['import_ms']:.1f} ms")
+        if result['slowest']:
+            print("   Slowest: " + ", ".join(f"{module} {ms:.1f} ms" for module, ms in result['slowest']))
+        if result['heavy']:
+            print(f"   Heavy packages loaded: {', '.join(result['heavy'])}")
+        print()
+
+    print("=" * 60)
+    print(f"{'✅ Every command starts within' if within else '❌ Over'} the {budget_ms} ms budget\n")
+    return within
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time factory.py commands' start-up and the imports behind it")
+    parser.add_argument("commands", nargs="*", help=f"Commands to measure (default: {', '.join(READ_ONLY_COMMANDS)})")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command; the fastest counts (default 5)")
+    parser.add_argument("--budget", type=int, default=STARTUP_BUDGET_MS,
+                        help=f"Startup budget in ms (default {STARTUP_BUDGET_MS})")
+    args = parser.parse_args()
+
+    commands = [command.split() for command in args.commands]
+    sys.exit(0 if startup_report(commands, args.runs, args.budget) else 1)
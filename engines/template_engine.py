@@ -5,34 +5,51 @@ Reads TEMPLATE_BUILDER_AGENT.md and executes the template creation workflow
 
 import os
 import json
-import anthropic
+import time
+import argparse
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from llm import LazyClient, create_message, prompt_cache_summary
+from agent_docs import load_agent_doc, agent_system
+from llm_cache import ResponseCache
+from batch_runner import BatchRunner, BatchRequestError
+from rate_limiter import get_rate_limiter
+from quality_scorer import QualityScorer, is_borderline
 
-# Initialize Anthropic client
-import os
-client = anthropic.Anthropic(
-    api_key=os.environ.get("ANTHROPIC_API_KEY")
-)
+# Anthropic client, built on the first API call (cache hits never build it)
+client = LazyClient()
+
+PENDING_DIR = "/home/claude/ai-factory/products/financial-templates/pending"
+
+CATEGORIES = [
+    "Financial Dashboards",
+    "Forecasting & Planning", 
+    "Pitch & Reporting"
+]
+
+AGENT_DOC = "TEMPLATE_BUILDER_AGENT.md"
+
+# Templates in flight at once; each worker runs concept -> structure -> quality for one template
+DEFAULT_WORKERS = 4
 
 class TemplateBuilder:
-    def __init__(self):
+    def __init__(self, use_cache=True, llm_review=True):
+        self.cache = ResponseCache("template", enabled=use_cache)
+        self.scorer = QualityScorer()
+        self.llm_review = llm_review  # LLM second opinion for scores near the threshold
         self.agent_instructions = self.load_agent_instructions()
         self.templates_created = []
+        self.batch_failures = {}
         
     def load_agent_instructions(self):
         """Load the TEMPLATE_BUILDER_AGENT.md file"""
-        agent_path = "/home/claude/ai-factory/agents/TEMPLATE_BUILDER_AGENT.md"
-        with open(agent_path, 'r') as f:
-            return f.read()
+        return load_agent_doc(AGENT_DOC)
     
-    def generate_template_concept(self, category="Financial Dashboards"):
-        """Use Claude to generate a template concept based on agent instructions"""
-        
-        prompt = f"""Based on these instructions:
-
-{self.agent_instructions}
-
-Generate a detailed template concept for category: {category}
+    def _concept_request(self, category):
+        # The agent instructions go in a cached system prompt, so every concept
+        # after the first reads them from the prompt cache instead of paying for
+        # them again; only this short request varies per call
+        prompt = f"""Following your template builder instructions, generate a detailed template concept for category: {category}
 
 Return a JSON object with:
 {{
@@ -52,12 +69,14 @@ Return a JSON object with:
 
 Focus on high-demand templates that will sell well."""
 
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
+        return {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 2000,
+            "system": agent_system(AGENT_DOC),
+            "messages": [{"role": "user", "content": prompt}],
+        }
+    
+    def _parse_concept(self, message):
         # Extract JSON from response
         response_text = message.content[0].text
         
@@ -71,9 +90,15 @@ Focus on high-demand templates that will sell well."""
         
         return json.loads(json_text)
     
-    def create_template_structure(self, concept):
-        """Generate the actual template structure (simplified for MVP)"""
-        
+    def generate_template_concept(self, category="Financial Dashboards"):
+        """Use Claude to generate a template concept based on agent instructions"""
+        # Concepts are deliberately uncached: the same category is requested
+        # repeatedly and each call must come back with a fresh idea
+        message = create_message(client, None, label="TemplateBuilder.generate_template_concept",
+                                 **self._concept_request(category))
+        return self._parse_concept(message)
+    
+    def _structure_request(self, concept):
         prompt = f"""Create a professional financial template structure for:
 
 {json.dumps(concept, indent=2)}
@@ -93,17 +118,19 @@ Generate the structure as a detailed specification that includes:
 
 Return as structured text (not actual Excel, we'll build that next)."""
 
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
+        return {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 4000,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+    
+    def create_template_structure(self, concept):
+        """Generate the actual template structure (simplified for MVP)"""
+        message = create_message(client, self.cache, label="TemplateBuilder.create_template_structure",
+                                 **self._structure_request(concept))
         return message.content[0].text
     
-    def quality_check(self, concept, structure):
-        """Score the template against quality checklist"""
-        
+    def _quality_request(self, concept, structure):
         prompt = f"""Score this template concept and structure against the quality checklist:
 
 CONCEPT:
@@ -129,12 +156,13 @@ Return JSON:
 
 Threshold is 85/100 to pass."""
 
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=1500,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
+        return {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 1500,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+    
+    def _parse_quality(self, message):
         response_text = message.content[0].text
         if "```json" in response_text:
             json_text = response_text.split("```json")[1].split("```")[0].strip()
@@ -143,13 +171,39 @@ Threshold is 85/100 to pass."""
         
         return json.loads(json_text)
     
-    def generate_template_package(self, concept, structure, quality_score):
+    def _second_opinion(self, rules_score, llm_score):
+        """The LLM grader's verdict for a borderline template, noting what the rules said"""
+        return {
+            **llm_score,
+            "scorer": "llm",
+            "rules_score": rules_score["total_score"],
+            "feedback": f"{llm_score.get('feedback', '')} (rule-based score: {rules_score['total_score']} - "
+                        f"{rules_score['feedback']})",
+        }
+    
+    def quality_check(self, concept, structure):
+        """Score the template against quality checklist
+        
+        Scored locally by the rule-based QualityScorer; only scores within a
+        few points of the threshold go to the LLM grader for a second opinion.
+        """
+        score = self.scorer.score(concept, structure)
+        if not (self.llm_review and is_borderline(score)):
+            return score
+        
+        message = create_message(client, self.cache, label="TemplateBuilder.quality_check",
+                                 **self._quality_request(concept, structure))
+        return self._second_opinion(score, self._parse_quality(message))
+    
+    def generate_template_package(self, concept, structure, quality_score, index=1, category=None):
         """Create the submission package for CEO approval"""
         
         package = {
-            "id": f"template_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            # Index keeps ids unique when several templates finish in the same second
+            "id": f"template_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{index:03d}",
             "created_at": datetime.now().isoformat(),
             "status": "pending_approval",
+            "category": category,
             "concept": concept,
             "structure": structure,
             "quality_score": quality_score,
@@ -157,12 +211,14 @@ Threshold is 85/100 to pass."""
         }
         
         # Save to file for CEO Dashboard to read
-        output_dir = "/home/claude/ai-factory/products/financial-templates/pending"
+        output_dir = PENDING_DIR
         os.makedirs(output_dir, exist_ok=True)
         
         output_path = f"{output_dir}/{package['id']}.json"
-        with open(output_path, 'w') as f:
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, 'w') as f:
             json.dump(package, f, indent=2)
+        os.replace(tmp_path, output_path)
         
         print(f"\n✓ Template package created: {package['id']}")
         print(f"  Quality Score: {quality_score['total_score']}")
@@ -171,59 +227,174 @@ Threshold is 85/100 to pass."""
         
         return package
     
-    def run_template_creation(self, count=3):
-        """Main workflow: Create specified number of templates"""
+    def create_template(self, index, count, category):
+        """Run one template through concept -> structure -> quality check -> package"""
+        tag = f"[{index}/{count}]"
+        print(f"\n{tag} Creating template in category: {category}")
+        
+        # Step 1: Generate concept
+        print(f"  {tag} → Generating concept...")
+        concept = self.generate_template_concept(category)
+        print(f"  {tag} ✓ Concept: {concept['name']}")
+        
+        # Step 2: Create structure
+        print(f"  {tag} → Creating structure...")
+        structure = self.create_template_structure(concept)
+        print(f"  {tag} ✓ Structure created ({len(structure)} characters)")
+        
+        # Step 3: Quality check
+        print(f"  {tag} → Running quality check...")
+        quality_score = self.quality_check(concept, structure)
+        print(f"  {tag} ✓ Quality Score: {quality_score['total_score']} ({quality_score.get('scorer', 'llm')})")
+        
+        # Step 4: Package for approval
+        print(f"  {tag} → Packaging for CEO approval...")
+        package = self.generate_template_package(concept, structure, quality_score, index, category)
+        print(f"\n  {tag} {'✓ READY FOR APPROVAL' if quality_score.get('passes_threshold') else '⚠ NEEDS REVISION'}")
+        
+        return package
+    
+    def run_template_creation(self, count=3, max_workers=DEFAULT_WORKERS):
+        """Main workflow: Create specified number of templates
+        
+        Up to max_workers templates are in flight at once, so while one is in
+        quality check the next is already generating its concept. Packages are
+        written to pending/ as each one completes.
+        """
         
         print(f"\n{'='*60}")
-        print(f"TEMPLATE BUILDER ENGINE - Creating {count} templates")
+        print(f"TEMPLATE BUILDER ENGINE - Creating {count} templates ({max_workers} workers)")
         print(f"{'='*60}\n")
         
-        categories = [
-            "Financial Dashboards",
-            "Forecasting & Planning", 
-            "Pitch & Reporting"
-        ]
-        
+        start_time = time.time()
         results = []
+        failures = []
         
-        for i in range(count):
-            category = categories[i % len(categories)]
-            
-            print(f"\n[{i+1}/{count}] Creating template in category: {category}")
-            print("-" * 60)
-            
-            # Step 1: Generate concept
-            print("  → Generating concept...")
-            concept = self.generate_template_concept(category)
-            print(f"  ✓ Concept: {concept['name']}")
-            
-            # Step 2: Create structure
-            print("  → Creating structure...")
-            structure = self.create_template_structure(concept)
-            print(f"  ✓ Structure created ({len(structure)} characters)")
-            
-            # Step 3: Quality check
-            print("  → Running quality check...")
-            quality_score = self.quality_check(concept, structure)
-            print(f"  ✓ Quality Score: {quality_score['total_score']}")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(self.create_template, i + 1, count, CATEGORIES[i % len(CATEGORIES)]): i + 1
+                for i in range(count)
+            }
             
-            # Step 4: Package for approval
-            print("  → Packaging for CEO approval...")
-            package = self.generate_template_package(concept, structure, quality_score)
-            
-            results.append(package)
-            print(f"\n  {'✓ READY FOR APPROVAL' if quality_score.get('passes_threshold') else '⚠ NEEDS REVISION'}")
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    failures.append(futures[future])
+                    print(f"\n  [{futures[future]}/{count}] ❌ Template failed: {e}")
+        
+        self.print_summary(results, failures, time.time() - start_time)
+        return results
+    
+    def _run_batch_phase(self, name, requests, cache):
+        """Submit one request per template as a single batch; returns {index: message}, recording failures"""
+        runner = BatchRunner(client, cache)
+        for index, params in requests.items():
+            runner.add(f"{name}-{index:03d}", label=f"TemplateBuilder.{name}", **params)
+        
+        print(f"\n→ Batch phase: {name} ({len(requests)} requests)")
+        messages = {}
+        for custom_id, result in runner.run().items():
+            index = int(custom_id.rsplit("-", 1)[1])
+            if isinstance(result, BatchRequestError):
+                self.batch_failures[index] = str(result)
+                print(f"  [{index}] ❌ {result}")
+            else:
+                messages[index] = result
+        return messages
+    
+    def run_batch_creation(self, count=3):
+        """Overnight workflow: the same templates as run_template_creation, via the Message Batches API
+        
+        Each stage depends on the previous one, so all concepts are batched
+        first, then all structures, then the LLM second opinions. Per-template
+        latency goes up (each batch can take hours) but every request is billed
+        at the batch discount and none count against the per-minute limits.
+        """
         
         print(f"\n{'='*60}")
-        print(f"SUMMARY: {count} templates created")
+        print(f"TEMPLATE BUILDER ENGINE - Creating {count} templates (batch mode)")
+        print(f"{'='*60}")
+        
+        start_time = time.time()
+        self.batch_failures = {}
+        
+        def parsed(messages, parse, stage):
+            values = {}
+            for index, message in messages.items():
+                try:
+                    values[index] = parse(message)
+                except (json.JSONDecodeError, IndexError) as e:
+                    self.batch_failures[index] = f"could not parse {stage}: {e}"
+                    print(f"  [{index}] ❌ Could not parse {stage}: {e}")
+            return values
+        
+        # Concepts stay uncached for the same reason as in generate_template_concept
+        concepts = parsed(self._run_batch_phase("generate_template_concept", {
+            i + 1: self._concept_request(CATEGORIES[i % len(CATEGORIES)]) for i in range(count)
+        }, None), self._parse_concept, "concept")
+        
+        structures = {index: message.content[0].text for index, message in self._run_batch_phase(
+            "create_template_structure",
+            {index: self._structure_request(concept) for index, concept in concepts.items()},
+            self.cache,
+        ).items()}
+        
+        # Scored locally; only the borderline templates go to the LLM grader
+        scores = {index: self.scorer.score(concepts[index], structure) for index, structure in structures.items()}
+        borderline = [index for index, score in scores.items() if self.llm_review and is_borderline(score)]
+        if borderline:
+            reviews = parsed(self._run_batch_phase("quality_check", {
+                index: self._quality_request(concepts[index], structures[index]) for index in borderline
+            }, self.cache), self._parse_quality, "quality check")
+            for index, review in reviews.items():
+                scores[index] = self._second_opinion(scores[index], review)
+            for index in set(borderline) - set(reviews):
+                # The second opinion is optional: keep the rule-based score
+                print(f"  [{index}] ⚠ No LLM second opinion ({self.batch_failures.pop(index, 'no result')}), keeping rule-based score")
+        
+        results = [
+            self.generate_template_package(concepts[index], structures[index], scores[index], index,
+                                           CATEGORIES[(index - 1) % len(CATEGORIES)])
+            for index in sorted(scores)
+        ]
+        
+        self.print_summary(results, sorted(self.batch_failures), time.time() - start_time)
+        return results
+    
+    def print_summary(self, results, failures, elapsed):
+        """End-of-run counts, output location and cache/limiter reports"""
+        print(f"\n{'='*60}")
+        print(f"SUMMARY: {len(results)} templates created in {elapsed:.1f} seconds")
         print(f"  Passing quality (≥85): {sum(1 for r in results if r['recommendation'] == 'APPROVE')}")
         print(f"  Needs revision (<85): {sum(1 for r in results if r['recommendation'] == 'REVISE')}")
-        print(f"\nTemplates saved to: /home/claude/ai-factory/products/financial-templates/pending/")
+        if failures:
+            print(f"  Failed: {len(failures)} (templates {', '.join(str(i) for i in sorted(failures))})")
+        print(f"\nTemplates saved to: {PENDING_DIR}/")
         print(f"CEO Dashboard will show these for approval")
+        print(self.cache.summary())
+        print(get_rate_limiter().summary())
+        print(prompt_cache_summary())
         print(f"{'='*60}\n")
-        
-        return results
+
+def parse_args(argv=None):
+    """Parse command line options for a template run"""
+    parser = argparse.ArgumentParser(description="AI Factory template builder")
+    parser.add_argument("--count", type=int, default=3, help="number of templates to create")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="templates in flight at once")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always call the API instead of replaying cached responses")
+    parser.add_argument("--no-llm-review", action="store_true",
+                        help="never ask the LLM grader, even for scores near the threshold")
+    parser.add_argument("--batch", action="store_true",
+                        help="submit every request through the Message Batches API (cheaper, slower)")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    builder = TemplateBuilder()
-    results = builder.run_template_creation(count=3)
+    args = parse_args()
+    builder = TemplateBuilder(use_cache=not args.no_cache, llm_review=not args.no_llm_review)
+    if args.batch:
+        results = builder.run_batch_creation(count=args.count)
+    else:
+        results = builder.run_template_creation(count=args.count, max_workers=args.workers)
@@ -0,0 +1,153 @@
+"""
+Usage Ledger - Append-only JSONL record of every LLM call
+One line per call (engine, method, model, tokens, latency, stop reason) so token
+spend and wall time can be attributed to the stage that caused them
+"""
+
+import os
+import re
+import json
+import threading
+from datetime import datetime, timedelta
+
+LEDGER_PATH = "/home/claude/ai-factory/logs/llm_usage.jsonl"
+
+TOKEN_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+_lock = threading.Lock()
+
+
+def record_call(label, model, message=None, latency=0.0, wall=0.0, attempts=1,
+                cached=False, streamed=False, batched=False, error=None, ledger_path=LEDGER_PATH):
+    """Append one call to the ledger; never lets a logging failure break the call"""
+    engine, _, method = (label or "unlabelled").partition(".")
+    usage = getattr(message, "usage", None)
+    entry = {
+        "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+        "engine": engine,
+        "method": label or "unlabelled",
+        "model": model,
+        **{field: getattr(usage, field, None) or 0 for field in TOKEN_FIELDS},
+        "latency_s": round(latency, 3),
+        "wall_s": round(wall, 3),
+        "attempts": attempts,
+        "stop_reason": getattr(message, "stop_reason", None) if error is None else "error",
+        "cached": cached,
+        "streamed": streamed,
+        "batched": batched,
+    }
+    if error is not None:
+        entry["error"] = f"{type(error).__name__}: {error}"
+
+    line = json.dumps(entry) + "\n"
+    try:
+        with _lock:
+            os.makedirs(os.path.dirname(ledger_path), exist_ok=True)
+            with open(ledger_path, 'a') as f:
+                f.write(line)
+    except OSError as e:
+        print(f"  ⚠ Could not write usage ledger: {e}")
+
+
+def parse_since(value):
+    """'24h', '7d', '30m' or an ISO date/datetime -> datetime (None means no limit)"""
+    if not value:
+        return None
+    match = re.fullmatch(r"(\d+)([mhd])", value.strip())
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        delta = {"m": timedelta(minutes=amount), "h": timedelta(hours=amount), "d": timedelta(days=amount)}[unit]
+        return datetime.now() - delta
+    return datetime.fromisoformat(value)
+
+
+def read_entries(since=None, ledger_path=LEDGER_PATH):
+    """Ledger entries at or after `since`, skipping any torn lines"""
+    if not os.path.exists(ledger_path):
+        return []
+
+    cutoff = since.isoformat() if since else None
+    entries = []
+    with open(ledger_path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if cutoff and entry.get("timestamp", "") < cutoff:
+                continue
+            entries.append(entry)
+    return entries
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(entries):
+    """Per-method aggregates: calls, response-cache hits, errors, latency percentiles, token totals"""
+    by_method = {}
+    for entry in entries:
+        by_method.setdefault(entry["method"], []).append(entry)
+
+    rows = []
+    for method, calls in by_method.items():
+        # Latency percentiles only make sense for calls that actually reached the API
+        # interactively; a batched call's latency is the whole batch's turnaround
+        live = [c for c in calls if not c.get("cached") and c.get("stop_reason") != "error"]
+        latencies = [c["latency_s"] for c in live if not c.get("batched")]
+        row = {
+            "method": method,
+            "calls": len(calls),
+            "cache_hits": sum(1 for c in calls if c.get("cached")),
+            "errors": sum(1 for c in calls if c.get("stop_reason") == "error"),
+            "truncated": sum(1 for c in calls if c.get("stop_reason") == "max_tokens"),
+            "p50_latency_s": percentile(latencies, 50),
+            "p95_latency_s": percentile(latencies, 95),
+            "wall_s": sum(c.get("wall_s", 0) for c in calls),
+        }
+        for field in TOKEN_FIELDS:
+            row[field] = sum(c.get(field, 0) for c in live)
+        rows.append(row)
+
+    rows.sort(key=lambda r: r["input_tokens"] + r["output_tokens"] + r["cache_creation_input_tokens"], reverse=True)
+    return rows
+
+
+def print_stats(since=None, ledger_path=LEDGER_PATH):
+    """Table of per-stage latency and token spend over a time window"""
+    entries = read_entries(parse_since(since), ledger_path)
+    window = f"since {since}" if since else "all time"
+
+    if not entries:
+        print(f"No LLM calls recorded ({window}) in {ledger_path}")
+        return []
+
+    rows = summarize(entries)
+    print(f"LLM usage {window}: {len(entries)} calls, "
+          f"{entries[0]['timestamp'][:16]} → {entries[-1]['timestamp'][:16]}\n")
+    print(f"{'Stage':<44} {'Calls':>5} {'Hits':>4} {'Err':>3} {'p50 s':>6} {'p95 s':>6} "
+          f"{'Wall s':>7} {'Input':>9} {'Output':>8} {'CacheW':>8} {'CacheR':>8}")
+    for r in rows:
+        print(f"{r['method'][:44]:<44} {r['calls']:>5} {r['cache_hits']:>4} {r['errors']:>3} "
+              f"{r['p50_latency_s']:>6.1f} {r['p95_latency_s']:>6.1f} {r['wall_s']:>7.1f} "
+              f"{r['input_tokens']:>9,} {r['output_tokens']:>8,} "
+              f"{r['cache_creation_input_tokens']:>8,} {r['cache_read_input_tokens']:>8,}")
+
+    totals = {field: sum(r[field] for r in rows) for field in TOKEN_FIELDS}
+    print(f"\nTotal tokens: {totals['input_tokens']:,} input, {totals['output_tokens']:,} output, "
+          f"{totals['cache_creation_input_tokens']:,} cache writes, {totals['cache_read_input_tokens']:,} cache reads")
+    truncated = sum(r["truncated"] for r in rows)
+    if truncated:
+        print(f"⚠ {truncated} responses stopped at max_tokens")
+    return rows
@@ -0,0 +1,250 @@
+"""
+Variant Builder - Build every SKU of a product in parallel
+Expands a variant matrix (market x horizon x industry x edition) into workbooks, builds
+them across CPU cores with a process pool and writes a manifest alongside
+"""
+
+import io
+import os
+import json
+import time
+import argparse
+import itertools
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from xlsx_styles import currency_format
+from engine_api import BUILDERS
+
+PRODUCTS_DIR = "/home/claude/ai-factory/products"
+
+# Workbook each builder writes into a variant's directory
+BUILDER_FILES = {
+    'cash_flow_forecaster': 'cash-flow-forecaster-pro.xlsx',
+    'saas_dashboard': 'saas-financial-dashboard.xlsx',
+}
+
+# Monthly expense lines (label, amount, note) for each industry edition
+INDUSTRY_EXPENSES = {
+    'general': [
+        ('Operating Expenses', 18000, 'Rent, payroll, utilities, etc.'),
+    ],
+    'saas': [
+        ('Payroll', 11000, 'Engineering, support and sales salaries'),
+        ('Hosting & Infrastructure', 2500, 'Cloud, CDN, monitoring'),
+        ('Software & Tools', 1200, 'Subscriptions your team uses'),
+        ('Rent & Office', 1800, 'Office, coworking, utilities'),
+        ('Other Operating Expenses', 1500, 'Insurance, legal, accounting'),
+    ],
+    'retail': [
+        ('Inventory Purchases', 9000, 'Stock bought for resale'),
+        ('Store Rent', 3500, 'Lease, service charges'),
+        ('Payroll', 4500, 'Store staff wages'),
+        ('Utilities', 600, 'Power, water, internet'),
+        ('Other Operating Expenses', 400, 'Insurance, card fees, supplies'),
+    ],
+    'agency': [
+        ('Payroll', 7500, 'Account managers and staff'),
+        ('Contractors', 7000, 'Freelancers on client work'),
+        ('Software & Tools', 900, 'Design, PM and reporting tools'),
+        ('Rent & Office', 1800, 'Office, coworking, utilities'),
+        ('Other Operating Expenses', 800, 'Insurance, legal, accounting'),
+    ],
+    'restaurant': [
+        ('Food & Beverage Costs', 7000, 'Ingredients and drinks'),
+        ('Payroll', 6500, 'Kitchen and floor staff'),
+        ('Rent', 3000, 'Lease, service charges'),
+        ('Utilities', 900, 'Gas, power, water'),
+        ('Other Operating Expenses', 600, 'Insurance, repairs, licenses'),
+    ],
+}
+
+# (currency, locale) pairs a product is sold in
+DEFAULT_MARKETS = [
+    ('USD', 'en-US'),
+    ('CAD', 'en-CA'),
+    ('GBP', 'en-GB'),
+    ('AUD', 'en-AU'),
+    ('EUR', 'de-DE'),
+    ('EUR', 'fr-FR'),
+]
+
+# Editions each SKU can be sold as, and the Monte Carlo paths each one simulates
+EDITIONS = {
+    'standard': 0,
+    'premium': 100_000,
+}
+
+# Default matrix per product; products/<id>/variants.json overrides it
+PRODUCT_VARIANTS = {
+    'cash_flow_forecaster_pro': {
+        'builder': 'cash_flow_forecaster',
+        'markets': DEFAULT_MARKETS,
+        'months': [12, 24, 36],
+        'industries': list(INDUSTRY_EXPENSES),
+        'editions': list(EDITIONS),
+    },
+    'financial-templates': {
+        'builder': 'saas_dashboard',
+        'markets': DEFAULT_MARKETS,
+        'months': [12, 24],
+        'industries': ['saas'],
+        'editions': ['standard'],
+    },
+}
+
+
+def load_matrix(product_id, matrix_path=None):
+    """The product's variant matrix: an explicit file, products/<id>/variants.json, or the default"""
+    if product_id not in PRODUCT_VARIANTS:
+        raise ValueError(f"No variant builder for product: {product_id}")
+    matrix = dict(PRODUCT_VARIANTS[product_id])
+
+    matrix_path = matrix_path or f"{PRODUCTS_DIR}/{product_id}/variants.json"
+    if os.path.exists(matrix_path):
+        with open(matrix_path, 'r') as f:
+            matrix.update(json.load(f))
+    return matrix
+
+
+def expand_matrix(matrix):
+    """Every combination in the matrix as a variant dict with its SKU (premium SKUs get a suffix)"""
+    variants = []
+    for (currency, locale), months, industry, edition in itertools.product(
+            matrix['markets'], matrix['months'], matrix['industries'], matrix.get('editions', ['standard'])):
+        if industry not in INDUSTRY_EXPENSES:
+            raise ValueError(f"Unknown industry: {industry}")
+        if edition not in EDITIONS:
+            raise ValueError(f"Unknown edition: {edition}")
+        sku = f"{currency}-{locale}-{months}m-{industry}"
+        if edition != 'standard':
+            sku += f"-{edition}"
+        variants.append({
+            'sku': sku.lower(),
+            'currency': currency,
+            'locale': locale,
+            'months': months,
+            'industry': industry,
+            'edition': edition,
+        })
+    return variants
+
+
+def _mtime(path):
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+
+def build_variant(product_id, builder, variant, variants_dir, force=False, verify=False):
+    """Build one variant workbook (runs in a worker process); returns its manifest entry
+
+    The builders skip a workbook whose build-cache key is unchanged, so
+    re-running the catalog only rebuilds what changed. Variants skip the
+    formula check unless verify=True.
+    """
+    started = time.perf_counter()
+    output_dir = f"{variants_dir}/{variant['sku']}"
+    currency = currency_format(variant['currency'], variant['locale'])
+    previous = _mtime(f"{output_dir}/{BUILDER_FILES[builder]}")
+
+    if builder == 'cash_flow_forecaster':
+        opportunity = {'id': product_id, 'title': 'Cash Flow Forecaster Pro', 'price': 89}
+        options = {
+            'expense_lines': INDUSTRY_EXPENSES[variant['industry']],
+            'write_only': True,
+            'monte_carlo_paths': EDITIONS[variant['edition']],
+            'verify': verify,
+        }
+    elif builder == 'saas_dashboard':
+        if variant['edition'] != 'standard':
+            raise ValueError(f"{builder} has no {variant['edition']} edition")
+        opportunity, options = None, {'verify': verify}
+    else:
+        raise ValueError(f"Unknown builder: {builder}")
+
+    # Workers build quietly - the parent prints one progress line per variant
+    with redirect_stdout(io.StringIO()):
+        path = BUILDERS[builder](opportunity, output_dir, force, months=variant['months'], currency=currency,
+                                 **options)
+
+    return {
+        **variant,
+        'status': 'built' if _mtime(path) != previous else 'up to date',
+        'file': os.path.relpath(path, variants_dir),
+        'bytes': os.path.getsize(path),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def build_variants(product_id, workers=None, matrix_path=None, force=False, verify=False):
+    """Build every variant of a product across a process pool and write the manifest"""
+    matrix = load_matrix(product_id, matrix_path)
+    variants = expand_matrix(matrix)
+    variants_dir = f"{PRODUCTS_DIR}/{product_id}/built/variants"
+    os.makedirs(variants_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    print(f"\n🏭 Building {len(variants)} variants of {product_id} on {workers} workers")
+    print("=" * 60)
+
+    entries = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(build_variant, product_id, matrix['builder'], variant, variants_dir, force, verify): variant
+            for variant in variants
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            variant = futures[future]
+            try:
+                entry = future.result()
+                mark = "✓" if entry['status'] == 'built' else "⏭️ "
+                print(f"  {mark} [{done}/{len(variants)}] {entry['sku']} {entry['status']} "
+                      f"({entry['seconds']:.2f}s, {entry['bytes'] / 1024:.0f} KB)")
+            except Exception as e:
+                entry = {**variant, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+                print(f"  ❌ [{done}/{len(variants)}] {variant['sku']}: {entry['error']}")
+            entries.append(entry)
+
+    elapsed = time.perf_counter() - started
+    entries.sort(key=lambda e: e['sku'])
+    built = [e for e in entries if e['status'] == 'built']
+    current = [e for e in entries if e['status'] == 'up to date']
+    failed = [e for e in entries if e['status'] == 'failed']
+
+    manifest = {
+        'product_id': product_id,
+        'generated': datetime.now().isoformat(),
+        'builder': matrix['builder'],
+        'matrix': {key: matrix.get(key, ['standard']) for key in ('markets', 'months', 'industries', 'editions')},
+        'workers': workers,
+        'seconds': round(elapsed, 2),
+        'built': len(built),
+        'up_to_date': len(current),
+        'failed': len(failed),
+        'variants': entries,
+    }
+    manifest_path = f"{variants_dir}/manifest.json"
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print("\n" + "=" * 60)
+    print(f"✅ {len(built)} variants built, {len(current)} up to date, {len(failed)} failed in {elapsed:.1f}s "
+          f"({len(built) / elapsed if elapsed else 0:.1f} workbooks/sec)")
+    for entry in failed:
+        print(f"  ❌ {entry['sku']}: {entry['error']}")
+    print(f"Manifest: {manifest_path}")
+    print("=" * 60 + "\n")
+
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build every SKU variant of a product")
+    parser.add_argument("product_id", choices=sorted(PRODUCT_VARIANTS))
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--matrix", help="Variant matrix JSON (default: products/<id>/variants.json)")
+    parser.add_argument("--force", action="store_true", help="Rebuild variants whose inputs haven't changed")
+    parser.add_argument("--verify", action="store_true", help="Check every variant's formulas and store their values")
+    args = parser.parse_args()
+
+    build_variants(args.product_id, args.workers, args.matrix, args.force, args.verify)
@@ -0,0 +1,159 @@
+"""
+XLSX Styles - Named-style registry and row writer shared by the openpyxl product builders
+Styles are registered once per workbook and cells reference them by name, so
+a build creates a handful of Font/PatternFill objects instead of one per cell
+"""
+
+from openpyxl.cell import Cell
+from openpyxl.styles import NamedStyle, Font, PatternFill, Alignment
+from openpyxl.styles.fonts import DEFAULT_FONT
+
+CURRENCY = '$#,##0'
+PERCENT = '0.0%'
+
+# Symbols for the currencies product variants are sold in
+CURRENCY_SYMBOLS = {
+    'USD': '$', 'CAD': '$', 'AUD': '$', 'NZD': '$',
+    'GBP': '£', 'EUR': '€', 'JPY': '¥', 'INR': '₹',
+}
+
+# Locales that write the symbol after the amount (1.234 € rather than €1,234)
+SYMBOL_AFTER_LOCALES = {'de-DE', 'fr-FR', 'fr-CA', 'es-ES', 'it-IT', 'nl-NL', 'pt-PT'}
+
+
+def solid_fill(color):
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+def currency_format(currency='USD', locale='en-US'):
+    """Whole-unit number format for a currency, e.g. '$#,##0' or '#,##0 "€"'
+
+    Digit grouping and the decimal mark come from the reader's Excel
+    settings, so the locale only decides where the symbol goes.
+    """
+    symbol = CURRENCY_SYMBOLS[currency]
+    if symbol != '$':
+        symbol = f'"{symbol}"'
+    if locale in SYMBOL_AFTER_LOCALES:
+        return f'#,##0 {symbol}'
+    return f'{symbol}#,##0'
+
+
+def month_label(start_date, offset, fmt='%b %Y'):
+    """Header label for the month `offset` calendar months after start_date"""
+    year, month = divmod(start_date.month - 1 + offset, 12)
+    return start_date.replace(year=start_date.year + year, month=month + 1).strftime(fmt)
+
+
+class StyleRegistry:
+    """NamedStyles for one workbook, built from the builder's color palette
+
+    define() registers a style once; apply() assigns it to a cell range.
+    Registered names carry a prefix so they never collide with Excel's
+    built-in styles ("Title", "Total", "Input"...) in the Cell Styles gallery.
+    """
+
+    def __init__(self, wb, colors, prefix="Factory "):
+        self.wb = wb
+        self.colors = colors
+        self.prefix = prefix
+        self.names = set()
+
+    def color(self, key):
+        """Palette key or a literal ARGB/RGB value"""
+        return self.colors.get(key, key)
+
+    def define(self, name, size=None, bold=False, italic=False, color=None, fill=None,
+               number_format=None, horizontal=None):
+        """Register a named style (a second define() with the same name is a no-op)"""
+        if name in self.names:
+            return name
+
+        style = NamedStyle(name=self.prefix + name)
+        if size or bold or italic or color:
+            font = {"bold": bold, "italic": italic}
+            if size:
+                font["size"] = size
+            if color:
+                font["color"] = self.color(color)
+            style.font = Font(**font)
+        else:
+            # Number-format-only styles keep the workbook's default font
+            style.font = DEFAULT_FONT
+        if fill:
+            style.fill = solid_fill(self.color(fill))
+        if number_format:
+            style.number_format = number_format
+        if horizontal:
+            style.alignment = Alignment(horizontal=horizontal)
+
+        self.wb.add_named_style(style)
+        self.names.add(name)
+        return name
+
+    def full_name(self, name):
+        """The registered (prefixed) name of a defined style"""
+        if name not in self.names:
+            raise KeyError(f"Style not defined: {name}")
+        return self.prefix + name
+
+    def apply(self, ws, cell_range, name):
+        """Give every cell in `cell_range` ('A1', 'C5:N5', ...) the named style"""
+        full_name = self.full_name(name)
+
+        cells = ws[cell_range]
+        if not isinstance(cells, tuple):
+            cells.style = full_name
+            return
+        for row in cells:
+            if not isinstance(row, tuple):
+                row.style = full_name
+                continue
+            for cell in row:
+                cell.style = full_name
+
+
+class SheetWriter:
+    """Row-by-row writer that works for both normal and write-only worksheets
+
+    Rows are only ever appended, so in a write_only workbook each row is
+    streamed to disk as it is written and memory stays flat however many
+    months or line items a sheet has. Widths and row heights have to be known
+    before the rows they affect are written.
+    """
+
+    def __init__(self, ws, styles, widths=None):
+        self.ws = ws
+        self.styles = styles
+        self.row = 0
+        for col, width in (widths or {}).items():
+            ws.column_dimensions[col].width = width
+
+    def append(self, *cells, height=None):
+        """Append one row; each cell is a value or a (value, style name) pair. Returns the row number"""
+        self.row += 1
+        if height:
+            self.ws.row_dimensions[self.row].height = height
+
+        values = []
+        for column, cell in enumerate(cells, 1):
+            if isinstance(cell, tuple):
+                value, style = cell
+                cell = Cell(self.ws, row=self.row, column=column, value=value)
+                cell.style = self.styles.full_name(style)
+            values.append(cell)
+        self.ws.append(values)
+        return self.row
+
+    def skip(self, count=1):
+        """Leave `count` empty rows"""
+        for _ in range(count):
+            self.append()
+        return self.row
+
+    def merge(self, cell_range):
+        if hasattr(self.ws, 'merge_cells'):
+            self.ws.merge_cells(cell_range)
+        else:
+            # Write-only sheets emit their merged ranges when they are closed
+            self.ws.merged_cells.add(cell_range)
@@ -7,7 +7,12 @@ Run the entire factory with one command
 import os
 import sys
 import json
-from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "engines"))
+
+from opportunity_store import OpportunityStore
+from usage_ledger import parse_since, print_stats
+from engine_api import run_engine
 
 def print_header(text):
     """Print formatted header"""
@@ -15,36 +20,48 @@ def print_header(text):
     print(text.center(60))
     print("="*60 + "\n")
 
-def run_discovery():
-    """Run discovery engine to find new opportunities"""
+def run_discovery(flags=()):
+    """Run discovery engine to find new opportunities; returns them (None if discovery failed)"""
     print_header("🔍 RUNNING DISCOVERY")
     
-    os.chdir("/home/claude/ai-factory/engines")
-    result = os.system("python discovery_engine.py")
+    result = run_engine("discover", use_cache="--no-cache" not in flags, stream="--stream" in flags,
+                        use_async="--async" in flags)
     
-    if result == 0:
-        print("\n✅ Discovery complete - New opportunities found")
-        return True
+    if result.ok and result.value:
+        print(f"\n✅ Discovery complete - {len(result.value)} new opportunities found")
+        return result.value
+    elif result.ok:
+        print("\n⚠️ Discovery complete - no new opportunities found")
+        return result.value
     else:
-        print("\n❌ Discovery failed")
-        return False
+        print(f"\n❌ Discovery failed: {result.error or 'no opportunities returned'}")
+        return None
 
-def show_opportunities():
-    """Display current opportunities"""
+def show_opportunities(opportunities=None):
+    """Display current opportunities (the ones passed in, else the latest stored run)"""
     print_header("💡 CURRENT OPPORTUNITIES")
     
     opportunities_file = "/home/claude/ai-factory/opportunities/latest.json"
     
-    if not os.path.exists(opportunities_file):
+    if opportunities is not None:
+        # Straight from a discovery run in this process - nothing to re-read
+        opportunities = sorted(opportunities, key=lambda opp: opp.get('score', 0), reverse=True)
+        total = len(opportunities)
+    elif OpportunityStore.available():
+        # Only the top 5 rows and a count are needed - let SQLite do the work
+        with OpportunityStore() as store:
+            total = store.count_opportunities()
+            opportunities = store.top_opportunities(limit=5)
+    elif os.path.exists(opportunities_file):
+        with open(opportunities_file, 'r') as f:
+            data = json.load(f)
+        opportunities = data.get('opportunities', [])
+        total = len(opportunities)
+    else:
         print("No opportunities found. Run discovery first.")
         return []
     
-    with open(opportunities_file, 'r') as f:
-        data = json.load(f)
-    
-    opportunities = data.get('opportunities', [])
-    
-    print(f"Found {len(opportunities)} opportunities:\n")
+    print(f"Found {total} opportunities:\n")
     
     for i, opp in enumerate(opportunities[:5], 1):
         print(f"{i}. {opp['title']}")
@@ -56,43 +73,97 @@ def show_opportunities():
     
     return opportunities
 
-def build_product(opportunity_id):
-    """Build a product from opportunity"""
+def build_product(opportunity_id, force=False):
+    """Build a product from opportunity with its registered builder; returns the workbook path"""
     print_header(f"🏗️  BUILDING PRODUCT: {opportunity_id}")
     
-    # For now, just show what would happen
-    print("Product Builder would:")
-    print("1. Read opportunity details")
-    print("2. Generate product spec")
-    print("3. Build the product")
-    print("4. Run quality check")
-    print("5. Generate documentation")
-    print("6. Output ready-to-sell files")
-    print("\n⚠️  Manual build currently - use product_builder_engine.py")
+    # Opportunity lookup, build and the formula check all run in this process
+    result = run_engine("build", opportunity_id=opportunity_id, force=force)
+    
+    if result.ok:
+        print(f"✅ Product built in {result.seconds:.1f}s: {result.value}")
+        return result.value
+    else:
+        print(f"❌ Build failed: {result.error}")
+        return None
+
+def run_variant_build(product_id, workers=None, matrix_path=None, force=False):
+    """Build every SKU variant of a product in parallel"""
+    print_header(f"🧬 BUILDING VARIANTS: {product_id}")
+    
+    result = run_engine("build-variants", product_id=product_id, workers=workers, matrix_path=matrix_path,
+                        force=force)
+    if not result.ok:
+        print(f"❌ {result.error}")
+        return False
     
-    return True
+    return result.value['failed'] == 0
 
 def create_launch_package(product_id):
-    """Create launch materials"""
+    """Create launch materials; returns the launch directory"""
     print_header(f"🚀 CREATING LAUNCH PACKAGE: {product_id}")
     
-    os.chdir("/home/claude/ai-factory/engines")
-    result = os.system(f"python launch_engine.py")
+    result = run_engine("launch", product_id=product_id)
     
-    if result == 0:
+    if result.ok:
         print("\n✅ Launch package created")
-        return True
+        return result.value
     else:
-        print("\n❌ Launch package failed")
-        return False
+        print(f"\n❌ Launch package failed{': ' + result.error if result.error else ''}")
+        return None
+
+def launch_products(product_ids=(), all_products=False, changed=False, workers=None, verbose=False):
+    """Create launch packages for many products concurrently; returns the summary rows"""
+    print_header("🚀 LAUNCHING PRODUCTS")
+    
+    result = run_engine("launch-products", product_ids=product_ids, all_products=all_products, changed=changed,
+                        workers=workers, verbose=verbose)
+    if not result.ok:
+        print(f"❌ {result.error}")
+        return None
+    
+    return result.value
+
+def run_pipeline(run_id=None, top=None, flags=(), workers=None):
+    """Run discover -> build -> launch for every buildable opportunity as one dependency graph"""
+    from pipeline import run_factory
+    print_header("🏭 FACTORY RUN")
+    
+    try:
+        pipeline = run_factory(run_id, top, use_cache="--no-cache" not in flags, use_async="--async" in flags,
+                               force="--force" in flags, workers=workers)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return None
+    
+    print(f"Resume with: python factory.py run --resume {pipeline.run_id}")
+    return pipeline
+
+def option_value(name):
+    """The value after a --flag on the command line, or None"""
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        return sys.argv[i + 1] if i + 1 < len(sys.argv) else None
+    return None
 
 def show_status():
     """Show factory status"""
     print_header("🏭 AI FACTORY STATUS")
     
     # Check what exists
-    opportunities_exist = os.path.exists("/home/claude/ai-factory/opportunities/latest.json")
-    products_exist = os.path.exists("/home/claude/ai-factory/products")
+    latest_file = "/home/claude/ai-factory/opportunities/latest.json"
+    latest_run = None
+    total = 0
+    if OpportunityStore.available():
+        with OpportunityStore() as store:
+            latest_run = store.latest_run()
+            total = latest_run['total_opportunities'] if latest_run else 0
+    elif os.path.exists(latest_file):
+        with open(latest_file, 'r') as f:
+            latest_run = json.load(f)
+        total = len(latest_run.get('opportunities', []))
+    
+    opportunities_exist = latest_run is not None
     
     print(f"Discovery Agent: {'✅ Operational' if opportunities_exist else '⚠️ Not run yet'}")
     print(f"Product Builder: ✅ Ready")
@@ -100,14 +171,30 @@ def show_status():
     print(f"CEO Dashboard: ✅ Deployed")
     
     if opportunities_exist:
-        with open("/home/claude/ai-factory/opportunities/latest.json", 'r') as f:
-            data = json.load(f)
-        print(f"\nCurrent Opportunities: {len(data.get('opportunities', []))}")
-        print(f"Last Discovery Run: {data.get('timestamp', 'Unknown')}")
+        print(f"\nCurrent Opportunities: {total}")
+        print(f"Last Discovery Run: {latest_run.get('timestamp', 'Unknown')}")
     
     print(f"\nDashboard URL: https://ai-factory-mji8t7vuwc8gymmcgft6fk.streamlit.app/")
     print()
 
+def show_stats(since=None):
+    """Show LLM latency and token spend per stage from the usage ledger"""
+    print_header("📊 LLM USAGE")
+    try:
+        parse_since(since)
+    except ValueError as e:
+        print(f"❌ {e}")
+        print("   --since takes '24h', '7d', '30m' or an ISO date/datetime (e.g. 2026-01-31)")
+        return
+    print_stats(since)
+    print()
+
+def show_startup_report(commands=()):
+    """Time how long commands take to start and which imports they pay for"""
+    from startup_report import startup_report
+    print_header("⏱️  STARTUP TIME")
+    startup_report([command.split() for command in commands])
+
 def main():
     """Main control interface"""
     
@@ -125,8 +212,14 @@ def main():
         command = sys.argv[1]
         
         if command == "discover":
-            run_discovery()
-            show_opportunities()
+            opportunities = run_discovery([f for f in sys.argv[2:] if f in ("--async", "--stream", "--no-cache")])
+            show_opportunities(opportunities)
+        
+        elif command == "run":
+            top = option_value("--top")
+            workers = {stage: int(option_value(f"--{stage}-workers") or 0) for stage in ("build", "launch")}
+            run_pipeline(option_value("--resume"), int(top) if top else None,
+                         [f for f in sys.argv[2:] if f in ("--async", "--no-cache", "--force")], workers)
         
         elif command == "opportunities":
             show_opportunities()
@@ -134,20 +227,47 @@ def main():
         elif command == "build":
             if len(sys.argv) > 2:
                 product_id = sys.argv[2]
-                build_product(product_id)
+                build_product(product_id, "--force" in sys.argv)
             else:
-                print("Usage: python factory.py build <product_id>")
+                print("Usage: python factory.py build <product_id> [--force]")
         
-        elif command == "launch":
+        elif command == "build-variants":
             if len(sys.argv) > 2:
-                product_id = sys.argv[2]
-                create_launch_package(product_id)
+                workers = matrix_path = None
+                if "--workers" in sys.argv:
+                    i = sys.argv.index("--workers")
+                    workers = int(sys.argv[i + 1]) if i + 1 < len(sys.argv) else None
+                if "--matrix" in sys.argv:
+                    i = sys.argv.index("--matrix")
+                    matrix_path = sys.argv[i + 1] if i + 1 < len(sys.argv) else None
+                run_variant_build(sys.argv[2], workers, matrix_path, "--force" in sys.argv)
+            else:
+                print("Usage: python factory.py build-variants <product_id> [--workers N] [--matrix file.json] [--force]")
+        
+        elif command == "launch":
+            workers = option_value("--workers")
+            product_ids = [a for a in sys.argv[2:] if not a.startswith("--") and a != workers]
+            if "--all" in sys.argv or "--changed" in sys.argv or len(product_ids) > 1:
+                launch_products(product_ids, "--all" in sys.argv, "--changed" in sys.argv,
+                                int(workers) if workers else None, "--verbose" in sys.argv)
+            elif product_ids:
+                create_launch_package(product_ids[0])
             else:
-                print("Usage: python factory.py launch <product_id>")
+                print("Usage: python factory.py launch <product_id> | --all | --changed [--workers N]")
         
         elif command == "status":
             show_status()
         
+        elif command == "stats":
+            since = None
+            if "--since" in sys.argv:
+                i = sys.argv.index("--since")
+                since = sys.argv[i + 1] if i + 1 < len(sys.argv) else None
+            show_stats(since)
+        
+        elif command == "startup":
+            show_startup_report(sys.argv[2:])
+        
         else:
             print(f"Unknown command: {command}")
             print_commands()
@@ -161,10 +281,30 @@ def print_commands():
 AVAILABLE COMMANDS:
 
   python factory.py discover      - Find new product opportunities
+                   [--async]      - Fetch all sources concurrently
+                   [--stream]     - Publish opportunities as they generate
+  python factory.py run           - Discover, then build and launch every buildable opportunity concurrently
+                   [--top 5]      - Only build and launch the 5 best opportunities
+                   [--resume id]  - Resume an interrupted run from its state file
+                   [--build-workers 4] [--launch-workers 4]
+                                  - Worker pool sizes (default: one build per CPU, 4 launches)
   python factory.py opportunities - Show current opportunities
-  python factory.py build <id>    - Build a product
+  python factory.py build <id>    - Build a product with its registered builder
+                   [--force]      - Rebuild even if the inputs haven't changed
+  python factory.py build-variants <id>
+                                  - Build every currency/horizon/industry SKU in parallel
+                   [--workers 8]  - Worker processes (default: one per CPU)
+                   [--matrix f]   - Variant matrix JSON (default: products/<id>/variants.json)
+                   [--force]      - Rebuild variants whose inputs haven't changed
   python factory.py launch <id>   - Create launch package
+                   [--all]        - Every product in products/*/built, several at a time
+                   [--changed]    - Only products rebuilt since their launch package
+                   [--workers 4]  - Launch packages generated at once
+                   [--verbose]    - Print every package's output (failures always are)
   python factory.py status        - Show factory status
+  python factory.py stats         - LLM latency (p50/p95) and tokens per stage
+                   [--since 24h]  - Only calls in the last 30m / 24h / 7d or since a date
+  python factory.py startup [cmd] - Startup time and imports per command (default: read-only ones)
 
 WORKFLOW:
 
@@ -175,6 +315,8 @@ WORKFLOW:
   5. Upload to Gumroad
   6. Repeat
 
+  Steps 1-4 without stopping to review: python factory.py run
+
 DASHBOARD:
   https://ai-factory-mji8t7vuwc8gymmcgft6fk.streamlit.app/
 
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import socket
+import threading
+
+import pytest
+
+ENGINES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "engines")
+sys.path.insert(0, ENGINES_DIR)
+
+import local_api_stub  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def api_stub(monkeypatch):
+    """Start local_api_stub.serve on a free port; returns its base URL (also set as ANTHROPIC_BASE_URL)"""
+
+    def start(**options):
+        port = free_port()
+        options.setdefault("latency", 0)
+        threading.Thread(target=local_api_stub.serve, kwargs=dict(port=port, **options), daemon=True).start()
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.02)
+        url = f"http://127.0.0.1:{port}"
+        monkeypatch.setenv("ANTHROPIC_BASE_URL", url)
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "stub")
+        return url
+
+    return start
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    """Usage-ledger entries recorded by llm.py, kept in memory instead of the real ledger"""
+    import llm
+    entries = []
+
+    def record(label, model, message=None, latency=0.0, wall=0.0, attempts=1, **flags):
+        entries.append({"label": label, "message": message, "attempts": attempts, **flags})
+
+    monkeypatch.setattr(llm, "record_call", record)
+    return entries
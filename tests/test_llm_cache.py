@@ -0,0 +1,49 @@
+import os
+import json
+import time
+from types import SimpleNamespace
+
+from llm_cache import ResponseCache, request_key
+
+
+def message(text):
+    return SimpleNamespace(id="msg", model="stub-model", stop_reason="end_turn",
+                           content=[SimpleNamespace(type="text", text=text)], usage=None)
+
+
+def params(n):
+    return {"model": "stub-model", "messages": [{"role": "user", "content": f"prompt {n}"}]}
+
+
+def test_evict_expires_hot_entries_by_created_at(tmp_path):
+    cache = ResponseCache("test", cache_dir=str(tmp_path), ttl_seconds=60)
+    cache.put(params(1), message("old"))
+    path = cache._path(request_key(params(1)))
+
+    # Created two TTLs ago but just used: get() already treats it as expired, so evict must too
+    with open(path) as f:
+        entry = json.load(f)
+    entry["created_at"] = time.time() - 120
+    with open(path, "w") as f:
+        json.dump(entry, f)
+    os.utime(path, None)
+
+    cache.evict()
+    assert not os.path.exists(path)
+    assert cache.stats["evictions"] == 1
+
+
+def test_evict_orders_by_last_use(tmp_path):
+    cache = ResponseCache("test", cache_dir=str(tmp_path), max_entries=2)
+    for n in range(2):
+        cache.put(params(n), message(f"reply {n}"))
+        past = time.time() - 100 + n
+        os.utime(cache._path(request_key(params(n))), (past, past))
+
+    # A hit makes entry 0 the most recently used, so entry 1 goes when entry 2 arrives
+    assert cache.get(params(0)) is not None
+    cache.put(params(2), message("reply 2"))
+
+    assert cache.get(params(0)) is not None
+    assert cache.get(params(1)) is None
+    assert cache.get(params(2)) is not None
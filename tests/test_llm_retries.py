@@ -0,0 +1,116 @@
+import time
+import asyncio
+
+import anthropic
+import pytest
+
+import llm
+from rate_limiter import RateLimiter
+
+PARAMS = {"model": "stub-model", "max_tokens": 100, "messages": [{"role": "user", "content": "Hello"}]}
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RateLimiter(requests_per_minute=40, tokens_per_minute=100000)
+    monkeypatch.setattr(llm, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(llm, "RETRY_BASE_SECONDS", 0.01)
+    return limiter
+
+
+def client(url):
+    return anthropic.Anthropic(api_key="stub", base_url=url)
+
+
+def test_429_backs_off_for_retry_after_and_retries(api_stub, limiter, ledger):
+    url = api_stub(rpm=1000, fail_every=2)
+    llm.create_message(client(url), label="Test.first", **PARAMS)
+
+    started = time.monotonic()
+    message = llm.create_message(client(url), label="Test.second", **PARAMS)
+
+    assert message.content[0].text
+    # The stub's 429 carries retry-after: 1, and the limiter holds the retry for it
+    assert time.monotonic() - started >= 0.9
+    assert limiter.stats["rate_limited"] == 1
+    assert [entry["attempts"] for entry in ledger] == [1, 2]
+
+
+def test_ceiling_follows_the_rate_limit_headers(api_stub, limiter, ledger):
+    url = api_stub(rpm=20)
+    llm.create_message(client(url), label="Test.call", **PARAMS)
+
+    assert limiter.rpm_ceiling == 20
+    assert limiter.rpm <= 20
+
+
+def test_each_429_halves_the_rate(api_stub, limiter, ledger, monkeypatch):
+    monkeypatch.setattr(llm, "MAX_ATTEMPTS", 3)
+    url = api_stub(rpm=1000, fail_every=1)
+
+    with pytest.raises(anthropic.RateLimitError):
+        llm.create_message(client(url), label="Test.call", **PARAMS)
+
+    # Two retried 429s halve 40 RPM twice; the last one is raised without backing off
+    assert limiter.rpm == 10
+    assert limiter.stats["rate_limited"] == 2
+    assert ledger[-1]["attempts"] == 3
+    assert ledger[-1]["error"].status_code == 429
+
+
+@pytest.mark.parametrize("status", [500, 529, 408, 409])
+def test_transient_errors_are_retried(api_stub, limiter, ledger, status):
+    url = api_stub(rpm=1000, fail_every=2, fail_status=status)
+    llm.create_message(client(url), label="Test.first", **PARAMS)
+    message = llm.create_message(client(url), label="Test.second", **PARAMS)
+
+    assert message.content[0].text
+    assert ledger[-1]["attempts"] == 2
+    # Only 429 / 529 slow the whole limiter down
+    assert limiter.stats["rate_limited"] == (1 if status == 529 else 0)
+
+
+def test_client_errors_are_not_retried(api_stub, limiter, ledger):
+    url = api_stub(rpm=1000, fail_every=1, fail_status=400)
+
+    with pytest.raises(anthropic.BadRequestError):
+        llm.create_message(client(url), label="Test.call", **PARAMS)
+
+    assert ledger[-1]["attempts"] == 1
+
+
+def test_connection_errors_are_retried_and_recorded(limiter, ledger, monkeypatch):
+    from conftest import free_port
+    monkeypatch.setattr(llm, "MAX_ATTEMPTS", 3)
+    closed = anthropic.Anthropic(api_key="stub", base_url=f"http://127.0.0.1:{free_port()}")
+
+    with pytest.raises(anthropic.APIConnectionError):
+        llm.create_message(closed, label="Test.call", **PARAMS)
+
+    assert ledger[-1]["attempts"] == 3
+    assert isinstance(ledger[-1]["error"], anthropic.APIConnectionError)
+    assert limiter.stats["requests"] == 3
+
+
+def test_stream_retries_a_server_error_before_any_text(api_stub, limiter, ledger):
+    url = api_stub(rpm=1000, fail_every=2, fail_status=500)
+    llm.create_message(client(url), label="Test.first", **PARAMS)
+
+    chunks = []
+    message = llm.stream_message(client(url), chunks.append, label="Test.stream", **PARAMS)
+
+    assert "".join(chunks) == message.content[0].text
+    assert ledger[-1]["attempts"] == 2
+    assert ledger[-1]["streamed"]
+
+
+def test_async_send_retries_a_server_error(api_stub, limiter, ledger):
+    url = api_stub(rpm=1000, fail_every=2, fail_status=500)
+
+    async def send_two():
+        async_client = anthropic.AsyncAnthropic(api_key="stub", base_url=url)
+        await llm.acreate_message(async_client, label="Test.first", **PARAMS)
+        await llm.acreate_message(async_client, label="Test.second", **PARAMS)
+
+    asyncio.run(send_two())
+    assert ledger[-1]["attempts"] == 2
@@ -0,0 +1,20 @@
+from opportunity_store import OpportunityStore
+
+
+def test_save_run_keeps_opportunities_with_duplicate_ids(tmp_path):
+    run = {
+        "run_id": "discovery_1",
+        "timestamp": "2026-01-01T00:00:00",
+        "opportunities": [{"id": "budget_tool", "score": 70}, {"id": "budget_tool", "score": 80},
+                          {"title": "No id", "score": 60}, {"id": "budget_tool", "score": 50}],
+    }
+    with OpportunityStore(str(tmp_path / "opportunities.db")) as store:
+        store.save_run(run)
+
+        assert store.count_opportunities() == 4
+        assert store.latest_run()["total_opportunities"] == 4
+        assert sorted(row["id"] for row in store.opportunity_summaries()) == [
+            "budget_tool", "budget_tool-2", "budget_tool-3", "opportunity_3"]
+        assert store.get_opportunity("budget_tool-2")["score"] == 80
+    # The caller's records are left as they were
+    assert run["opportunities"][1]["id"] == "budget_tool"
@@ -0,0 +1,25 @@
+import os
+
+from quality_scorer import QualityScorer, color_names
+
+AGENT_DOC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents",
+                         "TEMPLATE_BUILDER_AGENT.md")
+
+
+def test_color_names_accepts_a_string_scheme():
+    assert color_names("navy and gold") == ["navy", "gold"]
+    assert color_names("#1e3a8a, Green / gray") == ["green", "gray"]
+    assert color_names({"primary": "#1E3A8A", "accent": "green"}) == ["green"]
+    assert color_names(["Navy", "#1E3A8A"]) == ["navy"]
+    assert color_names(None) == []
+
+
+def test_string_scheme_scores_like_the_same_list():
+    with open(AGENT_DOC) as f:
+        scorer = QualityScorer(f.read())
+    structure = "Dashboard sheet with a header section"
+
+    as_string = scorer.score({"design_specs": {"color_scheme": "navy and gold"}}, structure)
+    as_list = scorer.score({"design_specs": {"color_scheme": ["navy", "gold"]}}, structure)
+
+    assert as_string["design_score"] == as_list["design_score"]
@@ -0,0 +1,58 @@
+import os
+import json
+import functools
+
+import anthropic
+import pytest
+
+import agent_docs
+import batch_runner
+import template_engine
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents")
+
+
+@pytest.fixture
+def batch_builder(api_stub, ledger, monkeypatch, tmp_path):
+    """A TemplateBuilder whose batches go to the stub; every score counts as borderline, so each template
+    that gets a structure also goes through the quality-check batch"""
+
+    def make(**stub_options):
+        url = api_stub(batch_seconds=0.1, **stub_options)
+        monkeypatch.setattr(template_engine, "client", anthropic.Anthropic(api_key="stub", base_url=url))
+        monkeypatch.setattr(template_engine, "BatchRunner",
+                            functools.partial(batch_runner.BatchRunner, poll_interval=0.05))
+        monkeypatch.setattr(batch_runner, "record_call", lambda *args, **kwargs: None)
+        monkeypatch.setattr(template_engine, "PENDING_DIR", str(tmp_path))
+        monkeypatch.setattr(template_engine, "load_agent_doc",
+                            lambda name: agent_docs.load_agent_doc(name, AGENTS_DIR))
+        monkeypatch.setattr(template_engine, "agent_system", lambda name: agent_docs.agent_system(name, AGENTS_DIR))
+        monkeypatch.setattr(template_engine, "is_borderline", lambda score: True)
+        return template_engine.TemplateBuilder(use_cache=False)
+
+    return make
+
+
+def test_batch_run_end_to_end(batch_builder, tmp_path):
+    results = batch_builder().run_batch_creation(count=3)
+
+    assert [result["id"][-3:] for result in results] == ["001", "002", "003"]
+    assert len(list(tmp_path.glob("template_*.json"))) == 3
+    # The stub's grader reply replaced the rule-based score
+    assert all(result["quality_score"]["scorer"] == "llm" for result in results)
+
+
+def test_batch_run_survives_errored_items(batch_builder, tmp_path, capsys):
+    # Every 3rd request of each batch errors: concept 3, then the structure
+    # of template 4, then the quality check of template 5
+    builder = batch_builder(fail_every=3)
+    results = builder.run_batch_creation(count=5)
+    output = capsys.readouterr().out
+
+    assert [result["id"][-3:] for result in results] == ["001", "002", "005"]
+    assert "[5] ⚠ No LLM second opinion (quality_check-005: errored Stub batch failure)" in output
+    assert "Failed: 2 (templates 3, 4)" in output
+    # Template 5 keeps its rule-based score; the others got the grader's
+    assert [result["quality_score"]["scorer"] for result in results] == ["llm", "llm", "rules"]
+    saved = [json.loads(path.read_text()) for path in sorted(tmp_path.glob("template_*.json"))]
+    assert [package["id"] for package in saved] == [result["id"] for result in results]